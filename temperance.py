@@ -1,4 +1,11 @@
-import random # To be able to obtain random numbers in the simulation.
+import random # To be able to obtain a random seed for the simulation.
+import argparse # For the command line options.
+import ast # To read the values of settings given on the command line.
+import functools # For the decision score cache.
+import io # To put a whole frame together before it is written.
+import json # For config files.
+import sys
+import time # To limit the number of frames per second.
 
 # The following variables can be changed:
 NUMBER_AGENTS = 5 # Number of agents to create.
@@ -12,6 +19,18 @@ AGENT_SOCIALPRESSURE = .2 # Social pressure increases the more the agent interac
 NUMBER_FOOD = 10 # Number of food patches to create.
 SIM_AREA = 5 # Area for the grid world. Creates an x by x grid square.
 FOOD_REGROWTH = 1 # X number of turns before food regrows at a food patch.
+DECISION_CACHE_SIZE = 4096 # Number of decision scores every simulation remembers (see decisionCache below). 0 turns
+                           # it off.
+SEED = None # The seed for all the random numbers of a run (see randomStream below). None means a new seed
+            # every time, which is printed at the start so that the run can be repeated.
+RENDER_MODE = "text" # How the grid world is drawn (see the renderer class below): "text" prints the grid world and
+                     # the information panel after every step, "terminal" redraws only the square locations that
+                     # changed, in place (this needs a terminal that understands ANSI escape codes), and "none"
+                     # draws nothing.
+RENDER_FPS = 20 # In "terminal" mode, the most frames drawn per second. Frames that come sooner are skipped.
+LEGACY_DEATH_SKIP = False # In the original version of this script, an agent that died made the next agent in the
+                          # agent list miss its turn in that step. Set this to True to do the same, e.g. to compare
+                          # with the results of the article.
 
 # For reference, the five cognitive rules that agents in the simulation can learn:
 rule1Text = "Consuming 1 food is good for me."
@@ -19,252 +38,573 @@ rule2Text = "Consuming 2 food is very good for me."
 rule3Text = "Consuming 2 food is bad for the community."
 rule4Text = "Consuming 3 food is bad for me."
 rule5Text = "Consuming 3 food is bad for the community."
+
+##########################################################################################################
+##       Random numbers - Every agent has its own stream of random numbers, and so does the world       ##
+##########################################################################################################
+
+# All the random numbers of a run come from SEED. Instead of one generator shared by everything (where the numbers
+# an agent gets depend on how many numbers were taken before it), every agent has its own stream of random numbers
+# and the grid world has one more for creating the agents and food. The n-th number of a stream only depends on
+# SEED, the stream number (0 for the world, the agent id + 1 for an agent) and n, so a run gives exactly the same
+# results from the same SEED no matter in which order, or in which process, the agents are handled. The numbers
+# are made with the SplitMix64 method.
+MASK64 = (1 << 64) - 1 # Keeps numbers within 64 bits.
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15 # The step between the inner states of a SplitMix64 stream.
+
+def mix64(z):
+    # Scrambles the bits of a 64-bit number (the SplitMix64 output function).
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+# The random stream class:
+class randomStream:
+    __slots__ = ("key", "counter")
+
+    # Initialization of the random stream class: the key identifies the stream, and the counter is the number of
+    # random numbers taken from it so far.
+    def __init__(self, seed, stream):
+        self.key = mix64((mix64(seed & MASK64) + (stream + 1) * GOLDEN_GAMMA) & MASK64)
+        self.counter = 0
+
+    def next64(self):
+        # The next random 64-bit number of the stream.
+        self.counter += 1
+        return mix64((self.key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def randint(self, low, high):
+        # A random integer from low to high (both included), like random.randint.
+        return low + self.next64() % (high - low + 1)
+
+    def shuffle(self, items):
+        # Shuffles the list in place, like random.shuffle.
+        for i in reversed(range(1, len(items))):
+            j = self.randint(0, i)
+            items[i], items[j] = items[j], items[i]
+
  
 # The agent class:
 class agent:
+    # The attributes of the agent are listed in __slots__, so that each agent takes little memory and its attributes
+    # are quick to get to, even with millions of agents.
+    __slots__ = ("id", "xPosition", "yPosition", "health",
+                 "rule1weight", "rule2weight", "rule3weight", "rule4weight", "rule5weight",
+                 "timesSick3", "timesPunished3", "timesPunished2", "socialPressure",
+                 "seeing", "seeingScores", "pursuing", "consuming", "rng", "punished")
+
     # Initialization of the agent class:
-    def __init__(self, id, x, y):
+    def __init__(self, id, x, y, health):
         self.id = id # An identification number for the agent.
         self.xPosition = x # The coordinate position of the agent on the map.
         self.yPosition = y
-        self.health = AGENT_HEALTH # The starting health of the agent. Taken from the constant variables above.
-        # The cognitive rules known by the agent along with their corresponding weights (refer to the text above).
-        # At the start, the agent does not know any of these rules. It has to learn them from experience.
-        self.rules = {"rule1": False, "rule1weight": 0,
-                      "rule2": False, "rule2weight": 0,
-                      "rule3": False, "rule3weight": 0,
-                      "rule4": False, "rule4weight": 0,
-                      "rule5": False, "rule5weight": 0}
+        self.health = health # The starting health of the agent (AGENT_HEALTH in the config of the simulation).
+        # The weights of the cognitive rules known by the agent (refer to the text above). At the start, the agent
+        # does not know any of these rules. It has to learn them from experience. A rule is known once its weight
+        # is more than 0, because the weight goes up by 1 every time the agent learns it.
+        self.rule1weight = 0
+        self.rule2weight = 0
+        self.rule3weight = 0
+        self.rule4weight = 0
+        self.rule5weight = 0
         self.timesSick3 = 0 # Number of times the agent has become sick from eating 3 units of food.
         self.timesPunished3 = 0 # Number of times the agent was punished by others for eating 3 food.
         self.timesPunished2 = 0 # Number of times the agent was punished by others for eating 2 food.
         self.socialPressure = 0 # Number of times the agent has "interacted" with other agents. 
                                # Again, this simply means eating food in the presence of other agents.
-        self.seeing = [] # All the food seen by the agent inside its range of vision. 
-        self.seeingScores = [] # The decision-making scores for all the food seen.
-        self.pursuing = []  # To indicate the food currently being pursued.
-        self.consuming = [] # To indicate the food currently being consumed.
+        # All the food seen by the agent inside its range of vision, and the decision-making scores for all the
+        # food seen. They start as empty tuples instead of lists, because all agents can share the same one.
+        self.seeing = ()
+        self.seeingScores = ()
+        self.pursuing = -1  # The id of the food currently being pursued, -1 if none.
+        self.consuming = -1 # The id of the food currently being consumed, -1 if none.
         self.punished = False # To indicate if the agent is currently punished by other agents.
+        self.rng = None # The agent's own stream of random numbers (see the randomStream class above).
 
 # The food class:
 class food:
+    # As with the agent class, the attributes are listed in __slots__.
+    __slots__ = ("id", "xPosition", "yPosition", "amount", "consumed", "regrowStep")
+
     # Initialization of the food class:
     def __init__(self, id, x, y, amount):
-        self.id = id # An identification number for the food.
+        self.id = id # An identification number for the food. It is also its position in the food list.
         self.xPosition = x # The coordinate position of the food on the map.
         self.yPosition = y
         self.amount = amount # The amount of food, from 1 to 3 units.
         self.consumed = False # To indicate if the food has been consumed in the food patch. 
                               # If true, it disappears and will regrow later.
-        self.regrowthTimer = FOOD_REGROWTH # A timer to determine when the food will regrow. Taken from the constant
-                                           # variables above.
+        self.regrowStep = -1 # The step at the start of which consumed food regrows (see the regrowth schedule
+                             # functions below).
 
 
 ##################################################################################################################
 ##       Decision-Making Process - The crucial function for the agents which uses a simple PECS framework       ##
 ##################################################################################################################
 
-def decision(agent, food):
+def decisionFeatures(agent):
+    # The agent's information used by the decision-making process, in the column order expected by decisionBatch.
+    # A rule that the agent does not know always has a weight of 0, so only the rule weights are needed.
+    return (agent.health, agent.timesSick3,
+            agent.rule1weight, agent.rule2weight, agent.rule3weight,
+            agent.rule4weight, agent.rule5weight,
+            agent.timesPunished2, agent.timesPunished3, agent.socialPressure)
+
+def decisionBatch(agentFeatures, foodAmounts, lookup=None):
+    # Scores many (agent, food) pairs at once. agentFeatures has one row per pair (see decisionFeatures above) and
+    # foodAmounts has the amount of the food in each pair. Returns one row of scores per pair. The scores come from
+    # lookup, a decision score cache (see decisionCache below), or are always worked out if there is none.
+    if lookup is None: lookup = decisionScores
+    scores = []
+    lastFeatures = None
+    for features, amount in zip(agentFeatures, foodAmounts):
+        # Rows for the same agent usually come one after the other, so the agent's part of the scores is only
+        # worked out again when the agent changes.
+        if features is not lastFeatures:
+            lastFeatures = features
+            (health, timesSick3, rule1weight, rule2weight, rule3weight, rule4weight, rule5weight,
+             timesPunished2, timesPunished3, socialPressure) = features
+
+            # Physical Component - This component's score is based on the agent's hunger.
+            # The lesser the agent's health is, the stronger its craving for food.
+            if (health >= 10): # 10 health and above means that the agent is satisfied.
+                physicalScore = 0
+            elif (health < 10 and health > 6):
+                physicalScore = 1
+            elif (health < 7 and health > 3):
+                physicalScore = 2
+            elif (health < 4):
+                physicalScore = 3
+
+        # Only the information that matters for the amount of food is passed on, so that the same situation always
+        # looks the same to the decision score cache.
+        if (amount == 1):
+            scores.append(lookup(physicalScore, 1, 0, rule1weight, 0, 0, socialPressure))
+        elif (amount == 2):
+            scores.append(lookup(physicalScore, 2, 0, rule2weight, rule3weight, timesPunished2, socialPressure))
+        elif (amount == 3):
+            scores.append(lookup(physicalScore, 3, timesSick3, 0, rule4weight + rule5weight, timesPunished3,
+                                 socialPressure))
+        else:
+            scores.append(lookup(physicalScore, amount, 0, 0, 0, 0, socialPressure))
+
+    return scores
+
+def decisionScores(physicalScore, amount, timesSick3, goodRuleWeight, badRuleWeight, timesPunished, socialPressure):
+    # The scores for one food, given the agent's physical score and, for the amount of food under consideration,
+    # the times it got sick, the weights of the rules that say it is good (rules 1 and 2) or bad (rules 3, 4 and 5),
+    # the times it was punished and its social pressure.
     # The set of scores that will determine whether the agent will pursue or ignore the food under consideration.
-    physicalScore = 0
     emotionalScore = 0
     cognitiveScore = 0
     socialScore = 0
-    
-    # Physical Component - This component's score is based on the agent's hunger.
-    # The lesser the agent's health is, the stronger its craving for food.
-    if (agent.health >= 10): # 10 health and above means that the agent is satisfied.
-        physicalScore = 0
-    elif (agent.health < 10 and agent.health > 6):
-        physicalScore = 1
-    elif (agent.health < 7 and agent.health > 3):
-        physicalScore = 2
-    elif (agent.health < 4):
-        physicalScore = 3
 
     # Emotional Component - This component's score is based on an appraisal theory of emotions.
     # The greater the amount of food is, the more desirable it seems and the stronger the emotion of desire is.
     # However, previous negative experiences (in particular, with 3 units of food) will lessen this.
-    if (food.amount == 1):
+    # Cognitive Component - This component's score is based on the rules that the agent has learned through
+    # experience. Each rule has a corresponding weight which increases as the agent experiences things. Notice
+    # that the first two rules (1 & 2) obtain a positive value and the last three rules (3, 4, & 5) obtain a
+    # negative value. You can refer to the five cognitive rules above.
+    # Social Component - This component's score is based on the prospect of social approbation or punishment
+    # multiplied (or amplified) by a "social pressure" value. 1 unit of food means social approbation while 2
+    # and 3 units of food could mean social punishment. This gets multiplied immediately after.
+    if (amount == 1):
         emotionalScore = 1
-    elif (food.amount == 2):
+        socialScore = 1
+    elif (amount == 2):
         emotionalScore = 2
-    elif (food.amount == 3):
-        emotionalScore = 3 - agent.timesSick3 # Though 3 units of food is initially the most desirable, the emotional
-                                              # desire decreases according to the number of times it has made the 
-                                              # agent sick.
-
-    # Cognitive Component - This component's score is based on the rules that the agent has learned through experience.
-    # Each rule has a corresponding weight which increases as the agent experiences things. Notice that the first two 
-    # rules (! & 2) obtain a positive value and the last three rules (3, 4, & 5) obtain a negative value. You can 
-    # refer to the five cognitive rules above.
-    if (food.amount == 1 and agent.rules["rule1"]):
-        cognitiveScore = agent.rules["rule1weight"]
-    if (food.amount == 2 and agent.rules["rule2"]):
-        cognitiveScore = agent.rules["rule2weight"]
-    if (food.amount == 2 and agent.rules["rule3"]):
-        cognitiveScore -= agent.rules["rule3weight"]
-    if (food.amount == 3 and agent.rules["rule4"]):
-        cognitiveScore -= agent.rules["rule4weight"]
-    if (food.amount == 3 and agent.rules["rule5"]):
-        cognitiveScore -= agent.rules ["rule5weight"]
+    elif (amount == 3):
+        emotionalScore = 3 - timesSick3 # Though 3 units of food is initially the most desirable, the emotional
+                                        # desire decreases according to the number of times it has made the
+                                        # agent sick.
+    cognitiveScore = goodRuleWeight - badRuleWeight
+    socialScore -= timesPunished
 
-    # Social Component - This component's score is based on the prospect of social approbation or punishment
-    # multiplied (or amplified) by a "social pressure" value. 1 unit of food means social approbation while 2 and 3 
-    # units of food could mean social punishment. This gets multiplied immediately after.
-    if (food.amount == 1):
-        socialScore = 1
-    if (food.amount == 2):
-        socialScore -= agent.timesPunished2
-    if (food.amount == 3):
-        socialScore -= agent.timesPunished3
-        
-    socialScore = socialScore * agent.socialPressure # The social score is multiplied here by social pressure.
-                                                     # Again, social pressure depends on the number of times the agent
-                                                     # has "interacted" with other agents in the past.
+    socialScore = socialScore * socialPressure # The social score is multiplied here by social pressure.
+                                               # Again, social pressure depends on the number of times the agent
+                                               # has "interacted" with other agents in the past.
     socialScore = int(round(socialScore, 1)) # Rounded and turned to an integer.
 
     # Total Decision Score
     decisionScore = physicalScore + emotionalScore + cognitiveScore + socialScore
+    return physicalScore, emotionalScore, cognitiveScore, socialScore, decisionScore
+
+# All the information given to decisionScores comes in small steps (the physical score and the food amount have a
+# few values, the rest are counters and multiples of AGENT_SOCIALPRESSURE), so in long runs the same scores are
+# asked for again and again. A decision score cache remembers the last DECISION_CACHE_SIZE scores that were worked
+# out and forgets the least recently used ones first. Every simulation has its own cache (see the simulation class
+# below), so that its hits and misses are its own, and gives it to decisionBatch as the lookup.
 
+def decisionCache(size):
+    # A new decision score cache that remembers up to size scores. With a size of 0, there is no cache and the
+    # scores are always worked out.
+    if size > 0:
+        return functools.lru_cache(maxsize=size)(decisionScores)
+    return decisionScores
+
+def decisionCacheInfo(lookup):
+    # The number of hits and misses of a decision score cache, the fraction of lookups that were hits, the number
+    # of scores it holds now and the most it can hold.
+    if lookup is decisionScores:
+        return {"hits": 0, "misses": 0, "hitRate": 0.0, "size": 0, "maxSize": 0}
+    info = lookup.cache_info()
+    lookups = info.hits + info.misses
+    return {"hits": info.hits, "misses": info.misses, "hitRate": info.hits / lookups if lookups else 0.0,
+            "size": info.currsize, "maxSize": info.maxsize}
+
+def cacheInfoText(cacheInfo):
+    # One line about a decision score cache, for the information panel and the end of a run.
+    return ("Decision cache: " + str(cacheInfo["hits"]) + " hits, " + str(cacheInfo["misses"]) + " misses, " +
+            str(round(cacheInfo["hitRate"] * 100, 1)) + "% hit rate.")
+
+def decision(agent, food, lookup=None):
+    # The decision-making scores of one agent for one food; see decisionBatch above.
     # This function gives all the scores, to be displayed in the information panel.
-    return physicalScore, emotionalScore, cognitiveScore, socialScore, decisionScore
+    return decisionBatch([decisionFeatures(agent)], [food.amount], lookup)[0]
 
-#######################################################################################
-##       This is the graphics function that draws everything using ASCII text.       ##
-##       If you want better graphics you can replace this with something else.       ##  
-#######################################################################################
-
-def draw(agentList, foodList):
-    # Draw the grid world with agents and food.
-    print("\n")
-    print("   ", end=" ")
-    for x in range(SIM_AREA): # Draw the x coordinate numbers.
-        print("(", x,")", sep="", end=" ")
-    print(" x")
-    for y in range(SIM_AREA):
-        print("(", y,")", sep="", end=" ") # Draw the y coordinate numbers.
-        for x in range(SIM_AREA): # Draw the square locations of the grid world.
-            agentPresent = False # By default, there is no agent or food in the square location.
-            foodPresent = False
-            # If an agent is present in the coordinate, then display "A" + agent id number.
-            # To simplify our lives, no two agents can occupy the same square location. 
-            # This is guaranteed in the main program code below.
-            for a in agentList:
-                if (a.xPosition == x and a.yPosition == y):
-                    print("A",a.id, "*", sep="", end=" ")
-                    agentPresent = True
-            # If no agent is present in the coordinate, but there is food, display the food as food amount + "F".
-            # This means that if an agent and food are in the same location, the agent will cover up the food.
-            if (agentPresent == False):
-                for f in foodList:
-                    if (f.xPosition == x and f.yPosition == y and f.consumed == False):
-                        print(f.amount,"F*", sep="", end=" ")
-                        foodPresent = True
-            # If the square location is empty, diplay "***".
-            if (agentPresent == False and foodPresent == False):            
-                print("***", end=" ")
-        print("\n")
-    print("y\n")    
-
-    # You can display the information for x number of agents, set through the constant variable SHOW_AGENT_INFO above.
-    # This piece of code gets the list of agents whose information will be displayed in the information panel.
-    newList = []
-    if len(agentList) < SHOW_AGENT_INFO: # This is in case some agents have died. Then you might have a list that is
-        showAgents = len(agentList)      # even shorter than SHOW_AGENT_INFO 
-    else:
-        showAgents = SHOW_AGENT_INFO
-    for i in range(showAgents):
-        newList.append(agentList[i])
-        
-    # The information panel for agents.
-    print("INFORMATION PANEL:\n")
-    for a in newList:
-        # First line has the agent id number, its current health, indicates whether the agent is currently pursuing
-        # or consuming food, whether the agent is made sick, and whether it is punished by others.
-        print("Agent ",a.id," at (",a.xPosition,",",a.yPosition,").", sep="", end=" ")
-        print("Health: ",a.health,".", sep="", end=" ")
-        if a.pursuing:
-            print("Pursuing food at (",a.pursuing.xPosition,",",a.pursuing.yPosition,") with amount ",a.pursuing.amount,".", sep="")
-        elif a.consuming: 
-            print("Consuming food at (",a.consuming.xPosition,",",a.consuming.yPosition,") with amount ",a.consuming.amount,".", sep="", end=" ")
-            if (a.consuming.amount == 3): print("Got sick!", end=" ")
-            if (a.punished == True): print("Punished by others!")
-            else: print("")
-        else: print("")
-        # Second line has the cognitive rules that the agent knows along with their corresponding weights.
-        print("Cognitive Knowledge: Rule1:", a.rules["rule1weight"], "|| Rule2:", a.rules["rule2weight"], "|| Rule3:", a.rules["rule3weight"], "|| Rule4:", a.rules["rule4weight"], "|| Rule5:", a.rules["rule5weight"])
-        # Third line has the agent's social pressure value, the number of times the agent has been punished for 
-        # eating 2 or 3 units of food, and the number of times the agent has become sick from 3 units of food.
-        print("Social Pressure:",a.socialPressure,"|| Punished 2 Food:", a.timesPunished2, "|| Punished 3 Food:", a.timesPunished3, "|| Sick 3 Food:", a.timesSick3)
-        # Finally, the list of food that the agent is currently seeing along with their scores from the agent's
-        # decision-making process. Take note that the agent does not automatically go for the highest scoring food. 
-        # Rather, it chooses a positive scoring food at random.
-        if a.seeing:
-            for i in range(len(a.seeing)):
-                print("Seeing food at (",a.seeing[i].xPosition,",",a.seeing[i].yPosition,") with amount ",a.seeing[i].amount,". Decision P:",a.seeingScores[i][0], " E:",a.seeingScores[i][1], " C:",a.seeingScores[i][2], " S:",a.seeingScores[i][3], " Total Score:", a.seeingScores[i][4], ".",  sep="")   
-        print("\n")
+################################################################################################
+##       Grid index - Keeps track of which agents and food are on every square location.       ##
+################################################################################################
 
-###########################################
-##       The main program function       ##
-###########################################
+# Instead of scanning the whole agent or food list every time we need to know what is on a square location, the
+# main program keeps two dictionaries keyed on the (x, y) coordinates: one for the agents (agentGrid) and one for
+# the food (foodGrid). Food never moves, so foodGrid holds a single food per square location. Agents move around,
+# so agentGrid has to be updated every time an agent moves or dies. Each square location holds a list of agents
+# because, in rare cases, an agent that is pushed back from the edge of the grid world can end up on the same
+# square location as another agent (see the MOVE code in the main program loop).
 
-def main():
-    # The agents and food are contained in their own lists.
-    agentList = []
-    foodList = []
-
-    # Create agents and place them randomly in the grid world.
-    for a in range(NUMBER_AGENTS):
-        # Create a new agent with a random position.
-        newAgent = agent(a, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1))
-        # Check if this agent is on the same position as another agent. If yes, then re-create agent with a new 
-        # random position. If it is alone, then append the agent to the agent list.
-        anotherAgentHere = True
-        while anotherAgentHere:
-            if any (a2.xPosition == newAgent.xPosition and a2.yPosition == newAgent.yPosition for a2 in agentList):
-                anotherAgentHere = True
-                newAgent = agent(a, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1))
-            else:
-                anotherAgentHere = False
-                agentList.append(newAgent)
-
-    # Create food and place them randomly in the grid world.
-    for f in range(NUMBER_FOOD):
-        # Create new food with a random position.
-        newFood = food(f, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1), random.randint(1,3))
-        # Check if food is on the same position with other food. If yes, then re-create food with a new random 
-        # position. If it is alone, then append the food to the food list.
-        anotherFoodHere = True
-        while anotherFoodHere:
-            if any (f2.xPosition == newFood.xPosition and f2.yPosition == newFood.yPosition for f2 in foodList):
-                anotherFoodHere = True
-                newFood = food(f, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1), random.randint(1,3))
-            else:
-                anotherFoodHere = False
-                foodList.append(newFood)
-
-    # Draw the the grid world and the information panel (see the draw function above).
-    draw(agentList,foodList)
+def addToGrid(agentGrid, a):
+    # Put the agent on its current square location.
+    agentGrid.setdefault((a.xPosition, a.yPosition), []).append(a)
+
+def removeFromGrid(agentGrid, a):
+    # Take the agent off its current square location. Empty square locations are removed from the dictionary
+    # so that "(x, y) in agentGrid" is only true if there is an agent there.
+    agentsHere = agentGrid[(a.xPosition, a.yPosition)]
+    agentsHere.remove(a)
+    if not agentsHere:
+        del agentGrid[(a.xPosition, a.yPosition)]
+
+def moveInGrid(agentGrid, a, x, y):
+    # Move the agent to a new square location.
+    removeFromGrid(agentGrid, a)
+    a.xPosition = x
+    a.yPosition = y
+    addToGrid(agentGrid, a)
+
+def anotherAgentInSight(agentGrid, a, vision):
+    # Is there any other agent within the agent's range of vision? Only the square locations inside the range of
+    # vision are checked, instead of every agent in the grid world.
+    for x in range(a.xPosition-vision, a.xPosition+vision+1):
+        for y in range(a.yPosition-vision, a.yPosition+vision+1):
+            for a2 in agentGrid.get((x, y), []):
+                if a2 is not a:
+                    return True
+    return False
+
+def randomCells(worldRandom, number, area):
+    # Picks the given number of different square locations at random in an area by area grid world, for placing
+    # agents or food. These are the first entries of a random shuffle of all the square locations (a Fisher-Yates
+    # shuffle that only remembers the entries it has moved), so it takes one random number per square location
+    # picked, however full the grid world gets.
+    numberCells = area * area
+    if number > numberCells:
+        raise ValueError("Cannot pick " + str(number) + " different square locations in a " + str(area) +
+                         " by " + str(area) + " grid world.")
+    moved = {}
+    cells = []
+    for i in range(number):
+        j = worldRandom.randint(i, numberCells - 1)
+        cell = moved.get(j, j)
+        moved[j] = moved.get(i, i)
+        cells.append(divmod(cell, area))
+    return cells
+
+# The pursuit index (pursuers) is a dictionary from the id of a food to the set of agents pursuing it, so that when
+# the food is consumed only those agents have to be told, instead of going through the whole agent list.
+
+def pursue(pursuers, a, foodId):
+    # The agent starts pursuing the food.
+    a.pursuing = foodId
+    pursuers.setdefault(foodId, set()).add(a)
+
+def stopPursuing(pursuers, a):
+    # The agent stops pursuing its food, if any.
+    if a.pursuing >= 0:
+        pursuingHere = pursuers[a.pursuing]
+        pursuingHere.discard(a)
+        if not pursuingHere:
+            del pursuers[a.pursuing]
+        a.pursuing = -1
+
+def foodGone(pursuers, f):
+    # The food has been consumed: every agent pursuing it stops.
+    for a2 in pursuers.pop(f.id, ()):
+        a2.pursuing = -1
+
+##############################################################################################
+##       Regrowth schedule - Keeps track of which food regrows at the start of every step       ##
+##############################################################################################
+
+# Instead of counting down a timer on every food patch in every step, consumed food is put in a dictionary keyed on
+# the step at the start of which it regrows (regrowthSchedule). Regrowing food then only means taking out the list
+# of food for the current step, however many food patches there are. Food regrows FOOD_REGROWTH steps after the
+# step in which it was consumed, and never in the same step.
+
+def scheduleRegrowth(regrowthSchedule, f, steps, regrowth):
+    # The food was consumed in the given step: put it in the schedule, to regrow after the given number of steps.
+    f.regrowStep = steps + max(1, regrowth)
+    regrowthSchedule.setdefault(f.regrowStep, []).append(f)
+
+def regrowFood(regrowthSchedule, steps):
+    # Regrow all the food that is due at the start of the given step, and return it.
+    regrown = regrowthSchedule.pop(steps, [])
+    for f in regrown:
+        f.consumed = False
+    return regrown
+
+###################################################################################
+##       This is the graphics class that draws everything using ASCII text.       ##
+##       If you want better graphics you can replace this with something else.     ##
+###################################################################################
+
+class renderer:
+    # Initialization of the renderer class. The mode and the frames per second are RENDER_MODE and RENDER_FPS (see
+    # above). Every frame is put together in memory and written to the screen at once. What is on every square
+    # location comes from the grid index, instead of going through all the agents and food for every one of them.
+    def __init__(self, mode=RENDER_MODE, framesPerSecond=RENDER_FPS):
+        if mode not in ("text", "terminal", "none"):
+            raise ValueError("The render mode must be \"text\", \"terminal\" or \"none\", not " + repr(mode) + ".")
+        self.mode = mode
+        self.frameTime = 1 / framesPerSecond if framesPerSecond > 0 else 0
+        self.lastTime = None # When the last frame was drawn.
+        self.lastCells = None # In "terminal" mode, the square locations as they are on the screen.
+
+    def cell(self, agentGrid, foodGrid, x, y):
+        # What a square location shows: "A" + agent id for an agent (in rare cases there is more than one), otherwise
+        # the food amount + "F" for food, otherwise "***". An agent covers up the food under it.
+        agentsHere = agentGrid.get((x, y))
+        if agentsHere:
+            return " ".join("A" + str(a.id) + "*" for a in sorted(agentsHere, key=lambda a: a.id))
+        f = foodGrid.get((x, y))
+        if f is not None and f.consumed == False:
+            return str(f.amount) + "F*"
+        return "***"
+
+    def draw(self, sim, force=False):
+        # Draw the grid world and the information panel of the simulation. In "terminal" mode, a frame that comes
+        # too soon after the last one is skipped, unless force is True.
+        if self.mode == "none":
+            return
+        now = time.monotonic()
+        if self.mode == "terminal" and not force and self.lastTime is not None and now - self.lastTime < self.frameTime:
+            return
+        self.lastTime = now
+        out = io.StringIO()
+        if self.mode == "text":
+            self.drawText(sim, out)
+        else:
+            self.drawTerminal(sim, out)
+        self.drawPanel(sim.agentList, sim.foodList, out, sim.config.SHOW_AGENT_INFO, sim.cacheInfo())
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
+
+    def drawText(self, sim, out):
+        # The whole grid world, with the x and y coordinate numbers.
+        area = sim.config.SIM_AREA
+        out.write("\n\n    ")
+        for x in range(area): # Draw the x coordinate numbers.
+            out.write("(" + str(x) + ") ")
+        out.write(" x\n")
+        for y in range(area):
+            out.write("(" + str(y) + ") ") # Draw the y coordinate numbers.
+            for x in range(area): # Draw the square locations of the grid world.
+                out.write(self.cell(sim.agentGrid, sim.foodGrid, x, y) + " ")
+            out.write("\n\n")
+        out.write("y\n\n")
+
+    def drawTerminal(self, sim, out):
+        # The grid world in fixed-width columns, one line per row. The first frame clears the screen and draws
+        # everything; after that, only the square locations that changed are written, by moving the cursor to them.
+        area = sim.config.SIM_AREA
+        width = max(3, len("A" + str(sim.config.NUMBER_AGENTS-1) + "*"), len("(" + str(area-1) + ")"))
+        cells = [self.cell(sim.agentGrid, sim.foodGrid, x, y).split(" ")[0].ljust(width)
+                 for y in range(area) for x in range(area)]
+        if self.lastCells is None:
+            out.write("\x1b[2J\x1b[H" + " " * (width+1))
+            out.write("".join(("(" + str(x) + ")").ljust(width) + " " for x in range(area)) + "x\n")
+            for y in range(area):
+                out.write(("(" + str(y) + ")").ljust(width) + " " + " ".join(cells[y*area:(y+1)*area]) + "\n")
+            out.write("y\n")
+        else:
+            for i, (old, new) in enumerate(zip(self.lastCells, cells)):
+                if old != new:
+                    y, x = divmod(i, area)
+                    out.write("\x1b[" + str(y+2) + ";" + str((x+1) * (width+1) + 1) + "H" + new)
+        self.lastCells = cells
+        # The information panel goes below, after clearing what was there before.
+        out.write("\x1b[" + str(area+3) + ";1H\x1b[J")
+
+    def drawPanel(self, agentList, foodList, out, showAgentInfo, cacheInfo):
+        # You can display the information for x number of agents, set through the constant variable SHOW_AGENT_INFO above.
+        # This piece of code gets the list of agents whose information will be displayed in the information panel.
+        newList = []
+        if len(agentList) < showAgentInfo: # This is in case some agents have died. Then you might have a list that is
+            showAgents = len(agentList)    # even shorter than SHOW_AGENT_INFO 
+        else:
+            showAgents = showAgentInfo
+        for i in range(showAgents):
+            newList.append(agentList[i])
+            
+        # The information panel for agents, after how often the decision score cache already had the scores.
+        print("INFORMATION PANEL:\n", file=out)
+        print(cacheInfoText(cacheInfo) + "\n", file=out)
+        for a in newList:
+            # First line has the agent id number, its current health, indicates whether the agent is currently pursuing
+            # or consuming food, whether the agent is made sick, and whether it is punished by others.
+            print("Agent ",a.id," at (",a.xPosition,",",a.yPosition,").", sep="", end=" ", file=out)
+            print("Health: ",a.health,".", sep="", end=" ", file=out)
+            if a.pursuing >= 0:
+                f = foodList[a.pursuing]
+                print("Pursuing food at (",f.xPosition,",",f.yPosition,") with amount ",f.amount,".", sep="", file=out)
+            elif a.consuming >= 0: 
+                f = foodList[a.consuming]
+                print("Consuming food at (",f.xPosition,",",f.yPosition,") with amount ",f.amount,".", sep="", end=" ", file=out)
+                if (f.amount == 3): print("Got sick!", end=" ", file=out)
+                if (a.punished == True): print("Punished by others!", file=out)
+                else: print("", file=out)
+            else: print("", file=out)
+            # Second line has the cognitive rules that the agent knows along with their corresponding weights.
+            print("Cognitive Knowledge: Rule1:", a.rule1weight, "|| Rule2:", a.rule2weight, "|| Rule3:", a.rule3weight, "|| Rule4:", a.rule4weight, "|| Rule5:", a.rule5weight, file=out)
+            # Third line has the agent's social pressure value, the number of times the agent has been punished for 
+            # eating 2 or 3 units of food, and the number of times the agent has become sick from 3 units of food.
+            print("Social Pressure:",a.socialPressure,"|| Punished 2 Food:", a.timesPunished2, "|| Punished 3 Food:", a.timesPunished3, "|| Sick 3 Food:", a.timesSick3, file=out)
+            # Finally, the list of food that the agent is currently seeing along with their scores from the agent's
+            # decision-making process. Take note that the agent does not automatically go for the highest scoring food. 
+            # Rather, it chooses a positive scoring food at random.
+            if a.seeing:
+                for i in range(len(a.seeing)):
+                    print("Seeing food at (",a.seeing[i].xPosition,",",a.seeing[i].yPosition,") with amount ",a.seeing[i].amount,". Decision P:",a.seeingScores[i][0], " E:",a.seeingScores[i][1], " C:",a.seeingScores[i][2], " S:",a.seeingScores[i][3], " Total Score:", a.seeingScores[i][4], ".",  sep="", file=out)   
+            print("\n", file=out)
+
+####################################################################
+##       The config class - The settings of one simulation       ##
+####################################################################
+
+# The constant variables at the top that every simulation can have its own value for.
+CONFIG_NAMES = ("NUMBER_AGENTS", "SHOW_AGENT_INFO", "AGENT_VISION", "AGENT_HEALTH", "AGENT_METABOLISM",
+                "AGENT_SOCIALPRESSURE", "NUMBER_FOOD", "SIM_AREA", "FOOD_REGROWTH", "DECISION_CACHE_SIZE", "SEED",
+                "LEGACY_DEATH_SKIP")
+
+# The types of the settings that are None by default (None itself is always fine for them).
+OPTIONAL_TYPES = {"SEED": int}
+
+def rightType(value, default, name):
+    # Whether a setting can be changed to the value: it must be of the same type as the constant variable (a
+    # whole number is fine for a decimal one). Settings that are None by default must be None or of their type in
+    # OPTIONAL_TYPES, and a list must only hold whole numbers (agent ids).
+    if default is None:
+        kind = OPTIONAL_TYPES[name]
+        if value is None:
+            return True
+        if kind is list:
+            return isinstance(value, (list, tuple)) and all(rightType(v, 0, name) for v in value)
+        return rightType(value, kind(), name)
+    if isinstance(value, bool) or isinstance(default, bool):
+        return isinstance(value, bool) and isinstance(default, bool)
+    if isinstance(default, float):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+class config:
+    # Initialization of the config class: the values of the constant variables in CONFIG_NAMES, changed by the given
+    # ones, e.g. config(NUMBER_AGENTS=20, SIM_AREA=10). Every simulation has its own config, so that simulations
+    # with different settings can run side by side in one program.
+    def __init__(self, **changes):
+        for name in CONFIG_NAMES:
+            setattr(self, name, globals()[name])
+        self.update(changes)
+
+    def update(self, changes):
+        # Changes the settings in the dictionary. Raises ValueError for a name that is not a setting, or a value
+        # of the wrong type.
+        for name, value in changes.items():
+            if name not in CONFIG_NAMES:
+                raise ValueError("Unknown setting: " + str(name) + ".")
+            if not rightType(value, globals()[name], name):
+                raise ValueError("Wrong value for " + name + ": " + repr(value) + ".")
+            setattr(self, name, value)
+
+    def asDict(self):
+        # The settings as a dictionary, e.g. for saving them with the results.
+        return {name: getattr(self, name) for name in CONFIG_NAMES}
+
+    def loadFile(self, fileName):
+        # Changes the settings in a JSON config file, which has some of the names in CONFIG_NAMES, e.g.
+        # {"NUMBER_AGENTS": 20, "SIM_AREA": 10}.
+        with open(fileName) as f:
+            changes = json.load(f)
+        if not isinstance(changes, dict):
+            raise ValueError("The config file " + fileName + " must hold a JSON object.")
+        self.update(changes)
+
+##########################################################################################
+##       The simulation class - One run of the simulation, which can go step by step       ##
+##########################################################################################
+
+class simulation:
+    # Initialization of the simulation class: the grid world is created with agents and food placed randomly.
+    # The settings are those of the given config (see the config class above), or the constant variables at the
+    # top if there is none. The streams of random numbers come from the seed, or from the SEED of the settings,
+    # or from a new seed if there is neither.
+    def __init__(self, seed=None, settings=None):
+        self.config = settings if settings is not None else config()
+        if seed is None: seed = self.config.SEED
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.steps = 0 # The number of steps done so far.
+        # The agents and food are contained in their own lists.
+        self.agentList = []
+        self.foodList = []
+        # The grid index for the agents and food (see the grid index functions above).
+        self.agentGrid = {}
+        self.foodGrid = {}
+        # The consumed food, keyed on the step at which it regrows (see the regrowth schedule functions above).
+        self.regrowthSchedule = {}
+        # The agents pursuing every food (see the pursuit index functions above).
+        self.pursuers = {}
+        # The food that regrew and the food that was consumed in the last step.
+        self.regrown = []
+        self.eaten = []
+        # The decision score cache of this simulation (see decisionCache above).
+        self.decisionLookup = decisionCache(self.config.DECISION_CACHE_SIZE)
+        worldRandom = randomStream(self.seed, 0)
+
+        # Create agents and place them randomly in the grid world, each on its own square location.
+        for a, (x, y) in enumerate(randomCells(worldRandom, self.config.NUMBER_AGENTS, self.config.SIM_AREA)):
+            newAgent = agent(a, x, y, self.config.AGENT_HEALTH)
+            newAgent.rng = randomStream(self.seed, newAgent.id + 1)
+            self.agentList.append(newAgent)
+            addToGrid(self.agentGrid, newAgent)
+
+        # Create food and place them randomly in the grid world, each on its own square location.
+        for f, (x, y) in enumerate(randomCells(worldRandom, self.config.NUMBER_FOOD, self.config.SIM_AREA)):
+            newFood = food(f, x, y, worldRandom.randint(1,3))
+            self.foodList.append(newFood)
+            self.foodGrid[(x, y)] = newFood
 
-    # Ask the user to press Enter to continue.
-    key = input("Press Enter to continue one step, or \"q\" to quit.")
-    # If user types "q", then quit the program.
-    if (key == "q"): quit()
-    
 ###################################################################################
 ##       The main program loop. This is where a lot of the action happens.       ##
 ###################################################################################
 
-    while True:
+    def step(self):
+        # The lists, indexes, step number and settings of the simulation, by shorter names.
+        agentList, foodList, agentGrid, foodGrid = self.agentList, self.foodList, self.agentGrid, self.foodGrid
+        regrowthSchedule, pursuers, steps, settings = self.regrowthSchedule, self.pursuers, self.steps, self.config
 
         # Regrow food in empty food patches according to constant variable FOOD_REGROWTH (see above).
-        for f in foodList:
-            if f.consumed:
-                f.regrowthTimer -= 1
-                if (f.regrowthTimer <= 0):
-                    f.regrowthTimer = FOOD_REGROWTH
-                    f.consumed = False
+        self.regrown = regrowFood(regrowthSchedule, steps)
+        self.eaten = []
 
         # Agents are going to do several things every step:
         # 1. MOVE - The agent will either move around randomly or move towards food.
@@ -273,151 +613,211 @@ def main():
         # 3. DECIDE - The agent will perform a decision-making process for every food that it sees.
         # 4. CONSUME - If the agent is on top of the food that it wants, then it consumes it.
         # 5. METABOLIZE - The agent loses health according to the constant variable AGENT_METABOLISM.
+        # Agents that die stay in the agent list until every agent has had its turn, and are then removed all at
+        # once (see LEGACY_DEATH_SKIP above for the old behaviour).
+        skipNext = False
         for a in agentList:      
+            if skipNext: # Only with LEGACY_DEATH_SKIP: the agent after one that died misses its turn.
+                skipNext = False
+                continue
 
             # MOVE - If the agent is pursuing food, then it moves closer to that food. 
             # If not, then the agent moves around randomly.
             while True:
-                if a.pursuing: # If pursuing food, make the agent's prospective coordinate position (tempx, tempy)
-                               # closer to the pursued food. 
-                    if (a.xPosition > a.pursuing.xPosition): tempx = a.xPosition - 1
-                    elif (a.xPosition < a.pursuing.xPosition): tempx = a.xPosition + 1
+                if a.pursuing >= 0: # If pursuing food, make the agent's prospective coordinate position (tempx, tempy)
+                                    # closer to the pursued food. 
+                    f = foodList[a.pursuing]
+                    if (a.xPosition > f.xPosition): tempx = a.xPosition - 1
+                    elif (a.xPosition < f.xPosition): tempx = a.xPosition + 1
                     else: tempx = a.xPosition
-                    if (a.yPosition > a.pursuing.yPosition): tempy = a.yPosition - 1
-                    elif (a.yPosition < a.pursuing.yPosition): tempy = a.yPosition + 1
+                    if (a.yPosition > f.yPosition): tempy = a.yPosition - 1
+                    elif (a.yPosition < f.yPosition): tempy = a.yPosition + 1
                     else: tempy = a.yPosition             
-                elif a.consuming: # If on top of pursued food, prospectively stay in current position 
-                                  # to consume this food.
+                elif a.consuming >= 0: # If on top of pursued food, prospectively stay in current position 
+                                       # to consume this food.
                     tempx = a.xPosition
                     tempy = a.yPosition  
                 else: # If neither pursuing nor consuming, prospectively move to a random nearby position 
                       # or stay in place.
-                    tempx = a.xPosition + random.randint(-1, 1)
-                    tempy = a.yPosition + random.randint(-1, 1)   
+                    tempx = a.xPosition + a.rng.randint(-1, 1)
+                    tempy = a.yPosition + a.rng.randint(-1, 1)   
                 # This grid world has closed edges. Bring back the agent if, according to its 
                 # prospective coordinates (tempx, tempy), it falls over the edge.
                 if tempx == -1: tempx = 0
-                if tempx == SIM_AREA: tempx = SIM_AREA - 1
+                if tempx == settings.SIM_AREA: tempx = settings.SIM_AREA - 1
                 if tempy == -1: tempy = 0
-                if tempy == SIM_AREA: tempy = SIM_AREA - 1
+                if tempy == settings.SIM_AREA: tempy = settings.SIM_AREA - 1
                   
                 # To keep things simple, a rule is that no two agents can occupy the same place.
                 # In case another agent is blocking the agent's prospective path, the agent will move to random
                 # empty space.
-                if any (a2.xPosition == tempx and a2.yPosition == tempy for a2 in agentList): 
-                    while any (a2.xPosition == tempx and a2.yPosition == tempy for a2 in agentList):
-                        tempx = a.xPosition + random.randint(-1, 1)
-                        tempy = a.yPosition + random.randint(-1, 1)   
+                if (tempx, tempy) in agentGrid: 
+                    # The agent picks one of the nearby positions without an agent (its own position has one), as
+                    # before, but from the list of those positions instead of trying random positions until one is
+                    # empty. If all of them are taken, the agent stays in place. Positions over the edge count as
+                    # empty, and the agent is brought back below.
+                    freeNearby = [(a.xPosition + dx, a.yPosition + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                                  if (a.xPosition + dx, a.yPosition + dy) not in agentGrid]
+                    if freeNearby:
+                        tempx, tempy = freeNearby[a.rng.randint(0, len(freeNearby) - 1)]
+                    else:
+                        tempx, tempy = a.xPosition, a.yPosition
                     # Again a check for going off the edge.
                     if tempx == -1: tempx = 0
-                    if tempx == SIM_AREA: tempx = SIM_AREA - 1
+                    if tempx == settings.SIM_AREA: tempx = settings.SIM_AREA - 1
                     if tempy == -1: tempy = 0
-                    if tempy == SIM_AREA: tempy = SIM_AREA - 1
+                    if tempy == settings.SIM_AREA: tempy = settings.SIM_AREA - 1
                     # Change the position.
-                    a.xPosition = tempx
-                    a.yPosition = tempy
+                    moveInGrid(agentGrid, a, tempx, tempy)
                     break
                 else:
                     # If everything is good, then the agent will move to the prospective coordinate position.
-                    a.xPosition = tempx
-                    a.yPosition = tempy
+                    moveInGrid(agentGrid, a, tempx, tempy)
                     break
             
             # LOOK - The agent looks at all the food within its range of vision and places them in a list.
             seeingList = []
-            for x in range(a.xPosition-AGENT_VISION, a.xPosition+AGENT_VISION+1):
-                for y in range(a.yPosition-AGENT_VISION, a.yPosition+AGENT_VISION+1):
-                    for f in foodList:
-                        if (f.xPosition == x and f.yPosition == y and f.consumed == False):
-                            seeingList.append(f) 
+            for x in range(a.xPosition-settings.AGENT_VISION, a.xPosition+settings.AGENT_VISION+1):
+                for y in range(a.yPosition-settings.AGENT_VISION, a.yPosition+settings.AGENT_VISION+1):
+                    f = foodGrid.get((x, y))
+                    if (f is not None and f.consumed == False):
+                        seeingList.append(f) 
 
             # DECIDE - The agent uses a decision-making process on all the food it sees.                     
             # First, we shuffle the list of food seen so that the agent doesn't always start with
             # the food at the top left corner of the screen.
-            random.shuffle(seeingList)
+            a.rng.shuffle(seeingList)
             a.seeing = seeingList
             # Then the decision-making scores for all the food in the list is put in another list.
-            a.seeingScores = []
-            for i in range(len(a.seeing)):
-                a.seeingScores.append(decision(a, a.seeing[i]))               
+            a.seeingScores = decisionBatch([decisionFeatures(a)] * len(a.seeing), [f.amount for f in a.seeing],
+                                           self.decisionLookup)
             # If the agent is not currently pursuing food, then it pursues the first food in its list 
             # with a positive decision score.
-            if not a.pursuing:
-                a.consuming = [] # This removes the agent's last indiciated consumed food
+            if a.pursuing < 0:
+                a.consuming = -1 # This removes the agent's last indiciated consumed food
                                  # because it will try to consume a new one.
                 a.punished = False # This removes the agent's last punishment marker, if any.
                 for i in range(len(a.seeing)):
                     if (a.seeingScores[i][4] > 0): # If the decision score is positive...
-                        a.pursuing = a.seeing[i]   # Then the agent pursues the food.
+                        pursue(pursuers, a, a.seeing[i].id) # Then the agent pursues the food.
                         break
 
             # CONSUME - If the agent is pursuing food and is on top of it, then the agent consumes the food.
             # The agent might be punished by others or get sick from the consumption. All information is updated.
-            if (a.pursuing and a.xPosition == a.pursuing.xPosition and a.yPosition == a.pursuing.yPosition):
-                for f in foodList:
-                    if (f.xPosition == a.xPosition and f.yPosition == a.yPosition):
-                        
-                        # The agent consumes the food (the food disappears).
-                        f.consumed = True
-                        a.consuming = a.pursuing
+            if (a.pursuing >= 0 and a.xPosition == foodList[a.pursuing].xPosition and a.yPosition == foodList[a.pursuing].yPosition):
+                f = foodList[a.pursuing] # The food under the agent.
+                
+                # The agent consumes the food (the food disappears until it regrows).
+                f.consumed = True
+                scheduleRegrowth(regrowthSchedule, f, steps, settings.FOOD_REGROWTH)
+                self.eaten.append(f)
+                a.consuming = a.pursuing
+                
+                # The agent's health is updated. 
+                if (f.amount == 1 or f.amount == 2): a.health += f.amount # Agent gains health.
+                elif (f.amount == 3): a.health -= 1 # Agent gets sick and loses health.
+                    
+                # If applicable, increases the number of times the agent has gotten sick from eating 3 food.
+                if (f.amount == 3): a.timesSick3 += 1
+                    
+                # Depending on what food was consumed, upates the weight of a corresponding rule 
+                # (rules 1, 2 or 4). The weights of the two other rules will be updated in the next code.
+                if (f.amount == 1): 
+                    a.rule1weight += 1
+                elif (f.amount == 2):
+                    a.rule2weight += 1
+                elif (f.amount == 3):
+                    a.rule4weight += 1
+                    
+                # Checks if the agent was seen by other agents consuming the food.
+                # If so, then there was an "interaction" and the agent's social pressure increases.
+                # Also, if applicable, the weights of rules 3 and 5 get updated.
+                # Is there any agent within the agent's range of vision? 
+                if anotherAgentInSight(agentGrid, a, settings.AGENT_VISION):
+                    a.socialPressure += settings.AGENT_SOCIALPRESSURE
+                    a.socialPressure = round(a.socialPressure, 1) # Round to 1 decimal point.
+                                                                  # Just to avoid trailing zeroes.
+                    # Rules 3 and 5 get updated here because they depend on punishment by others.
+                    if (f.amount == 2): 
+                        a.timesPunished2 += 1
+                        a.punished = True
+                        a.rule3weight += 1
+                    if (f.amount == 3): 
+                        a.timesPunished3 += 1
+                        a.punished = True
+                        a.rule5weight += 1
                         
-                        # The agent's health is updated. 
-                        if (f.amount == 1 or f.amount == 2): a.health += f.amount # Agent gains health.
-                        elif (f.amount == 3): a.health -= 1 # Agent gets sick and loses health.
-                            
-                        # If applicable, increases the number of times the agent has gotten sick from eating 3 food.
-                        if (f.amount == 3): a.timesSick3 += 1
-                            
-                        # Depending on what food was consumed, upates the weight of a corresponding rule 
-                        # (rules 1, 2 or 4). The weights of the two other rules will be updated in the next code.
-                        if (f.amount == 1): 
-                            a.rules["rule1"] = True
-                            a.rules["rule1weight"] += 1
-                        elif (f.amount == 2):
-                            a.rules["rule2"] = True
-                            a.rules["rule2weight"] += 1
-                        elif (f.amount == 3):
-                            a.rules["rule4"] = True
-                            a.rules["rule4weight"] += 1
-                            
-                        # Checks if the agent was seen by other agents consuming the food.
-                        # If so, then there was an "interaction" and the agent's social pressure increases.
-                        # Also, if applicable, the weights of rules 3 and 5 get updated.
-                        tempAgentList = agentList.copy()
-                        tempAgentList.remove(a)
-                        # Is there any agent within the agent's range of vision? 
-                        if any (abs(ta.xPosition - a.xPosition) <= AGENT_VISION and abs(ta.yPosition - a.yPosition) <= AGENT_VISION for ta in tempAgentList):
-                            a.socialPressure += AGENT_SOCIALPRESSURE
-                            a.socialPressure = round(a.socialPressure, 1) # Round to 1 decimal point.
-                                                                          # Just to avoid trailing zeroes.
-                            # Rules 3 and 5 get updated here because they depend on punishment by others.
-                            if (f.amount == 2): 
-                                a.timesPunished2 += 1
-                                a.punished = True
-                                a.rules["rule3"] = True
-                                a.rules["rule3weight"] += 1
-                            if (f.amount == 3): 
-                                a.timesPunished3 += 1
-                                a.punished = True
-                                a.rules["rule5"] = True
-                                a.rules["rule5weight"] += 1
-                                
-                        # All other agents who were pursuing the same food should stop 
-                        # because the food has been consumed.
-                        for a2 in agentList:
-                            if a2.pursuing:
-                                if (a2.pursuing.xPosition == f.xPosition and a2.pursuing.yPosition == f.yPosition):
-                                    a2.pursuing = []
+                # All other agents who were pursuing the same food should stop 
+                # because the food has been consumed.
+                foodGone(pursuers, f)
 
             # METABOLIZE - The agent loses health according to AGENT_METABOLISM. 
             # If its health is 0 or less, it dies.
-            a.health -= AGENT_METABOLISM
+            a.health -= settings.AGENT_METABOLISM
             a.health = round(a.health, 1) # Just to avoid trailing zeroes.
             if (a.health <= 0):
-                agentList.remove(a)
+                removeFromGrid(agentGrid, a)
+                stopPursuing(pursuers, a)
+                skipNext = settings.LEGACY_DEATH_SKIP
+
+        # Remove the dead agents from the agent list.
+        self.agentList = [a for a in agentList if a.health > 0]
+        self.steps += 1
+
+    def cacheInfo(self):
+        # The hits, misses and hit rate of the decision score cache of this simulation (see decisionCacheInfo above).
+        return decisionCacheInfo(self.decisionLookup)
+
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def readSettings(argv=None):
+    # The settings and render mode from the command line. The settings are the constant variables at the top,
+    # changed by the config files given with --config, in order, and then by the settings given with --set, e.g.
+    #   python temperance.py --config small.json --set AGENT_VISION=3 --render terminal
+    parser = argparse.ArgumentParser(description="Runs the Temperance simulation step by step.")
+    parser.add_argument("--config", action="append", default=[], metavar="FILE",
+                        help="a JSON file with settings, e.g. {\"NUMBER_AGENTS\": 20}")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="change one setting, e.g. NUMBER_AGENTS=20")
+    parser.add_argument("--render", choices=("text", "terminal", "none"), default=RENDER_MODE,
+                        help="how the grid world is drawn (see RENDER_MODE)")
+    arguments = parser.parse_args(argv)
+    settings = config()
+    try:
+        for fileName in arguments.config:
+            settings.loadFile(fileName)
+        for item in arguments.set:
+            name, _, text = item.partition("=")
+            try:
+                value = ast.literal_eval(text) # Numbers, True, False, None, lists, and quoted text.
+            except (ValueError, SyntaxError):
+                value = text # Anything else is taken as text.
+            settings.update({name: value})
+    except (OSError, ValueError) as error: # json.JSONDecodeError is a ValueError too.
+        parser.error(str(error))
+    return settings, arguments.render
+
+def main(argv=None):
+    # Create the grid world and draw it with the information panel (see the draw function above).
+    settings, renderMode = readSettings(argv)
+    sim = simulation(settings=settings)
+    print("Random seed:", sim.seed)
+    screen = renderer(renderMode)
+    screen.draw(sim)
+
+    # Ask the user to press Enter to continue.
+    key = input("Press Enter to continue one step, or \"q\" to quit.")
+    # If user types "q", then quit the program.
+    if (key == "q"): quit()
+
+    while True:
+        sim.step()
 
         # Draw the new state of the gird world and information panel.
-        draw(agentList,foodList)
+        screen.draw(sim)
           
         # Ask the user to press Enter to continue.
         key = input("Press Enter to continue one step, or \"q\" to quit.")
@@ -427,5 +827,9 @@ def main():
         else:
             continue
 
-    
-main()
+    # How often the decision score cache already had the scores in this run.
+    print(cacheInfoText(sim.cacheInfo()))
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
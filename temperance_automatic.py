@@ -1,11 +1,23 @@
 # This script differs from temperance.py in that instead of going one step at a time, 
 # it runs automatically up to a certain number of steps and then produces plots for the data.
-# It uses Numpy, Pandas, and Matplotlib
+# It uses Numpy, Pandas, and Matplotlib for recording and plotting the data
 
-import random # To be able to obtain random numbers in the simulation.
-import numpy 
-import pandas
-import matplotlib.pyplot as plt
+import random # To be able to obtain a random seed for the simulation.
+import argparse # For the command line options.
+import ast # To read the values of settings given on the command line.
+import concurrent.futures # For the pool of worker processes that draw the plots.
+import csv # For saving the profile.
+import functools # For the decision score cache.
+import io # To put the printout of a step together in memory.
+import itertools # To number the runs that use worker processes for LOOK and DECIDE.
+import json # For config files.
+import mmap # To read snapshot files without loading them whole.
+import os
+import struct # For the binary layout of snapshot files.
+import sys
+import time # For the profiler.
+# Numpy, Pandas and Matplotlib are imported where they are needed (when data is recorded or plotted), so that a run
+# without them starts quickly and only needs the Python standard library.
 
 # The crucial variable here is the number of steps for the simulation.
 NUMBER_STEPS = 50
@@ -13,6 +25,8 @@ NUMBER_STEPS = 50
 # The following variables can be changed:
 NUMBER_AGENTS = 5 # Number of agents to create.
 SHOW_AGENT_INFO = 5 # Show the information of x number of agents. 
+SHOW_AGENT_IDS = None # If set to a list of agent ids, e.g. [0, 3], the information panel shows these agents instead
+                      # of the first SHOW_AGENT_INFO agents.
 AGENT_VISION = 2 # The range of vision of the agent; it can see x by x squares around itself.
 AGENT_HEALTH = 10 # The starting health of agents.
 AGENT_METABOLISM = .3 # Amount of health the agent loses every turn.
@@ -22,6 +36,64 @@ AGENT_SOCIALPRESSURE = .2 # Social pressure increases the more the agent interac
 NUMBER_FOOD = 10 # Number of food patches to create.
 SIM_AREA = 5 # Area for the grid world. Creates an x by x grid square.
 FOOD_REGROWTH = 1 # X number of turns before food regrows at a food patch.
+DECISION_CACHE_SIZE = 4096 # Number of decision scores every run remembers (see decisionCache below). 0 turns it
+                           # off.
+SEED = None # The seed for all the random numbers of a run (see randomStream below). None means a new seed
+            # every time, which is printed at the start so that the run can be repeated.
+LEGACY_DEATH_SKIP = False # In the original version of this script, an agent that died made the next agent in the
+                          # agent list miss its turn in that step. Set this to True to do the same, e.g. to compare
+                          # with the results of the article.
+
+# What is printed while the simulation runs (the grid world and the information panel, see the draw function):
+OUTPUT = "every" # "every" prints step 0, every OUTPUT_EVERY steps and the last step, "final" only the last step,
+                 # and "off" nothing. What is not printed is not worked out either.
+OUTPUT_EVERY = 1 # Number of steps between two printouts with OUTPUT = "every".
+
+# Output of the data of every step:
+RECORD_DATA_FRAMES = True # Keep the data of every agent at every step in memory for the Data Frames and plots.
+                          # For very long runs, turn this off and use TRAJECTORY_FILE instead.
+TRAJECTORY_FILE = None # If set, e.g. to "trajectory.parquet", the data of every living agent at every step is
+                       # written to this file while the simulation runs. Files ending in ".arrow" are written in
+                       # the Arrow IPC format instead of Parquet. Needs the pyarrow package. When snapshots are
+                       # saved (see CHECKPOINT_FILE below), the file is finished at every snapshot and the next steps
+                       # go to a new part file, e.g. "trajectory.1.parquet", so that a run continued from a snapshot
+                       # carries on with the right part. readTrajectory below reads all the parts back as one table.
+TRAJECTORY_ROW_GROUP = 65536 # Number of rows kept in memory before they are written to TRAJECTORY_FILE.
+
+# Snapshots of the whole simulation (see the snapshot functions below):
+CHECKPOINT_FILE = None # If set, e.g. to "checkpoint.snap", a snapshot is saved to this file every CHECKPOINT_EVERY
+                       # steps, replacing the previous one.
+CHECKPOINT_EVERY = 100 # Number of steps between snapshots.
+RESUME_FILE = None # If set, the simulation continues from this snapshot instead of creating a new grid world.
+
+# Profiling (see the profiler class below):
+PROFILE = False # Measure the time of every phase of the step loop, count what happens in it and print the results
+                # at the end. When False, nothing is measured.
+PROFILE_FILE = None # If set, e.g. to "profile.csv", the measurements are also saved to this file.
+PROFILE_PER_STEP = True # Save one row per step to PROFILE_FILE. If False, one row for the whole run.
+
+# Parallel LOOK and DECIDE (see lookAndDecideAll below):
+DECIDE_WORKERS = 0 # If more than 0, every step starts with all the agents looking at the food around them and
+                   # scoring it at the same time, in this many worker threads or processes, against the grid world as
+                   # it is at the start of the step. Then every agent, in the order of the agent list, moves, picks
+                   # the food to pursue among what it saw (leaving out food consumed in the meantime), consumes and
+                   # metabolizes. As with 0, agents that are pursuing food at the start of the step do not score what
+                   # they see, unless the step is printed, so an agent whose food is eaten by another agent during the
+                   # step picks new food in the next step. The results do not depend on the number of workers, but
+                   # they differ from those of 0, where every agent looks after it has moved and after the agents
+                   # before it have eaten. Every step sends the agents to the workers and waits for all of them, so
+                   # this only pays off with thousands of agents, a large range of vision and several cores.
+DECIDE_POOL = "process" # "process" or "thread". Worker threads only run at the same time in Python builds without
+                        # the global interpreter lock (free-threaded builds).
+
+# Plots of the results (see plotResults below):
+PLOT_OUTPUT = "show" # "show" opens a window for every plot. "png" or "svg" saves every plot to its own file in the
+                     # folder PLOT_PATH instead, drawn in PLOT_WORKERS worker processes at the same time, without
+                     # opening any window. "pdf" saves all the plots in the file PLOT_PATH + ".pdf"; since only one
+                     # process can write the file, these plots are drawn in this process, one after the other.
+PLOT_PATH = "plots"
+PLOT_WORKERS = None # Number of worker processes for saving "png" or "svg" plots. None means one for every core,
+                    # and 1 draws them in this process.
 
 # For reference, the five cognitive rules that agents in the simulation can learn:
 rule1Text = "Consuming 1 food is good for me."
@@ -29,436 +101,1241 @@ rule2Text = "Consuming 2 food is very good for me."
 rule3Text = "Consuming 2 food is bad for the community."
 rule4Text = "Consuming 3 food is bad for me."
 rule5Text = "Consuming 3 food is bad for the community."
+
+##########################################################################################################
+##       Random numbers - Every agent has its own stream of random numbers, and so does the world       ##
+##########################################################################################################
+
+# All the random numbers of a run come from SEED. Instead of one generator shared by everything (where the numbers
+# an agent gets depend on how many numbers were taken before it), every agent has its own stream of random numbers
+# and the grid world has one more for creating the agents and food. The n-th number of a stream only depends on
+# SEED, the stream number (0 for the world, the agent id + 1 for an agent) and n, so a run gives exactly the same
+# results from the same SEED no matter in which order, or in which process, the agents are handled. The numbers
+# are made with the SplitMix64 method.
+MASK64 = (1 << 64) - 1 # Keeps numbers within 64 bits.
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15 # The step between the inner states of a SplitMix64 stream.
+
+def mix64(z):
+    # Scrambles the bits of a 64-bit number (the SplitMix64 output function).
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+# The random stream class:
+class randomStream:
+    __slots__ = ("key", "counter")
+
+    # Initialization of the random stream class: the key identifies the stream, and the counter is the number of
+    # random numbers taken from it so far.
+    def __init__(self, seed, stream):
+        self.key = mix64((mix64(seed & MASK64) + (stream + 1) * GOLDEN_GAMMA) & MASK64)
+        self.counter = 0
+
+    def next64(self):
+        # The next random 64-bit number of the stream.
+        self.counter += 1
+        return mix64((self.key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def randint(self, low, high):
+        # A random integer from low to high (both included), like random.randint.
+        return low + self.next64() % (high - low + 1)
+
+    def shuffle(self, items):
+        # Shuffles the list in place, like random.shuffle.
+        for i in reversed(range(1, len(items))):
+            j = self.randint(0, i)
+            items[i], items[j] = items[j], items[i]
+
+    def skip(self, n):
+        # Skips the next n numbers of the stream, as if they had been taken.
+        self.counter += max(n, 0)
+
  
 # The agent class:
 class agent:
+    # The attributes of the agent are listed in __slots__, so that each agent takes little memory and its attributes
+    # are quick to get to, even with millions of agents.
+    __slots__ = ("id", "xPosition", "yPosition", "health",
+                 "rule1weight", "rule2weight", "rule3weight", "rule4weight", "rule5weight",
+                 "timesSick3", "timesPunished3", "timesPunished2", "socialPressure",
+                 "seeing", "seeingScores", "pursuing", "consuming", "rng", "consumingData", "punished")
+
     # Initialization of the agent class:
-    def __init__(self, id, x, y):
+    def __init__(self, id, x, y, health):
         self.id = id # An identification number for the agent.
         self.xPosition = x # The coordinate position of the agent on the map.
         self.yPosition = y
-        self.health = AGENT_HEALTH # The starting health of the agent. Taken from the constant variables above.
-        # The cognitive rules known by the agent along with their corresponding weights (refer to the text above).
-        # At the start, the agent does not know any of these rules. It has to learn them from experience.
-        self.rules = {"rule1": False, "rule1weight": 0,
-                      "rule2": False, "rule2weight": 0,
-                      "rule3": False, "rule3weight": 0,
-                      "rule4": False, "rule4weight": 0,
-                      "rule5": False, "rule5weight": 0}
+        self.health = health # The starting health of the agent (AGENT_HEALTH in the config of the run).
+        # The weights of the cognitive rules known by the agent (refer to the text above). At the start, the agent
+        # does not know any of these rules. It has to learn them from experience. A rule is known once its weight
+        # is more than 0, because the weight goes up by 1 every time the agent learns it.
+        self.rule1weight = 0
+        self.rule2weight = 0
+        self.rule3weight = 0
+        self.rule4weight = 0
+        self.rule5weight = 0
         self.timesSick3 = 0 # Number of times the agent has become sick from eating 3 units of food.
         self.timesPunished3 = 0 # Number of times the agent was punished by others for eating 3 food.
         self.timesPunished2 = 0 # Number of times the agent was punished by others for eating 2 food.
         self.socialPressure = 0 # Number of times the agent has "interacted" with other agents. 
                                # Again, this simply means eating food in the presence of other agents.
-        self.seeing = [] # All the food seen by the agent inside its range of vision. 
-        self.seeingScores = [] # The decision-making scores for all the food seen.
-        self.pursuing = []  # To indicate the food currently being pursued.
-        self.consuming = [] # To indicate the food currently being consumed.
-        self.consumingData = [] # This is new; it is for containing consumption data for the Data Frame.
+        # All the food seen by the agent inside its range of vision, and the decision-making scores for all the
+        # food seen. They start as empty tuples instead of lists, because all agents can share the same one.
+        self.seeing = ()
+        self.seeingScores = ()
+        self.pursuing = -1  # The id of the food currently being pursued, -1 if none.
+        self.consuming = -1 # The id of the food currently being consumed, -1 if none.
+        self.consumingData = () # This is new; it is for containing consumption data for the Data Frame.
         self.punished = False # To indicate if the agent is currently punished by other agents.
+        self.rng = None # The agent's own stream of random numbers (see the randomStream class above).
 
 # The food class:
 class food:
+    # As with the agent class, the attributes are listed in __slots__.
+    __slots__ = ("id", "xPosition", "yPosition", "amount", "consumed", "regrowStep")
+
     # Initialization of the food class:
     def __init__(self, id, x, y, amount):
-        self.id = id # An identification number for the food.
+        self.id = id # An identification number for the food. It is also its position in the food list.
         self.xPosition = x # The coordinate position of the food on the map.
         self.yPosition = y
         self.amount = amount # The amount of food, from 1 to 3 units.
         self.consumed = False # To indicate if the food has been consumed in the food patch. 
                               # If true, it disappears and will regrow later.
-        self.regrowthTimer = FOOD_REGROWTH # A timer to determine when the food will regrow. Taken from the constant
-                                           # variables above.
+        self.regrowStep = -1 # The step at the start of which consumed food regrows (see the regrowth schedule
+                             # functions below).
+
+# The recorder class:
+class recorder:
+    # The columns recorded for every agent at every step: the amount of food consumed, the decision scores for that
+    # food and the weights of the five rules (see consumingData in the agent class).
+    columns = ["Food", "P", "E", "C", "S", "D", "R1", "R2", "R3", "R4", "R5"]
+
+    # Initialization of the recorder class. All the data goes in one Numpy array of shape (agents, steps, columns)
+    # that is created at the start, instead of adding rows to a Data Frame every step.
+    def __init__(self, numberAgents, numberSteps):
+        # Row 0 of every agent is step zero, where all the entries are 0. Every row after that starts at -1, which
+        # is what stays there once the agent is dead.
+        import numpy # Only needed when the data is recorded.
+        self.data = numpy.full((numberAgents, numberSteps+1, len(self.columns)), -1, dtype=numpy.int64)
+        self.data[:, 0] = 0
+
+    def record(self, steps, agentList):
+        # Record the data of every living agent at this step. The agent id is its row in the array.
+        for a in agentList:
+            if a.consuming >= 0: # Check if this living agent has just consumed food.
+                self.data[a.id, steps] = a.consumingData # Get the consuming data.
+            else:
+                self.data[a.id, steps] = 0 # If not consuming then all the entries are 0.
+
+    def dataFrames(self):
+        # Turn the recorded data into one Pandas Data Frame per agent.
+        import pandas # Only needed for the Data Frames.
+        return {c: pandas.DataFrame(self.data[c], columns=self.columns) for c in range(len(self.data))}
+
+# The trajectory writer class:
+class trajectoryWriter:
+    # The columns written for every living agent at every step: the step, the agent id, its position, health and
+    # punishment marker, then the same columns as the recorder.
+    columns = ["Step", "Agent", "X", "Y", "Health", "Punished"] + recorder.columns
+
+    # Initialization of the trajectory writer class. Rows are collected in lists, one per column, and written to the
+    # file as one row group (Parquet) or record batch (Arrow IPC) every TRAJECTORY_ROW_GROUP rows, so the memory used
+    # does not grow with the number of steps. part is the part file to start with (see TRAJECTORY_FILE above); any
+    # later parts left over from a run that went on after the snapshot are removed.
+    def __init__(self, fileName, rowGroupSize, part=0):
+        import pyarrow # Only needed when a trajectory file is written.
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(name, pyarrow.float64() if name == "Health"
+                                             else pyarrow.bool_() if name == "Punished"
+                                             else pyarrow.int64()) for name in self.columns])
+        self.fileName = fileName
+        self.part = part
+        laterPart = part + 1
+        while os.path.exists(trajectoryPartName(fileName, laterPart)):
+            os.remove(trajectoryPartName(fileName, laterPart))
+            laterPart += 1
+        self.open()
+        self.rowGroupSize = rowGroupSize
+        self.rows = {name: [] for name in self.columns}
+        self.numberRows = 0
+
+    def open(self):
+        # Start writing the current part file.
+        partName = trajectoryPartName(self.fileName, self.part)
+        if self.fileName.endswith(".arrow"):
+            import pyarrow.ipc
+            self.writer = self.pyarrow.ipc.new_file(partName, self.schema)
+        else:
+            import pyarrow.parquet
+            self.writer = self.pyarrow.parquet.ParquetWriter(partName, self.schema)
+
+    def nextPart(self):
+        # Finish the current part file and go on with the next one. Called when a snapshot is saved, so that all
+        # the rows up to the snapshot are in complete files.
+        self.close()
+        self.part += 1
+        self.open()
+
+    def record(self, steps, agentList):
+        # Add the rows of every living agent at this step, and write them out once there are enough of them.
+        rows = self.rows
+        for a in agentList:
+            rows["Step"].append(steps)
+            rows["Agent"].append(a.id)
+            rows["X"].append(a.xPosition)
+            rows["Y"].append(a.yPosition)
+            rows["Health"].append(a.health)
+            rows["Punished"].append(a.punished)
+            consumingData = a.consumingData if a.consuming >= 0 else [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+            for name, value in zip(recorder.columns, consumingData):
+                rows[name].append(value)
+        self.numberRows += len(agentList)
+        if self.numberRows >= self.rowGroupSize:
+            self.flush()
+
+    def flush(self):
+        # Write the collected rows to the file and start again with empty lists.
+        if self.numberRows == 0:
+            return
+        self.writer.write_table(self.pyarrow.Table.from_pydict(self.rows, schema=self.schema))
+        self.rows = {name: [] for name in self.columns}
+        self.numberRows = 0
+
+    def close(self):
+        # Write the last rows and finish the file.
+        self.flush()
+        self.writer.close()
+
+def trajectoryPartName(fileName, part):
+    # The name of a part of the trajectory file: the file name itself for part 0, e.g. "trajectory.parquet", and
+    # the part number before the extension for the others, e.g. "trajectory.1.parquet".
+    if part == 0:
+        return fileName
+    root, extension = os.path.splitext(fileName)
+    return root + "." + str(part) + extension
+
+def readTrajectory(fileName):
+    # Read all the parts of a trajectory file, in order, as one pyarrow Table.
+    import pyarrow
+    tables = []
+    part = 0
+    while os.path.exists(trajectoryPartName(fileName, part)):
+        partName = trajectoryPartName(fileName, part)
+        if fileName.endswith(".arrow"):
+            import pyarrow.ipc
+            tables.append(pyarrow.ipc.open_file(partName).read_all())
+        else:
+            import pyarrow.parquet
+            tables.append(pyarrow.parquet.read_table(partName))
+        part += 1
+    return pyarrow.concat_tables(tables)
 
 
 ##################################################################################################################
 ##       Decision-Making Process - The crucial function for the agents which uses a simple PECS framework       ##
 ##################################################################################################################
 
-def decision(agent, food):
+def decisionFeatures(agent):
+    # The agent's information used by the decision-making process, in the column order expected by decisionBatch.
+    # A rule that the agent does not know always has a weight of 0, so only the rule weights are needed.
+    return (agent.health, agent.timesSick3,
+            agent.rule1weight, agent.rule2weight, agent.rule3weight,
+            agent.rule4weight, agent.rule5weight,
+            agent.timesPunished2, agent.timesPunished3, agent.socialPressure)
+
+def decisionBatch(agentFeatures, foodAmounts, lookup=None):
+    # Scores many (agent, food) pairs at once. agentFeatures has one row per pair (see decisionFeatures above) and
+    # foodAmounts has the amount of the food in each pair. Returns one row of scores per pair. The scores come from
+    # lookup, a decision score cache (see decisionCache below), or are always worked out if there is none.
+    if lookup is None: lookup = decisionScores
+    scores = []
+    lastFeatures = None
+    for features, amount in zip(agentFeatures, foodAmounts):
+        # Rows for the same agent usually come one after the other, so the agent's part of the scores is only
+        # worked out again when the agent changes.
+        if features is not lastFeatures:
+            lastFeatures = features
+            (health, timesSick3, rule1weight, rule2weight, rule3weight, rule4weight, rule5weight,
+             timesPunished2, timesPunished3, socialPressure) = features
+
+            # Physical Component - This component's score is based on the agent's hunger.
+            # The lesser the agent's health is, the stronger its craving for food.
+            if (health >= 10): # 10 health and above means that the agent is satisfied.
+                physicalScore = 0
+            elif (health < 10 and health > 6):
+                physicalScore = 1
+            elif (health < 7 and health > 3):
+                physicalScore = 2
+            elif (health < 4):
+                physicalScore = 3
+
+        # Only the information that matters for the amount of food is passed on, so that the same situation always
+        # looks the same to the decision score cache.
+        if (amount == 1):
+            scores.append(lookup(physicalScore, 1, 0, rule1weight, 0, 0, socialPressure))
+        elif (amount == 2):
+            scores.append(lookup(physicalScore, 2, 0, rule2weight, rule3weight, timesPunished2, socialPressure))
+        elif (amount == 3):
+            scores.append(lookup(physicalScore, 3, timesSick3, 0, rule4weight + rule5weight, timesPunished3,
+                                 socialPressure))
+        else:
+            scores.append(lookup(physicalScore, amount, 0, 0, 0, 0, socialPressure))
+
+    return scores
+
+def decisionScores(physicalScore, amount, timesSick3, goodRuleWeight, badRuleWeight, timesPunished, socialPressure):
+    # The scores for one food, given the agent's physical score and, for the amount of food under consideration,
+    # the times it got sick, the weights of the rules that say it is good (rules 1 and 2) or bad (rules 3, 4 and 5),
+    # the times it was punished and its social pressure.
     # The set of scores that will determine whether the agent will pursue or ignore the food under consideration.
-    physicalScore = 0
     emotionalScore = 0
     cognitiveScore = 0
     socialScore = 0
-    
-    # Physical Component - This component's score is based on the agent's hunger.
-    # The lesser the agent's health is, the stronger its craving for food.
-    if (agent.health >= 10): # 10 health and above means that the agent is satisfied.
-        physicalScore = 0
-    elif (agent.health < 10 and agent.health > 6):
-        physicalScore = 1
-    elif (agent.health < 7 and agent.health > 3):
-        physicalScore = 2
-    elif (agent.health < 4):
-        physicalScore = 3
 
     # Emotional Component - This component's score is based on an appraisal theory of emotions.
     # The greater the amount of food is, the more desirable it seems and the stronger the emotion of desire is.
     # However, previous negative experiences (in particular, with 3 units of food) will lessen this.
-    if (food.amount == 1):
+    # Cognitive Component - This component's score is based on the rules that the agent has learned through
+    # experience. Each rule has a corresponding weight which increases as the agent experiences things. Notice
+    # that the first two rules (1 & 2) obtain a positive value and the last three rules (3, 4, & 5) obtain a
+    # negative value. You can refer to the five cognitive rules above.
+    # Social Component - This component's score is based on the prospect of social approbation or punishment
+    # multiplied (or amplified) by a "social pressure" value. 1 unit of food means social approbation while 2
+    # and 3 units of food could mean social punishment. This gets multiplied immediately after.
+    if (amount == 1):
         emotionalScore = 1
-    elif (food.amount == 2):
+        socialScore = 1
+    elif (amount == 2):
         emotionalScore = 2
-    elif (food.amount == 3):
-        emotionalScore = 3 - agent.timesSick3 # Though 3 units of food is initially the most desirable, the emotional
-                                              # desire decreases according to the number of times it has made the 
-                                              # agent sick.
-
-    # Cognitive Component - This component's score is based on the rules that the agent has learned through experience.
-    # Each rule has a corresponding weight which increases as the agent experiences things. Notice that the first two 
-    # rules (! & 2) obtain a positive value and the last three rules (3, 4, & 5) obtain a negative value. You can 
-    # refer to the five cognitive rules above.
-    if (food.amount == 1 and agent.rules["rule1"]):
-        cognitiveScore = agent.rules["rule1weight"]
-    if (food.amount == 2 and agent.rules["rule2"]):
-        cognitiveScore = agent.rules["rule2weight"]
-    if (food.amount == 2 and agent.rules["rule3"]):
-        cognitiveScore -= agent.rules["rule3weight"]
-    if (food.amount == 3 and agent.rules["rule4"]):
-        cognitiveScore -= agent.rules["rule4weight"]
-    if (food.amount == 3 and agent.rules["rule5"]):
-        cognitiveScore -= agent.rules ["rule5weight"]
+    elif (amount == 3):
+        emotionalScore = 3 - timesSick3 # Though 3 units of food is initially the most desirable, the emotional
+                                        # desire decreases according to the number of times it has made the
+                                        # agent sick.
+    cognitiveScore = goodRuleWeight - badRuleWeight
+    socialScore -= timesPunished
 
-    # Social Component - This component's score is based on the prospect of social approbation or punishment
-    # multiplied (or amplified) by a "social pressure" value. 1 unit of food means social approbation while 2 and 3 
-    # units of food could mean social punishment. This gets multiplied immediately after.
-    if (food.amount == 1):
-        socialScore = 1
-    if (food.amount == 2):
-        socialScore -= agent.timesPunished2
-    if (food.amount == 3):
-        socialScore -= agent.timesPunished3
-        
-    socialScore = socialScore * agent.socialPressure # The social score is multiplied here by social pressure.
-                                                     # Again, social pressure depends on the number of times the agent
-                                                     # has "interacted" with other agents in the past.
+    socialScore = socialScore * socialPressure # The social score is multiplied here by social pressure.
+                                               # Again, social pressure depends on the number of times the agent
+                                               # has "interacted" with other agents in the past.
     socialScore = int(round(socialScore, 1)) # Rounded and turned to an integer.
 
     # Total Decision Score
     decisionScore = physicalScore + emotionalScore + cognitiveScore + socialScore
+    return physicalScore, emotionalScore, cognitiveScore, socialScore, decisionScore
 
+# All the information given to decisionScores comes in small steps (the physical score and the food amount have a
+# few values, the rest are counters and multiples of AGENT_SOCIALPRESSURE), so in long runs the same scores are
+# asked for again and again. A decision score cache remembers the last DECISION_CACHE_SIZE scores that were worked
+# out and forgets the least recently used ones first. Every run has its own cache (see runSimulation below) and
+# gives it to decisionBatch as the lookup, so that runs with different settings can go on side by side in one
+# program without emptying each other's cache or counting each other's hits and misses.
+
+def decisionCache(size):
+    # A new decision score cache that remembers up to size scores. With a size of 0, there is no cache and the
+    # scores are always worked out.
+    if size > 0:
+        return functools.lru_cache(maxsize=size)(decisionScores)
+    return decisionScores
+
+def decisionCacheInfo(lookup):
+    # The number of hits and misses of a decision score cache, the fraction of lookups that were hits, the number
+    # of scores it holds now and the most it can hold.
+    if lookup is decisionScores:
+        return {"hits": 0, "misses": 0, "hitRate": 0.0, "size": 0, "maxSize": 0}
+    info = lookup.cache_info()
+    lookups = info.hits + info.misses
+    return {"hits": info.hits, "misses": info.misses, "hitRate": info.hits / lookups if lookups else 0.0,
+            "size": info.currsize, "maxSize": info.maxsize}
+
+def decision(agent, food, lookup=None):
+    # The decision-making scores of one agent for one food; see decisionBatch above.
     # This function gives all the scores, to be displayed in the information panel.
-    return physicalScore, emotionalScore, cognitiveScore, socialScore, decisionScore
+    return decisionBatch([decisionFeatures(agent)], [food.amount], lookup)[0]
+
+################################################################################################
+##       Grid index - Keeps track of which agents and food are on every square location.       ##
+################################################################################################
+
+# Instead of scanning the whole agent or food list every time we need to know what is on a square location, the
+# main program keeps two dictionaries keyed on the (x, y) coordinates: one for the agents (agentGrid) and one for
+# the food (foodGrid). Food never moves, so foodGrid holds a single food per square location. Agents move around,
+# so agentGrid has to be updated every time an agent moves or dies. Each square location holds a list of agents
+# because, in rare cases, an agent that is pushed back from the edge of the grid world can end up on the same
+# square location as another agent (see the MOVE code in the main program loop).
+
+def addToGrid(agentGrid, a):
+    # Put the agent on its current square location.
+    agentGrid.setdefault((a.xPosition, a.yPosition), []).append(a)
+
+def removeFromGrid(agentGrid, a):
+    # Take the agent off its current square location. Empty square locations are removed from the dictionary
+    # so that "(x, y) in agentGrid" is only true if there is an agent there.
+    agentsHere = agentGrid[(a.xPosition, a.yPosition)]
+    agentsHere.remove(a)
+    if not agentsHere:
+        del agentGrid[(a.xPosition, a.yPosition)]
+
+def moveInGrid(agentGrid, a, x, y):
+    # Move the agent to a new square location.
+    removeFromGrid(agentGrid, a)
+    a.xPosition = x
+    a.yPosition = y
+    addToGrid(agentGrid, a)
+
+def anotherAgentInSight(agentGrid, a, vision):
+    # Is there any other agent within the agent's range of vision? Only the square locations inside the range of
+    # vision are checked, instead of every agent in the grid world.
+    for x in range(a.xPosition-vision, a.xPosition+vision+1):
+        for y in range(a.yPosition-vision, a.yPosition+vision+1):
+            for a2 in agentGrid.get((x, y), []):
+                if a2 is not a:
+                    return True
+    return False
+
+def randomCells(worldRandom, number, area):
+    # Picks the given number of different square locations at random in an area by area grid world, for placing
+    # agents or food. These are the first entries of a random shuffle of all the square locations (a Fisher-Yates
+    # shuffle that only remembers the entries it has moved), so it takes one random number per square location
+    # picked, however full the grid world gets.
+    numberCells = area * area
+    if number > numberCells:
+        raise ValueError("Cannot pick " + str(number) + " different square locations in a " + str(area) +
+                         " by " + str(area) + " grid world.")
+    moved = {}
+    cells = []
+    for i in range(number):
+        j = worldRandom.randint(i, numberCells - 1)
+        cell = moved.get(j, j)
+        moved[j] = moved.get(i, i)
+        cells.append(divmod(cell, area))
+    return cells
+
+# The pursuit index (pursuers) is a dictionary from the id of a food to the set of agents pursuing it, so that when
+# the food is consumed only those agents have to be told, instead of going through the whole agent list.
+
+def pursue(pursuers, a, foodId):
+    # The agent starts pursuing the food.
+    a.pursuing = foodId
+    pursuers.setdefault(foodId, set()).add(a)
+
+def stopPursuing(pursuers, a):
+    # The agent stops pursuing its food, if any.
+    if a.pursuing >= 0:
+        pursuingHere = pursuers[a.pursuing]
+        pursuingHere.discard(a)
+        if not pursuingHere:
+            del pursuers[a.pursuing]
+        a.pursuing = -1
+
+def foodGone(pursuers, f):
+    # The food has been consumed: every agent pursuing it stops.
+    for a2 in pursuers.pop(f.id, ()):
+        a2.pursuing = -1
+
+##########################################################################################
+##       Snapshots - Saving the whole simulation to a file and continuing from it later       ##
+##########################################################################################
+
+# A snapshot file has a fixed binary layout (little-endian), so any part of it can be found without reading the rest:
+#   1. The header: the SNAPSHOT_MAGIC text, the format version, the step, NUMBER_AGENTS at the start of the run, the
+#      number of living agents, the number of food, the number of recorded steps (0 if there is no recorder) and
+#      the part of the trajectory file that the steps after the snapshot go to (-1 if there is no trajectory file).
+#   2. One record per living agent, in the order of agentList. Pursued and consumed food are stored as food ids
+#      (-1 if none), and the agent's stream of random numbers as its key and counter.
+#   3. One record per food, in the order of foodList.
+#   4. The recorder data up to the step, if any: NUMBER_AGENTS x (recorded steps) x 11 integers.
+# The file is read through a memory map, so only the parts that are used are loaded.
+# What the agents are seeing is not stored, because it is looked at again in the next step anyway.
+SNAPSHOT_MAGIC = b"TEMPSNAP"
+SNAPSHOT_VERSION = 5
+snapshotHeader = struct.Struct("<8sIqqqqqq")
+snapshotAgent = struct.Struct("<qqqd5qqqqdqq?11qQQ")
+snapshotFood = struct.Struct("<qqqq?q")
+
+def saveSnapshot(fileName, steps, agentList, foodList, numberAgents, data, trajectoryPart=-1):
+    # Save the simulation after the given step. numberAgents is NUMBER_AGENTS at the start of the run, data is the
+    # recorder (or None) and trajectoryPart the part of the trajectory file that the next steps go to. The snapshot is written to a temporary file first and then put in place, so a run
+    # that is stopped in the middle of saving still leaves the previous snapshot intact.
+    recordedSteps = steps+1 if data else 0
+    snapshot = bytearray(snapshotHeader.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, steps, numberAgents,
+                                             len(agentList), len(foodList), recordedSteps, trajectoryPart))
+    for a in agentList:
+        consumingData = a.consumingData if a.consumingData else [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        snapshot += snapshotAgent.pack(a.id, a.xPosition, a.yPosition, a.health,
+                                       a.rule1weight, a.rule2weight, a.rule3weight, a.rule4weight, a.rule5weight,
+                                       a.timesSick3, a.timesPunished3, a.timesPunished2, a.socialPressure,
+                                       a.pursuing, a.consuming, a.punished, *consumingData, a.rng.key, a.rng.counter)
+    for f in foodList:
+        snapshot += snapshotFood.pack(f.id, f.xPosition, f.yPosition, f.amount, f.consumed, f.regrowStep)
+    if data:
+        snapshot += data.data[:, :recordedSteps].tobytes()
+    with open(fileName + ".tmp", "wb") as snapshotFile:
+        snapshotFile.write(snapshot)
+    os.replace(fileName + ".tmp", fileName)
+
+def loadSnapshot(fileName):
+    # Load a snapshot saved by saveSnapshot. Returns the step, the agent list, the food list, NUMBER_AGENTS at the
+    # start of the run, the recorded data (a Numpy array, or None if the snapshot has no recorder data) and the part
+    # of the trajectory file to go on with (-1 if the run had no trajectory file).
+    # The random number streams of the agents continue exactly where they were when the snapshot was saved.
+    with open(fileName, "rb") as snapshotFile:
+        snapshot = mmap.mmap(snapshotFile.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, steps, numberAgents, numberLiving, numberFood, recordedSteps, trajectoryPart = \
+        snapshotHeader.unpack_from(snapshot)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(fileName + " is not a snapshot file of this version.")
+    offset = snapshotHeader.size
+
+    foodList = []
+    foodOffset = offset + numberLiving * snapshotAgent.size
+    for i in range(numberFood):
+        id, x, y, amount, consumed, regrowStep = snapshotFood.unpack_from(snapshot, foodOffset + i * snapshotFood.size)
+        f = food(id, x, y, amount)
+        f.consumed = consumed
+        f.regrowStep = regrowStep
+        foodList.append(f)
+
+    agentList = []
+    for i in range(numberLiving):
+        fields = snapshotAgent.unpack_from(snapshot, offset + i * snapshotAgent.size)
+        a = agent(fields[0], fields[1], fields[2], fields[3])
+        a.rule1weight, a.rule2weight, a.rule3weight, a.rule4weight, a.rule5weight = fields[4:9]
+        a.timesSick3, a.timesPunished3, a.timesPunished2, a.socialPressure = fields[9:13]
+        a.pursuing, a.consuming, a.punished = fields[13:16]
+        a.consumingData = list(fields[16:27])
+        a.rng = randomStream(0, 0)
+        a.rng.key, a.rng.counter = fields[27:29]
+        agentList.append(a)
+
+    recorded = None
+    if recordedSteps:
+        offset = foodOffset + numberFood * snapshotFood.size
+        import numpy # Only needed when the snapshot has recorded data.
+        recorded = numpy.frombuffer(snapshot, dtype=numpy.int64, count=numberAgents * recordedSteps * 11,
+                                    offset=offset).reshape(numberAgents, recordedSteps, 11).copy()
+    snapshot.close()
+    return steps, agentList, foodList, numberAgents, recorded, trajectoryPart
+
+##############################################################################################
+##       Regrowth schedule - Keeps track of which food regrows at the start of every step       ##
+##############################################################################################
+
+# Instead of counting down a timer on every food patch in every step, consumed food is put in a dictionary keyed on
+# the step at the start of which it regrows (regrowthSchedule). Regrowing food then only means taking out the list
+# of food for the current step, however many food patches there are. Food regrows FOOD_REGROWTH steps after the
+# step in which it was consumed, and never in the same step.
+
+def scheduleRegrowth(regrowthSchedule, f, steps, regrowth):
+    # The food was consumed in the given step: put it in the schedule, to regrow after the given number of steps.
+    f.regrowStep = steps + max(1, regrowth)
+    regrowthSchedule.setdefault(f.regrowStep, []).append(f)
+
+def regrowFood(regrowthSchedule, steps):
+    # Regrow all the food that is due at the start of the given step, and return it.
+    regrown = regrowthSchedule.pop(steps, [])
+    for f in regrown:
+        f.consumed = False
+    return regrown
+
+##############################################################################
+##       Profiling - How long every phase of the step loop takes       ##
+##############################################################################
+
+# The phases of a step. REGROW is done once per step and the agent phases once per agent; OUTPUT is the drawing,
+# recording and saving after the agents have had their turn.
+PHASES = ("REGROW", "MOVE", "LOOK", "DECIDE", "CONSUME", "METABOLIZE", "OUTPUT")
+# What is counted in the step loop: the decision scores worked out (see the decision function above), the square
+# locations looked at in LOOK and the food seen there, the moves that were blocked by another agent, the agents
+# that stopped pursuing food because another agent consumed it, and the agents that died.
+COUNTERS = ("decisions", "cellsScanned", "foodSeen", "blockedMoves", "pursuitsCancelled", "deaths")
+
+# The profiler class:
+class profiler:
+    # Initialization of the profiler class: the time spent in every phase so far in seconds, the counters, the
+    # number of steps and the time of the whole step loop. Give a profiler to runSimulation to fill it in; without
+    # one, nothing is measured. If perStep is True, the times and counts of every step are also kept, as rows.
+    def __init__(self, perStep=False):
+        self.phaseTimes = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.steps = 0
+        self.loopTime = 0.0
+        self.rows = [] if perStep else None
+        self.lastTotals = self.totals()
+
+    def lap(self, phase, start):
+        # Adds the time since start to the phase, and returns the current time as the start of the next phase.
+        now = time.perf_counter()
+        self.phaseTimes[phase] += now - start
+        return now
+
+    def totals(self):
+        # The times and counts so far, in one dictionary.
+        return {**{"time" + phase.capitalize(): t for phase, t in self.phaseTimes.items()}, **self.counters}
+
+    def endStep(self, steps):
+        # The given step is done. With perStep, its times and counts are kept as a row.
+        self.steps += 1
+        if self.rows is not None:
+            totals = self.totals()
+            self.rows.append({"step": steps, **{name: totals[name] - self.lastTotals[name] for name in totals}})
+            self.lastTotals = totals
+
+    def summary(self):
+        # The steps per second, and the average time of every phase and count per step.
+        return {"steps": self.steps,
+                "stepsPerSecond": self.steps / self.loopTime if self.loopTime else 0.0,
+                "phaseTimePerStep": {phase: t / max(self.steps, 1) for phase, t in self.phaseTimes.items()},
+                "countsPerStep": {name: n / max(self.steps, 1) for name, n in self.counters.items()}}
+
+    def report(self):
+        # Prints the summary, with the phases from the slowest to the fastest.
+        summary = self.summary()
+        print("\nProfile: ", summary["steps"], " steps, ", round(summary["stepsPerSecond"], 1), " steps per second.", sep="")
+        total = sum(self.phaseTimes.values()) or 1
+        for phase, t in sorted(summary["phaseTimePerStep"].items(), key=lambda item: -item[1]):
+            print("  ", phase.ljust(10), " ", round(t * 1000, 3), " ms per step (",
+                  round(self.phaseTimes[phase] / total * 100, 1), "%)", sep="")
+        for name, n in summary["countsPerStep"].items():
+            print("  ", name.ljust(17), " ", round(n, 1), " per step", sep="")
+
+    def save(self, fileName):
+        # Saves the times and counts to a CSV file: one row per step if they were kept, otherwise one row with the
+        # totals of the whole run.
+        rows = self.rows if self.rows is not None else [{"steps": self.steps, "loopTime": self.loopTime, **self.totals()}]
+        with open(fileName, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["step"])
+            writer.writeheader()
+            writer.writerows(rows)
 
 #######################################################################################
 ##       This is the graphics function that draws everything using ASCII text.       ##
 ##       If you want better graphics you can replace this with something else.       ##  
 #######################################################################################
 
-def draw(agentList, foodList, steps):
-    # Draw the grid world with agents and food.
-    print("\n")
-    print("   ", end=" ")
-    for x in range(SIM_AREA): # Draw the x coordinate numbers.
-        print("(", x,")", sep="", end=" ")
-    print(" x")
-    for y in range(SIM_AREA):
-        print("(", y,")", sep="", end=" ") # Draw the y coordinate numbers.
-        for x in range(SIM_AREA): # Draw the square locations of the grid world.
-            agentPresent = False # By default, there is no agent or food in the square location.
-            foodPresent = False
+def outputDue(steps, settings):
+    # Whether the grid world and the information panel are printed after the given step (see OUTPUT above).
+    if settings.OUTPUT == "every":
+        return steps % settings.OUTPUT_EVERY == 0 or steps == settings.NUMBER_STEPS
+    if settings.OUTPUT == "final":
+        return steps == settings.NUMBER_STEPS
+    if settings.OUTPUT == "off":
+        return False
+    raise ValueError("OUTPUT must be \"every\", \"final\" or \"off\", not " + repr(settings.OUTPUT) + ".")
+
+def shownInPanel(a, livingBefore, settings):
+    # Whether the agent is in the information panel, given the number of living agents before it in the agent list.
+    # You can display the information for x number of agents, set through the constant variable SHOW_AGENT_INFO
+    # above, or for the agents in SHOW_AGENT_IDS.
+    if settings.SHOW_AGENT_IDS is not None:
+        return a.id in settings.SHOW_AGENT_IDS
+    return livingBefore < settings.SHOW_AGENT_INFO
+
+def draw(agentList, foodList, steps, agentGrid, foodGrid, settings):
+    # Draw the grid world with agents and food. The whole printout is put together in memory and printed at once.
+    # What is on every square location comes from the grid index, instead of going through all the agents and
+    # food for every one of them.
+    area = settings.SIM_AREA
+    out = io.StringIO()
+    out.write("\n\n    ")
+    for x in range(area): # Draw the x coordinate numbers.
+        out.write("(" + str(x) + ") ")
+    out.write(" x\n")
+    for y in range(area):
+        out.write("(" + str(y) + ") ") # Draw the y coordinate numbers.
+        for x in range(area): # Draw the square locations of the grid world.
             # If an agent is present in the coordinate, then display "A" + agent id number.
-            # To simplify our lives, no two agents can occupy the same square location. 
-            # This is guaranteed in the main program code below.
-            for a in agentList:
-                if (a.xPosition == x and a.yPosition == y):
-                    print("A",a.id, "*", sep="", end=" ")
-                    agentPresent = True
             # If no agent is present in the coordinate, but there is food, display the food as food amount + "F".
             # This means that if an agent and food are in the same location, the agent will cover up the food.
-            if (agentPresent == False):
-                for f in foodList:
-                    if (f.xPosition == x and f.yPosition == y and f.consumed == False):
-                        print(f.amount,"F*", sep="", end=" ")
-                        foodPresent = True
             # If the square location is empty, diplay "***".
-            if (agentPresent == False and foodPresent == False):            
-                print("***", end=" ")
-        print("\n")
-    print("y\n")    
-
-    # You can display the information for x number of agents, set through the constant variable SHOW_AGENT_INFO above.
-    # This piece of code gets the list of agents whose information will be displayed in the information panel.
-    newList = []
-    if len(agentList) < SHOW_AGENT_INFO: # This is in case some agents have died. Then you might have a list that is
-        showAgents = len(agentList)      # even shorter than SHOW_AGENT_INFO 
-    else:
-        showAgents = SHOW_AGENT_INFO
-    for i in range(showAgents):
-        newList.append(agentList[i])             
-        
+            agentsHere = agentGrid.get((x, y))
+            f = foodGrid.get((x, y))
+            if agentsHere:
+                out.write("".join("A" + str(a.id) + "* " for a in sorted(agentsHere, key=lambda a: a.id)))
+            elif f is not None and f.consumed == False:
+                out.write(str(f.amount) + "F* ")
+            else:
+                out.write("*** ")
+        out.write("\n\n")
+    out.write("y\n\n")
+
+    # The list of agents whose information will be displayed in the information panel.
+    newList = [a for i, a in enumerate(agentList) if shownInPanel(a, i, settings)]
+
     # The information panel for agents.
-    print("INFORMATION PANEL STEP ",steps,":\n", sep="")
+    print("INFORMATION PANEL STEP ",steps,":\n", sep="", file=out)
     for a in newList:
         # First line has the agent id number, its current health, indicates whether the agent is currently pursuing
         # or consuming food, whether the agent is made sick, and whether it is punished by others.
-        print("Agent ",a.id," at (",a.xPosition,",",a.yPosition,").", sep="", end=" ")
-        print("Health: ",a.health,".", sep="", end=" ")
-        if a.pursuing:
-            print("Pursuing food at (",a.pursuing.xPosition,",",a.pursuing.yPosition,") with amount ",a.pursuing.amount,".", sep="")
-        elif a.consuming: 
-            print("Consuming food at (",a.consuming.xPosition,",",a.consuming.yPosition,") with amount ",a.consuming.amount,".", sep="", end=" ")
-            if (a.consuming.amount == 3): print("Got sick!", end=" ")
-            if (a.punished == True): print("Punished by others!")
-            else: print("")
-        else: print("")
+        print("Agent ",a.id," at (",a.xPosition,",",a.yPosition,").", sep="", end=" ", file=out)
+        print("Health: ",a.health,".", sep="", end=" ", file=out)
+        if a.pursuing >= 0:
+            f = foodList[a.pursuing]
+            print("Pursuing food at (",f.xPosition,",",f.yPosition,") with amount ",f.amount,".", sep="", file=out)
+        elif a.consuming >= 0: 
+            f = foodList[a.consuming]
+            print("Consuming food at (",f.xPosition,",",f.yPosition,") with amount ",f.amount,".", sep="", end=" ", file=out)
+            if (f.amount == 3): print("Got sick!", end=" ", file=out)
+            if (a.punished == True): print("Punished by others!", file=out)
+            else: print("", file=out)
+        else: print("", file=out)
         # Second line has the cognitive rules that the agent knows along with their corresponding weights.
-        print("Cognitive Knowledge: Rule1:", a.rules["rule1weight"], "|| Rule2:", a.rules["rule2weight"], "|| Rule3:", a.rules["rule3weight"], "|| Rule4:", a.rules["rule4weight"], "|| Rule5:", a.rules["rule5weight"])
+        print("Cognitive Knowledge: Rule1:", a.rule1weight, "|| Rule2:", a.rule2weight, "|| Rule3:", a.rule3weight, "|| Rule4:", a.rule4weight, "|| Rule5:", a.rule5weight, file=out)
         # Third line has the agent's social pressure value, the number of times the agent has been punished for 
         # eating 2 or 3 units of food, and the number of times the agent has become sick from 3 units of food.
-        print("Social Pressure:",a.socialPressure,"|| Punished 2 Food:", a.timesPunished2, "|| Punished 3 Food:", a.timesPunished3, "|| Sick 3 Food:", a.timesSick3)
+        print("Social Pressure:",a.socialPressure,"|| Punished 2 Food:", a.timesPunished2, "|| Punished 3 Food:", a.timesPunished3, "|| Sick 3 Food:", a.timesSick3, file=out)
         # Finally, the list of food that the agent is currently seeing along with their scores from the agent's
         # decision-making process. Take note that the agent does not automatically go for the highest scoring food. 
         # Rather, it chooses a positive scoring food at random.
         if a.seeing:
             for i in range(len(a.seeing)):
-                print("Seeing food at (",a.seeing[i].xPosition,",",a.seeing[i].yPosition,") with amount ",a.seeing[i].amount,". Decision P:",a.seeingScores[i][0], " E:",a.seeingScores[i][1], " C:",a.seeingScores[i][2], " S:",a.seeingScores[i][3], " Total Score:", a.seeingScores[i][4], ".",  sep="")   
-        print("\n")
+                print("Seeing food at (",a.seeing[i].xPosition,",",a.seeing[i].yPosition,") with amount ",a.seeing[i].amount,". Decision P:",a.seeingScores[i][0], " E:",a.seeingScores[i][1], " C:",a.seeingScores[i][2], " S:",a.seeingScores[i][3], " Total Score:", a.seeingScores[i][4], ".",  sep="", file=out)   
+        print("\n", file=out)
+    sys.stdout.write(out.getvalue())
 
-###########################################
-##       The main program function       ##
-###########################################
+#################################################################################################
+##       Parallel LOOK and DECIDE - All the agents look and score the food they see at once       ##
+#################################################################################################
+
+# The food of every run with DECIDE_WORKERS, by run number, as the workers see it: (food id, amount) by square
+# location. Food never moves, so this is given to every worker once, when the pool starts (see startDecideWorker),
+# and every step only sends which food is consumed.
+decideFood = {}
+decideLookups = {} # The decision score cache of every run in the workers (see decisionCache above), by run number.
+decideRuns = itertools.count() # The run numbers.
+
+def startDecideWorker(run, foodCells, cacheSize):
+    # Runs once in every worker thread or process when the pool of a run starts. Worker threads share the cache of
+    # the run itself, which is already there; every worker process makes its own.
+    decideFood[run] = foodCells
+    decideLookups.setdefault(run, decisionCache(cacheSize))
+
+def lookAndDecide(job):
+    # LOOK and DECIDE for a batch of agents. This runs in a worker thread or process, so it only reads what it is
+    # given: the run number, whether every food is consumed (one byte per food id), the range of vision, and for
+    # every agent its id, position, decision features (see decisionFeatures above), the state of its stream of
+    # random numbers and whether it scores the food it sees. Returns, for every agent, its id, the ids of the food
+    # it saw in shuffled order and their scores (both empty if it does not score them), the new counter of its
+    # stream of random numbers and the number of food it saw.
+    run, consumed, vision, agents = job
+    foodCells = decideFood[run]
+    lookup = decideLookups[run]
+    results = []
+    for id, x, y, features, key, counter, scoring in agents:
+        seeingList = []
+        for x2 in range(x-vision, x+vision+1):
+            for y2 in range(y-vision, y+vision+1):
+                f = foodCells.get((x2, y2))
+                if f is not None and not consumed[f[0]]:
+                    seeingList.append(f)
+        rng = randomStream(0, 0)
+        rng.key, rng.counter = key, counter
+        if scoring:
+            rng.shuffle(seeingList)
+            scores = decisionBatch([features] * len(seeingList), [amount for foodId, amount in seeingList], lookup)
+            results.append((id, [foodId for foodId, amount in seeingList], scores, rng.counter, len(seeingList)))
+        else:
+            # The same random numbers are skipped as in the step loop (see DECIDE there).
+            rng.skip(len(seeingList) - 1)
+            results.append((id, (), (), rng.counter, len(seeingList)))
+    return results
+
+def lookAndDecideAll(pool, workers, run, agentList, foodList, vision, scoreAll, profile=None):
+    # LOOK and DECIDE for all the agents at once, against the grid world as it is now, split into one batch per
+    # worker. Only the agents that are not pursuing food score it, or all of them if scoreAll is True. Every agent
+    # shuffles the food it sees with its own stream of random numbers, so the results are the same however the
+    # agents are split up. Returns, by agent id, the food seen by the agent, the scores and whether it may pick
+    # food to pursue in this step (only if it was not pursuing food at the start of the step).
+    consumed = bytes(f.consumed for f in foodList)
+    agentData = [(a.id, a.xPosition, a.yPosition, decisionFeatures(a), a.rng.key, a.rng.counter,
+                  scoreAll or a.pursuing < 0) for a in agentList]
+    jobs = [(run, consumed, vision, agentData[i::workers]) for i in range(workers)]
+    agentsById = {a.id: a for a in agentList}
+    decided = {}
+    for results in pool.map(lookAndDecide, jobs):
+        for id, seen, scores, counter, numberSeen in results:
+            agentsById[id].rng.counter = counter
+            decided[id] = ([foodList[foodId] for foodId in seen], scores, agentsById[id].pursuing < 0)
+            if profile:
+                profile.counters["foodSeen"] += numberSeen
+                profile.counters["decisions"] += len(seen)
+    if profile: profile.counters["cellsScanned"] += len(agentList) * (2*vision + 1) ** 2
+    return decided
+
+###############################################################
+##       The config class - The settings of one run       ##
+###############################################################
 
-def main():
+# The constant variables at the top that every run can have its own value for.
+CONFIG_NAMES = ("NUMBER_STEPS", "NUMBER_AGENTS", "SHOW_AGENT_INFO", "SHOW_AGENT_IDS", "AGENT_VISION", "AGENT_HEALTH",
+                "AGENT_METABOLISM", "AGENT_SOCIALPRESSURE", "NUMBER_FOOD", "SIM_AREA", "FOOD_REGROWTH",
+                "DECISION_CACHE_SIZE", "SEED", "LEGACY_DEATH_SKIP", "OUTPUT", "OUTPUT_EVERY", "RECORD_DATA_FRAMES",
+                "TRAJECTORY_FILE", "TRAJECTORY_ROW_GROUP", "CHECKPOINT_FILE", "CHECKPOINT_EVERY", "RESUME_FILE",
+                "PLOT_OUTPUT", "PLOT_PATH", "PLOT_WORKERS", "PROFILE", "PROFILE_FILE", "PROFILE_PER_STEP",
+                "DECIDE_WORKERS", "DECIDE_POOL")
+
+# The types of the settings that are None by default (None itself is always fine for them).
+OPTIONAL_TYPES = {"SEED": int, "SHOW_AGENT_IDS": list, "TRAJECTORY_FILE": str, "CHECKPOINT_FILE": str,
+                  "RESUME_FILE": str, "PROFILE_FILE": str, "PLOT_WORKERS": int}
+
+def rightType(value, default, name):
+    # Whether a setting can be changed to the value: it must be of the same type as the constant variable (a
+    # whole number is fine for a decimal one). Settings that are None by default must be None or of their type in
+    # OPTIONAL_TYPES, and a list must only hold whole numbers (agent ids).
+    if default is None:
+        kind = OPTIONAL_TYPES[name]
+        if value is None:
+            return True
+        if kind is list:
+            return isinstance(value, (list, tuple)) and all(rightType(v, 0, name) for v in value)
+        return rightType(value, kind(), name)
+    if isinstance(value, bool) or isinstance(default, bool):
+        return isinstance(value, bool) and isinstance(default, bool)
+    if isinstance(default, float):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+class config:
+    # Initialization of the config class: the values of the constant variables in CONFIG_NAMES, changed by the given
+    # ones, e.g. config(NUMBER_AGENTS=20, SIM_AREA=10). Every run has its own config, so that runs with different
+    # settings can be done in one program, even at the same time.
+    def __init__(self, **changes):
+        for name in CONFIG_NAMES:
+            setattr(self, name, globals()[name])
+        self.update(changes)
+
+    def update(self, changes):
+        # Changes the settings in the dictionary. Raises ValueError for a name that is not a setting, or a value
+        # of the wrong type.
+        for name, value in changes.items():
+            if name not in CONFIG_NAMES:
+                raise ValueError("Unknown setting: " + str(name) + ".")
+            if not rightType(value, globals()[name], name):
+                raise ValueError("Wrong value for " + name + ": " + repr(value) + ".")
+            setattr(self, name, value)
+
+    def asDict(self):
+        # The settings as a dictionary, e.g. for saving them with the results.
+        return {name: getattr(self, name) for name in CONFIG_NAMES}
+
+    def loadFile(self, fileName):
+        # Changes the settings in a JSON config file, which has some of the names in CONFIG_NAMES, e.g.
+        # {"NUMBER_AGENTS": 20, "OUTPUT": "off", "PLOT_OUTPUT": "pdf"}.
+        with open(fileName) as f:
+            changes = json.load(f)
+        if not isinstance(changes, dict):
+            raise ValueError("The config file " + fileName + " must hold a JSON object.")
+        self.update(changes)
+
+#########################################
+##       The simulation function       ##
+#########################################
+
+def runSimulation(resumeFile=None, seed=None, profile=None, settings=None, decisionLookup=None):
+    # Runs the simulation for NUMBER_STEPS steps and returns the Pandas Data Frames with the data of every agent.
+    # The settings are those of the given config (see the config class above), or the constant variables at the
+    # top if there is none.
+    # If resumeFile is given, the simulation continues from that snapshot (see the snapshot functions above) instead
+    # of starting with a new grid world. If seed is also given, the agents get new streams of random numbers from
+    # it after loading, so that many different runs can be started from the same snapshot. If profile is given (see
+    # the profiler class above), the time spent in every phase of the step loop is added to it. If decisionLookup is
+    # given (see decisionCache above), the run uses that decision score cache instead of a new one, so that its hits
+    # and misses can be looked at afterwards.
+    if settings is None: settings = config()
+    # The decision score cache of this run (see decisionCache above).
+    if decisionLookup is None: decisionLookup = decisionCache(settings.DECISION_CACHE_SIZE)
     # The agents and food are contained in their own lists.
     agentList = []
     foodList = []
+    # The grid index for the agents and food (see the grid index functions above).
+    agentGrid = {}
+    foodGrid = {}
+    # The consumed food, keyed on the step at which it regrows (see the regrowth schedule functions above).
+    regrowthSchedule = {}
+    # The agents pursuing every food (see the pursuit index functions above).
+    pursuers = {}
+    startStep = 0 # The step to start from, which is not 0 when continuing from a snapshot.
+    numberAgents = settings.NUMBER_AGENTS # The number of agents at the start of the run.
+    recorded = None
+    trajectoryPart = 0 # The part of the trajectory file to start with (see TRAJECTORY_FILE above).
 
-    # Create agents and place them randomly in the grid world.
-    for a in range(NUMBER_AGENTS):
-        # Create a new agent with a random position.
-        newAgent = agent(a, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1))
-        # Check if this agent is on the same position as another agent. If yes, then re-create agent with a new 
-        # random position. If it is alone, then append the agent to the agent list.
-        anotherAgentHere = True
-        while anotherAgentHere:
-            if any (a2.xPosition == newAgent.xPosition and a2.yPosition == newAgent.yPosition for a2 in agentList):
-                anotherAgentHere = True
-                newAgent = agent(a, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1))
-            else:
-                anotherAgentHere = False
-                agentList.append(newAgent)
-
-    # Create food and place them randomly in the grid world.
-    for f in range(NUMBER_FOOD):
-        # Create new food with a random position.
-        newFood = food(f, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1), random.randint(1,3))
-        # Check if food is on the same position with other food. If yes, then re-create food with a new random 
-        # position. If it is alone, then append the food to the food list.
-        anotherFoodHere = True
-        while anotherFoodHere:
-            if any (f2.xPosition == newFood.xPosition and f2.yPosition == newFood.yPosition for f2 in foodList):
-                anotherFoodHere = True
-                newFood = food(f, random.randint(0, SIM_AREA-1), random.randint(0,SIM_AREA-1), random.randint(1,3))
-            else:
-                anotherFoodHere = False
-                foodList.append(newFood)
-
-    # Draw the the grid world and the information panel (see the draw function above).
-    draw(agentList,foodList, 0) # 0 here means step zero.
-    
-    # Create empty Pandas Data Frames for later plotting of results.
-    DataFrameList = {}
-    for c in range(NUMBER_AGENTS):
-        DataFrameList[c] = pandas.DataFrame(columns=["Food", "P", "E", "C", "S", "D", "R1", "R2", "R3", "R4", "R5"])
-        DataFrameList[c] = DataFrameList[c].append(pandas.Series([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0], index=DataFrameList[c].columns), ignore_index=True)
+    if resumeFile:
+        # Continue from the snapshot, and put the agents and food in the grid index, the pursuit index and the
+        # regrowth schedule.
+        startStep, agentList, foodList, numberAgents, recorded, trajectoryPart = loadSnapshot(resumeFile)
+        trajectoryPart = max(trajectoryPart, 0)
+        for a in agentList:
+            addToGrid(agentGrid, a)
+            if a.pursuing >= 0:
+                pursue(pursuers, a, a.pursuing)
+        for f in foodList:
+            foodGrid[(f.xPosition, f.yPosition)] = f
+            if f.consumed:
+                regrowthSchedule.setdefault(f.regrowStep, []).append(f)
+        if seed is not None:
+            for a in agentList:
+                a.rng = randomStream(seed, a.id + 1)
+        if outputDue(startStep, settings): draw(agentList, foodList, startStep, agentGrid, foodGrid, settings)
+    else:
+        # The streams of random numbers come from SEED, or from a new seed if there is none.
+        runSeed = settings.SEED if settings.SEED is not None else random.getrandbits(64)
+        print("Random seed:", runSeed)
+        worldRandom = randomStream(runSeed, 0)
+
+        # Create agents and place them randomly in the grid world, each on its own square location.
+        for a, (x, y) in enumerate(randomCells(worldRandom, settings.NUMBER_AGENTS, settings.SIM_AREA)):
+            newAgent = agent(a, x, y, settings.AGENT_HEALTH)
+            newAgent.rng = randomStream(runSeed, newAgent.id + 1)
+            agentList.append(newAgent)
+            addToGrid(agentGrid, newAgent)
+
+        # Create food and place them randomly in the grid world, each on its own square location.
+        for f, (x, y) in enumerate(randomCells(worldRandom, settings.NUMBER_FOOD, settings.SIM_AREA)):
+            newFood = food(f, x, y, worldRandom.randint(1,3))
+            foodList.append(newFood)
+            foodGrid[(x, y)] = newFood
+
+        # Draw the the grid world and the information panel (see the draw function above).
+        if outputDue(0, settings): draw(agentList,foodList, 0, agentGrid, foodGrid, settings) # 0 here means step zero.
+
+    # Create the recorder for the data of every agent, to be turned into Pandas Data Frames for later plotting,
+    # and the writer for the trajectory file (see RECORD_DATA_FRAMES and TRAJECTORY_FILE above).
+    data = None
+    if settings.RECORD_DATA_FRAMES:
+        data = recorder(numberAgents, settings.NUMBER_STEPS)
+        if recorded is not None: # Put back the data recorded before the snapshot.
+            recordedSteps = min(recorded.shape[1], settings.NUMBER_STEPS+1)
+            data.data[:, :recordedSteps] = recorded[:, :recordedSteps]
+    trajectory = None
+    if settings.TRAJECTORY_FILE:
+        trajectory = trajectoryWriter(settings.TRAJECTORY_FILE, settings.TRAJECTORY_ROW_GROUP, trajectoryPart)
+        if not resumeFile:
+            trajectory.record(0, agentList)
+
+    # The worker threads or processes for LOOK and DECIDE (see DECIDE_WORKERS above).
+    # Every worker gets the food of the run once, when it starts (see startDecideWorker above).
+    pool = None
+    if settings.DECIDE_WORKERS > 0:
+        decideRun = next(decideRuns)
+        foodCells = {(f.xPosition, f.yPosition): (f.id, f.amount) for f in foodList}
+        workerStart = (decideRun, foodCells, settings.DECISION_CACHE_SIZE)
+        decideLookups[decideRun] = decisionLookup
+        if settings.DECIDE_POOL == "thread":
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=settings.DECIDE_WORKERS,
+                                                         initializer=startDecideWorker, initargs=workerStart)
+        elif settings.DECIDE_POOL == "process":
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=settings.DECIDE_WORKERS,
+                                                          initializer=startDecideWorker, initargs=workerStart)
+        else:
+            raise ValueError("DECIDE_POOL must be \"thread\" or \"process\", not " + repr(settings.DECIDE_POOL) + ".")
 
 ###################################################################################
 ##       The main program loop. This is where a lot of the action happens.       ##
 ###################################################################################
 
-    for steps in range(NUMBER_STEPS): # Continue the loop up to the desired number of steps (see above).
+    if profile: loopStart = time.perf_counter()
+    try:
+        for steps in range(startStep, settings.NUMBER_STEPS): # Continue the loop up to the desired number of steps (see above).
+            if profile: t = time.perf_counter()
 
-        # Regrow food in empty food patches according to constant variable FOOD_REGROWTH (see above).
-        for f in foodList:
-            if f.consumed:
-                f.regrowthTimer -= 1
-                if (f.regrowthTimer <= 0):
-                    f.regrowthTimer = FOOD_REGROWTH
-                    f.consumed = False
-
-        # Agents are going to do several things every step:
-        # 1. MOVE - The agent will either move around randomly or move towards food.
-        # 2. LOOK - The agent will look around within its range of vision (AGENT_VISION) and note all the food
-        #           that is sees.   
-        # 3. DECIDE - The agent will perform a decision-making process for every food that it sees.
-        # 4. CONSUME - If the agent is on top of the food that it wants, then it consumes it.
-        # 5. METABOLIZE - The agent loses health according to the constant variable AGENT_METABOLISM.
-        for a in agentList:      
-
-            # MOVE - If the agent is pursuing food, then it moves closer to that food. 
-            # If not, then the agent moves around randomly.
-            while True:
-                if a.pursuing: # If pursuing food, make the agent's prospective coordinate position (tempx, tempy)
-                               # closer to the pursued food. 
-                    if (a.xPosition > a.pursuing.xPosition): tempx = a.xPosition - 1
-                    elif (a.xPosition < a.pursuing.xPosition): tempx = a.xPosition + 1
-                    else: tempx = a.xPosition
-                    if (a.yPosition > a.pursuing.yPosition): tempy = a.yPosition - 1
-                    elif (a.yPosition < a.pursuing.yPosition): tempy = a.yPosition + 1
-                    else: tempy = a.yPosition             
-                elif a.consuming: # If on top of pursued food, prospectively stay in current position 
-                                  # to consume this food.
-                    tempx = a.xPosition
-                    tempy = a.yPosition  
-                else: # If neither pursuing nor consuming, prospectively move to a random nearby position 
-                      # or stay in place.
-                    tempx = a.xPosition + random.randint(-1, 1)
-                    tempy = a.yPosition + random.randint(-1, 1)   
-                # This grid world has closed edges. Bring back the agent if, according to its 
-                # prospective coordinates (tempx, tempy), it falls over the edge.
-                if tempx == -1: tempx = 0
-                if tempx == SIM_AREA: tempx = SIM_AREA - 1
-                if tempy == -1: tempy = 0
-                if tempy == SIM_AREA: tempy = SIM_AREA - 1
-                    
-                # To keep things simple, a rule is that no two agents can occupy the same place.
-                # In case another agent is blocking the agent's prospective path, the agent will move to random
-                # empty space.
-                if any (a2.xPosition == tempx and a2.yPosition == tempy for a2 in agentList): 
-                    while any (a2.xPosition == tempx and a2.yPosition == tempy for a2 in agentList):
-                        tempx = a.xPosition + random.randint(-1, 1)
-                        tempy = a.yPosition + random.randint(-1, 1)   
-                    # Again a check for going off the edge.
+            # Regrow food in empty food patches according to constant variable FOOD_REGROWTH (see above).
+            regrowFood(regrowthSchedule, steps)
+            if profile: t = profile.lap("REGROW", t)
+
+            # Agents are going to do several things every step:
+            # 1. MOVE - The agent will either move around randomly or move towards food.
+            # 2. LOOK - The agent will look around within its range of vision (AGENT_VISION) and note all the food
+            #           that is sees.   
+            # 3. DECIDE - The agent will perform a decision-making process for every food that it sees.
+            # 4. CONSUME - If the agent is on top of the food that it wants, then it consumes it.
+            # 5. METABOLIZE - The agent loses health according to the constant variable AGENT_METABOLISM.
+            # Agents that die stay in the agent list until every agent has had its turn, and are then removed all at
+            # once (see LEGACY_DEATH_SKIP above for the old behaviour).
+            # With DECIDE_WORKERS (see above), all the agents LOOK and DECIDE first, at the same time.
+            drawing = outputDue(steps+1, settings) # Whether this step is printed (see OUTPUT above).
+            decided = None
+            if pool:
+                decided = lookAndDecideAll(pool, settings.DECIDE_WORKERS, decideRun, agentList, foodList,
+                                           settings.AGENT_VISION, drawing, profile)
+                if profile: t = profile.lap("DECIDE", t)
+
+            skipNext = False
+            livingBefore = 0 # The number of agents before this one in the agent list that are still alive.
+            for a in agentList:      
+                if skipNext: # Only with LEGACY_DEATH_SKIP: the agent after one that died misses its turn.
+                    skipNext = False
+                    livingBefore += 1
+                    continue
+
+                # MOVE - If the agent is pursuing food, then it moves closer to that food. 
+                # If not, then the agent moves around randomly.
+                while True:
+                    if a.pursuing >= 0: # If pursuing food, make the agent's prospective coordinate position (tempx, tempy)
+                                        # closer to the pursued food. 
+                        f = foodList[a.pursuing]
+                        if (a.xPosition > f.xPosition): tempx = a.xPosition - 1
+                        elif (a.xPosition < f.xPosition): tempx = a.xPosition + 1
+                        else: tempx = a.xPosition
+                        if (a.yPosition > f.yPosition): tempy = a.yPosition - 1
+                        elif (a.yPosition < f.yPosition): tempy = a.yPosition + 1
+                        else: tempy = a.yPosition             
+                    elif a.consuming >= 0: # If on top of pursued food, prospectively stay in current position 
+                                           # to consume this food.
+                        tempx = a.xPosition
+                        tempy = a.yPosition  
+                    else: # If neither pursuing nor consuming, prospectively move to a random nearby position 
+                          # or stay in place.
+                        tempx = a.xPosition + a.rng.randint(-1, 1)
+                        tempy = a.yPosition + a.rng.randint(-1, 1)   
+                    # This grid world has closed edges. Bring back the agent if, according to its 
+                    # prospective coordinates (tempx, tempy), it falls over the edge.
                     if tempx == -1: tempx = 0
-                    if tempx == SIM_AREA: tempx = SIM_AREA - 1
+                    if tempx == settings.SIM_AREA: tempx = settings.SIM_AREA - 1
                     if tempy == -1: tempy = 0
-                    if tempy == SIM_AREA: tempy = SIM_AREA - 1
-                    # Change the position.
-                    a.xPosition = tempx
-                    a.yPosition = tempy
-                    break
-                else:
-                    # If everything is good, then the agent will move to the prospective coordinate position.
-                    a.xPosition = tempx
-                    a.yPosition = tempy
-                    break
-            
-            # LOOK - The agent looks at all the food within its range of vision and places them in a list.
-            seeingList = []
-            for x in range(a.xPosition-AGENT_VISION, a.xPosition+AGENT_VISION+1):
-                for y in range(a.yPosition-AGENT_VISION, a.yPosition+AGENT_VISION+1):
-                    for f in foodList:
-                        if (f.xPosition == x and f.yPosition == y and f.consumed == False):
-                            seeingList.append(f) 
-
-            # DECIDE - The agent uses a decision-making process on all the food it sees.                     
-            # First, we shuffle the list of food seen so that the agent doesn't always start with
-            # the food at the top left corner of the screen.
-            random.shuffle(seeingList)
-            a.seeing = seeingList
-            # Then the decision-making scores for all the food in the list is put in another list.
-            a.seeingScores = []
-            for i in range(len(a.seeing)):
-                a.seeingScores.append(decision(a, a.seeing[i]))               
-            # If the agent is not currently pursuing food, then it pursues the first food in its list 
-            # with a positive decision score.
-            if not a.pursuing:
-                a.consuming = [] # This removes the agent's last indiciated consumed food
-                                 # because it will try to consume a new one.
-                a.punished = False # This removes the agent's last punishment marker, if any.
-                for i in range(len(a.seeing)):
-                    if (a.seeingScores[i][4] > 0): # If the decision score is positive...
-                        a.pursuing = a.seeing[i]   # Then the agent pursues the food.
+                    if tempy == settings.SIM_AREA: tempy = settings.SIM_AREA - 1
+                    
+                    # To keep things simple, a rule is that no two agents can occupy the same place.
+                    # In case another agent is blocking the agent's prospective path, the agent will move to random
+                    # empty space.
+                    if (tempx, tempy) in agentGrid: 
+                        if profile: profile.counters["blockedMoves"] += 1
+                        # The agent picks one of the nearby positions without an agent (its own position has one), as
+                        # before, but from the list of those positions instead of trying random positions until one is
+                        # empty. If all of them are taken, the agent stays in place. Positions over the edge count as
+                        # empty, and the agent is brought back below.
+                        freeNearby = [(a.xPosition + dx, a.yPosition + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                                      if (a.xPosition + dx, a.yPosition + dy) not in agentGrid]
+                        if freeNearby:
+                            tempx, tempy = freeNearby[a.rng.randint(0, len(freeNearby) - 1)]
+                        else:
+                            tempx, tempy = a.xPosition, a.yPosition
+                        # Again a check for going off the edge.
+                        if tempx == -1: tempx = 0
+                        if tempx == settings.SIM_AREA: tempx = settings.SIM_AREA - 1
+                        if tempy == -1: tempy = 0
+                        if tempy == settings.SIM_AREA: tempy = settings.SIM_AREA - 1
+                        # Change the position.
+                        moveInGrid(agentGrid, a, tempx, tempy)
+                        break
+                    else:
+                        # If everything is good, then the agent will move to the prospective coordinate position.
+                        moveInGrid(agentGrid, a, tempx, tempy)
                         break
+            
+                if profile: t = profile.lap("MOVE", t)
 
-            # CONSUME - If the agent is pursuing food and is on top of it, then the agent consumes the food.
-            # The agent might be punished by others or get sick from the consumption. All information is updated.
-            if (a.pursuing and a.xPosition == a.pursuing.xPosition and a.yPosition == a.pursuing.yPosition):
-                for f in foodList:
-                    if (f.xPosition == a.xPosition and f.yPosition == a.yPosition):
-                        
-                        # The agent consumes the food (the food disappears).
-                        f.consumed = True
-                        a.consuming = a.pursuing
-                        # This is new; its for consumption data for the Data Frame. It gets the data prior to consumption.
-                        a.consumingData = [] # Clear the previous contents.
-                        a.consumingData.append(a.consuming.amount)
-                        a.consumingData += list(decision(a,a.consuming))
-                        a.consumingData += list([a.rules["rule1weight"],a.rules["rule2weight"],a.rules["rule3weight"],a.rules["rule4weight"],a.rules["rule5weight"]])
+                if decided is None:
+                    mayPursue = True
+                    # LOOK - The agent looks at all the food within its range of vision and places them in a list.
+                    seeingList = []
+                    for x in range(a.xPosition-settings.AGENT_VISION, a.xPosition+settings.AGENT_VISION+1):
+                        for y in range(a.yPosition-settings.AGENT_VISION, a.yPosition+settings.AGENT_VISION+1):
+                            f = foodGrid.get((x, y))
+                            if (f is not None and f.consumed == False):
+                                seeingList.append(f) 
+                    if profile:
+                        profile.counters["cellsScanned"] += (2*settings.AGENT_VISION + 1) ** 2
+                        profile.counters["foodSeen"] += len(seeingList)
+
+                    if profile: t = profile.lap("LOOK", t)
+
+                    # DECIDE - The agent uses a decision-making process on all the food it sees.                     
+                    # An agent that is already pursuing food only needs the scores for the information panel, so they are
+                    # only worked out if the agent will be in it (see OUTPUT above). The random numbers of the shuffle are
+                    # skipped instead, so that the rest of the run is the same either way.
+                    if a.pursuing >= 0 and not (drawing and shownInPanel(a, livingBefore, settings)):
+                        a.rng.skip(len(seeingList) - 1)
+                        a.seeing = a.seeingScores = ()
+                    else:
+                        # First, we shuffle the list of food seen so that the agent doesn't always start with
+                        # the food at the top left corner of the screen.
+                        a.rng.shuffle(seeingList)
+                        a.seeing = seeingList
+                        # Then the decision-making scores for all the food in the list is put in another list.
+                        a.seeingScores = decisionBatch([decisionFeatures(a)] * len(a.seeing), [f.amount for f in a.seeing],
+                                                       decisionLookup)
+                        if profile: profile.counters["decisions"] += len(a.seeing)
+                else:
+                    # LOOK and DECIDE were done for every agent at the start of the step (see DECIDE_WORKERS above).
+                    # An agent that was pursuing food at the start of the step waits for the next step to pick new food.
+                    a.seeing, a.seeingScores, mayPursue = decided[a.id]
+                # If the agent is not currently pursuing food, then it pursues the first food in its list 
+                # with a positive decision score.
+                if a.pursuing < 0:
+                    a.consuming = -1 # This removes the agent's last indiciated consumed food
+                                     # because it will try to consume a new one.
+                    a.punished = False # This removes the agent's last punishment marker, if any.
+                    for i in range(len(a.seeing) if mayPursue else 0):
+                        # If the decision score is positive (and, when the food was seen at the start of the step, no
+                        # agent has consumed it since)...
+                        if (a.seeingScores[i][4] > 0 and a.seeing[i].consumed == False):
+                            pursue(pursuers, a, a.seeing[i].id) # Then the agent pursues the food.
+                            break
+
+                if profile: t = profile.lap("DECIDE", t)
+
+                # CONSUME - If the agent is pursuing food and is on top of it, then the agent consumes the food.
+                # The agent might be punished by others or get sick from the consumption. All information is updated.
+                if (a.pursuing >= 0 and a.xPosition == foodList[a.pursuing].xPosition and a.yPosition == foodList[a.pursuing].yPosition):
+                    f = foodList[a.pursuing] # The food under the agent.
+                
+                    # The agent consumes the food (the food disappears until it regrows).
+                    f.consumed = True
+                    scheduleRegrowth(regrowthSchedule, f, steps, settings.FOOD_REGROWTH)
+                    a.consuming = a.pursuing
+                    # This is new; its for consumption data for the Data Frame. It gets the data prior to consumption.
+                    a.consumingData = [] # Clear the previous contents.
+                    a.consumingData.append(f.amount)
+                    if f in a.seeing: # Already scored in DECIDE.
+                        a.consumingData += list(a.seeingScores[a.seeing.index(f)])
+                    else:
+                        a.consumingData += list(decisionBatch([decisionFeatures(a)], [f.amount], decisionLookup)[0])
+                        if profile: profile.counters["decisions"] += 1
+                    a.consumingData += list([a.rule1weight,a.rule2weight,a.rule3weight,a.rule4weight,a.rule5weight])
+                
+                    # The agent's health is updated. 
+                    if (f.amount == 1 or f.amount == 2): a.health += f.amount # Agent gains health.
+                    elif (f.amount == 3): a.health -= 1 # Agent gets sick and loses health.
+                    
+                    # If applicable, increases the number of times the agent has gotten sick from eating 3 food.
+                    if (f.amount == 3): a.timesSick3 += 1
+                    
+                    # Depending on what food was consumed, upates the weight of a corresponding rule 
+                    # (rules 1, 2 or 4). The weights of the two other rules will be updated in the next code.
+                    if (f.amount == 1): 
+                        a.rule1weight += 1
+                    elif (f.amount == 2):
+                        a.rule2weight += 1
+                    elif (f.amount == 3):
+                        a.rule4weight += 1
+                    
+                    # Checks if the agent was seen by other agents consuming the food.
+                    # If so, then there was an "interaction" and the agent's social pressure increases.
+                    # Also, if applicable, the weights of rules 3 and 5 get updated.
+                    # Is there any agent within the agent's range of vision? 
+                    if anotherAgentInSight(agentGrid, a, settings.AGENT_VISION):
+                        a.socialPressure += settings.AGENT_SOCIALPRESSURE
+                        a.socialPressure = round(a.socialPressure, 1) # Round to 1 decimal point.
+                                                                      # Just to avoid trailing zeroes.
+                        # Rules 3 and 5 get updated here because they depend on punishment by others.
+                        if (f.amount == 2): 
+                            a.timesPunished2 += 1
+                            a.punished = True
+                            a.rule3weight += 1
+                        if (f.amount == 3): 
+                            a.timesPunished3 += 1
+                            a.punished = True
+                            a.rule5weight += 1
                         
-                        # The agent's health is updated. 
-                        if (f.amount == 1 or f.amount == 2): a.health += f.amount # Agent gains health.
-                        elif (f.amount == 3): a.health -= 1 # Agent gets sick and loses health.
-                            
-                        # If applicable, increases the number of times the agent has gotten sick from eating 3 food.
-                        if (f.amount == 3): a.timesSick3 += 1
-                            
-                        # Depending on what food was consumed, upates the weight of a corresponding rule 
-                        # (rules 1, 2 or 4). The weights of the two other rules will be updated in the next code.
-                        if (f.amount == 1): 
-                            a.rules["rule1"] = True
-                            a.rules["rule1weight"] += 1
-                        elif (f.amount == 2):
-                            a.rules["rule2"] = True
-                            a.rules["rule2weight"] += 1
-                        elif (f.amount == 3):
-                            a.rules["rule4"] = True
-                            a.rules["rule4weight"] += 1
-                            
-                        # Checks if the agent was seen by other agents consuming the food.
-                        # If so, then there was an "interaction" and the agent's social pressure increases.
-                        # Also, if applicable, the weights of rules 3 and 5 get updated.
-                        tempAgentList = agentList.copy()
-                        tempAgentList.remove(a)
-                        # Is there any agent within the agent's range of vision? 
-                        if any (abs(ta.xPosition - a.xPosition) <= AGENT_VISION and abs(ta.yPosition - a.yPosition) <= AGENT_VISION for ta in tempAgentList):
-                            a.socialPressure += AGENT_SOCIALPRESSURE
-                            a.socialPressure = round(a.socialPressure, 1) # Round to 1 decimal point.
-                                                                          # Just to avoid trailing zeroes.
-                            # Rules 3 and 5 get updated here because they depend on punishment by others.
-                            if (f.amount == 2): 
-                                a.timesPunished2 += 1
-                                a.punished = True
-                                a.rules["rule3"] = True
-                                a.rules["rule3weight"] += 1
-                            if (f.amount == 3): 
-                                a.timesPunished3 += 1
-                                a.punished = True
-                                a.rules["rule5"] = True
-                                a.rules["rule5weight"] += 1
-                                
-                        # All other agents who were pursuing the same food should stop 
-                        # because the food has been consumed.
-                        for a2 in agentList:
-                            if a2.pursuing:
-                                if (a2.pursuing.xPosition == f.xPosition and a2.pursuing.yPosition == f.yPosition):
-                                    a2.pursuing = []
-
-            # METABOLIZE - The agent loses health according to AGENT_METABOLISM. 
-            # If its health is 0 or less, it dies.
-            a.health -= AGENT_METABOLISM
-            a.health = round(a.health, 1) # Just to avoid trailing zeroes.
-            if (a.health <= 0):
-                agentList.remove(a)
-
-        # Draw the new state of the gird world and information panel.
-        draw(agentList,foodList,steps+1) # Start from step 1 because we already did step 0 above.
+                    # All other agents who were pursuing the same food should stop 
+                    # because the food has been consumed.
+                    if profile: profile.counters["pursuitsCancelled"] += len(pursuers[f.id]) - 1
+                    foodGone(pursuers, f)
+
+                if profile: t = profile.lap("CONSUME", t)
+
+                # METABOLIZE - The agent loses health according to AGENT_METABOLISM. 
+                # If its health is 0 or less, it dies.
+                a.health -= settings.AGENT_METABOLISM
+                a.health = round(a.health, 1) # Just to avoid trailing zeroes.
+                if (a.health <= 0):
+                    if profile: profile.counters["deaths"] += 1
+                    removeFromGrid(agentGrid, a)
+                    stopPursuing(pursuers, a)
+                    skipNext = settings.LEGACY_DEATH_SKIP
+                else:
+                    livingBefore += 1
+                if profile: t = profile.lap("METABOLIZE", t)
+
+            # Remove the dead agents from the agent list.
+            agentList = [a for a in agentList if a.health > 0]
+            if profile: t = profile.lap("METABOLIZE", t)
+
+            # Draw the new state of the gird world and information panel.
+            if drawing: draw(agentList,foodList,steps+1, agentGrid, foodGrid, settings) # Start from step 1 because we already did step 0 above.
         
             
-        # Input values into the Pandas Data Frames.
-        for c in range(NUMBER_AGENTS):
-            if any (a2.id == c for a2 in agentList): # This is to check if the agent with id == c is still alive.
-                for a3 in agentList:
-                    if (a3.id == c):                                  
-                        if a3.consuming: # Check if this living agent has just consumed food.
-                            # Get the consuming data and add to the data frame.
-                            DataFrameList[c].loc[len(DataFrameList[c])] = a3.consumingData 
-                        elif not a3.consuming:
-                            # If not consuming then all the entries are 0.
-                            DataFrameList[c].loc[len(DataFrameList[c])] = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-            # If the agent is dead (we can't find its id in the agent list because it has been removed),
-            # then all the entries are -1.
-            else:
-                DataFrameList[c].loc[len(DataFrameList[c])] = [-1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1]
-         
-                        
+            # Record the data of this step (see the recorder class above).
+            if data: data.record(steps+1, agentList)
+            if trajectory: trajectory.record(steps+1, agentList)
+
+            # Save a snapshot every CHECKPOINT_EVERY steps (see CHECKPOINT_FILE above).
+            if settings.CHECKPOINT_FILE and (steps+1) % settings.CHECKPOINT_EVERY == 0:
+                if trajectory: trajectory.nextPart()
+                saveSnapshot(settings.CHECKPOINT_FILE, steps+1, agentList, foodList, numberAgents, data,
+                             trajectory.part if trajectory else -1)
+            if profile:
+                profile.lap("OUTPUT", t)
+                profile.endStep(steps+1)
+        if profile: profile.loopTime += time.perf_counter() - loopStart
+    finally:
+        # The worker threads or processes are stopped however the loop ends, also when a phase raises an error.
+        if pool:
+            pool.shutdown()
+            decideFood.pop(decideRun, None)
+            decideLookups.pop(decideRun, None)
+    if trajectory: trajectory.close()
+
+    # How often the decision score cache (see decisionCache above) already had the scores in this run. The lookups
+    # done in worker processes (see DECIDE_POOL above) are in their own caches and are not counted.
+    if settings.OUTPUT != "off":
+        cacheInfo = decisionCacheInfo(decisionLookup)
+        print("\nDecision cache: ", cacheInfo["hits"], " hits, ", cacheInfo["misses"], " misses, ",
+              round(cacheInfo["hitRate"] * 100, 1), "% hit rate, ", cacheInfo["size"], " of ", cacheInfo["maxSize"],
+              " scores kept.", sep="")
+
+    if data: return data.dataFrames()
+
 #####################################################################################
 #       After the whole program loop is done, we plot the resulting data here       #            
 #####################################################################################
 
-    for c in range(NUMBER_AGENTS):
+def consumptionChart(fig, dfChart):
+    # Draws the bar chart of the P, E, C and S scores of the food consumption in dfChart on the figure.
+    import numpy
+    x = numpy.arange(len(dfChart['Food']))  # The label locations.
+    width = 0.2  # The width of the bars.
+    # The 0 scores become small bars so that they can be seen in the plots. Only the plotted scores are changed;
+    # the labels below use the whole numbers of dfChart.
+    scores = dfChart[['P', 'E', 'C', 'S']].astype(float)
+    scores[scores == 0] = 0.03
+
+    ax = fig.subplots()
+    rects1 = ax.bar(x - (width + width/2), scores['P'], width, label='P', color='C3')
+    rects2 = ax.bar(x - width/2, scores['E'], width, label='E', color='C2')
+    rects3 = ax.bar(x + width/2, scores['C'], width, label='C', color='C0')
+    rects4 = ax.bar(x + (width + width/2), scores['S'], width, label='S', color='C1')
+
+    # Add some text for labels, title and custom x-axis tick labels, etc.
+    ax.set_ylabel('Component Scores')
+    ax.set_title('Agent Food Consumption')
+    ax.set_xticks(x)
+
+    # The x axis will have "food amount (total decision score)."
+    ax.set_xticklabels(dfChart["Food"].map(str) + "(" + dfChart["D"].map(str) + ")")
+    ax.set_xlabel('Food Amount (Total Decision Score)')
+    ax.legend()
+
+def saveCharts(job):
+    # Draws the charts of one agent without any window and saves every chart to its own file (see PLOT_OUTPUT
+    # above). This runs in a worker process.
+    c, charts, output, path = job
+    import matplotlib.figure # Figures that are not shown in a window do not need pyplot.
+    for name, dfChart in charts:
+        fig = matplotlib.figure.Figure(layout="tight")
+        consumptionChart(fig, dfChart)
+        fig.savefig(os.path.join(path, "agent" + str(c) + "_" + name + "." + output))
+
+def plotResults(DataFrameList, output=None, path=None, workers=None):
+    # Prints the Data Frame of every agent and plots its food consumption. The output, path and number of worker
+    # processes are PLOT_OUTPUT, PLOT_PATH and PLOT_WORKERS (see above) unless given.
+    output = output or PLOT_OUTPUT
+    path = path or PLOT_PATH
+    workers = workers or PLOT_WORKERS or os.cpu_count()
+    if output not in ("show", "png", "svg", "pdf"):
+        raise ValueError("The plot output must be \"show\", \"png\", \"svg\" or \"pdf\", not " + repr(output) + ".")
+    jobs = []
+    for c in range(len(DataFrameList)):
         print("\nAgent "+str(c)+":")
         print(DataFrameList[c]) # Print the data frame.
         
@@ -467,115 +1344,89 @@ def main():
         dfAll = df.loc[(df['Food'] > 0)]
         print("\nFilter food consumption:")
         print (dfAll)
-        dfAll[dfAll==0] = 0.03
-        
-        # Only plot if the data frame is not empty.
-        if not dfAll.empty:          
-            print("All food consumption:")
-            x = numpy.arange(len(dfAll['Food']))  # The label locations.
-            width = 0.2  # The width of the bars.
-
-            fig, ax = plt.subplots()
-            rects1 = ax.bar(x - (width + width/2), dfAll['P'], width, label='P', color='C3')
-            rects2 = ax.bar(x - width/2, dfAll['E'], width, label='E', color='C2')
-            rects3 = ax.bar(x + width/2, dfAll['C'], width, label='C', color='C0')
-            rects4 = ax.bar(x + (width + width/2), dfAll['S'], width, label='S', color='C1')
-
-            # Add some text for labels, title and custom x-axis tick labels, etc.
-            ax.set_ylabel('Component Scores')
-            ax.set_title('Agent Food Consumption')
-            ax.set_xticks(x)
-         
-            # The x axis will have "food amount (total decision score)."
-            dfAll["Combined"] = dfAll["Food"].map(str) + "(" + dfAll["D"].map(str) + ")"
-
-            ax.set_xticklabels(dfAll['Combined'])
-            ax.set_xlabel('Food Amount (Total Decision Score)')
-            ax.legend()
-            fig.tight_layout()
-            plt.show()   
-            
 
-        # Now let's create separate plots for 1, 2, 3 food...
-        df1 = dfAll.loc[(dfAll['Food'] == 1)]   
-        df2 = dfAll.loc[(dfAll['Food'] == 2)] 
-        df3 = dfAll.loc[(dfAll['Food'] == 3)] 
-        
-        if not df1.empty:
-            print("1 unit food consumption:")
-            x = numpy.arange(len(df1['Food']))  # The label locations.
-            width = 0.2  # The width of the bars.
-
-            fig, ax = plt.subplots()
-            rects1 = ax.bar(x - (width + width/2), df1['P'], width, label='P', color='C3')
-            rects2 = ax.bar(x - width/2, df1['E'], width, label='E', color='C2')
-            rects3 = ax.bar(x + width/2, df1['C'], width, label='C', color='C0')
-            rects4 = ax.bar(x + (width + width/2), df1['S'], width, label='S', color='C1')
-
-            # Add some text for labels, title and custom x-axis tick labels, etc.
-            ax.set_ylabel('Component Scores')
-            ax.set_title('Agent Food Consumption')
-            ax.set_xticks(x)
-            
-            # The x axis will have "food amount (total decision score)."
-            df1["Combined"] = df1["Food"].map(str) + "(" + df1["D"].map(str) + ")"
-
-            ax.set_xticklabels(df1['Combined'])
-            ax.set_xlabel('Food Amount (Total Decision Score)')
-            ax.legend()
-            fig.tight_layout()
-            plt.show()      
-
-        if not df2.empty:
-            print("2 unit food consumption:")
-            x = numpy.arange(len(df2['Food']))  # The label locations.
-            width = 0.2  # The width of the bars.
-
-            fig, ax = plt.subplots()
-            rects1 = ax.bar(x - (width + width/2), df2['P'], width, label='P', color='C3')
-            rects2 = ax.bar(x - width/2, df2['E'], width, label='E', color='C2')
-            rects3 = ax.bar(x + width/2, df2['C'], width, label='C', color='C0')
-            rects4 = ax.bar(x + (width + width/2), df2['S'], width, label='S', color='C1')
-
-            # Add some text for labels, title and custom x-axis tick labels, etc.
-            ax.set_ylabel('Component Scores')
-            ax.set_title('Agent Food Consumption')
-            ax.set_xticks(x)
-            
-            # The x axis will have "food amount (total decision score)."
-            df2["Combined"] = df2["Food"].map(str) + "(" + df2["D"].map(str) + ")"
-
-            ax.set_xticklabels(df2['Combined'])
-            ax.set_xlabel('Food Amount (Total Decision Score)')
-            ax.legend()
-            fig.tight_layout()
-            plt.show()    
-            
-        if not df3.empty:
-            print("3 unit food consumption:")
-            x = numpy.arange(len(df3['Food']))  # The label locations.
-            width = 0.2  # The width of the bars.
-
-            fig, ax = plt.subplots()
-            rects1 = ax.bar(x - (width + width/2), df3['P'], width, label='P', color='C3')
-            rects2 = ax.bar(x - width/2, df3['E'], width, label='E', color='C2')
-            rects3 = ax.bar(x + width/2, df3['C'], width, label='C', color='C0')
-            rects4 = ax.bar(x + (width + width/2), df3['S'], width, label='S', color='C1')
-
-            # Add some text for labels, title and custom x-axis tick labels, etc.
-            ax.set_ylabel('Component Scores')
-            ax.set_title('Agent Food Consumption')
-            ax.set_xticks(x)
-            
-            # The x axis will have "food amount (total decision score)."
-            df3["Combined"] = df3["Food"].map(str) + "(" + df3["D"].map(str) + ")"
-
-            ax.set_xticklabels(df3['Combined'])
-            ax.set_xlabel('Food Amount (Total Decision Score)')
-            ax.legend()
-            fig.tight_layout()
-            plt.show()     
-
-    
-# Run the main program.    
-main()
+        # One chart for all food consumption, then separate charts for 1, 2, 3 food. There is only a chart if the
+        # agent has consumed that kind of food.
+        charts = []
+        for name, text, dfChart in (("all", "All food consumption:", dfAll),
+                                    ("food1", "1 unit food consumption:", dfAll.loc[(dfAll['Food'] == 1)]),
+                                    ("food2", "2 unit food consumption:", dfAll.loc[(dfAll['Food'] == 2)]),
+                                    ("food3", "3 unit food consumption:", dfAll.loc[(dfAll['Food'] == 3)])):
+            if not dfChart.empty:
+                print(text)
+                if output == "show":
+                    import matplotlib.pyplot as plt # Only needed for showing plots in windows.
+                    fig = plt.figure(layout="tight")
+                    consumptionChart(fig, dfChart)
+                    plt.show()
+                else:
+                    charts.append((name, dfChart))
+        if charts: jobs.append((c, charts, output, path))
+
+    if not jobs:
+        return
+    if output == "pdf":
+        # One file can only be written by one process, so the pages are drawn and saved here, one after the other,
+        # in the order of the agents.
+        import matplotlib.figure
+        from matplotlib.backends.backend_pdf import PdfPages
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with PdfPages(path + ".pdf") as pdf:
+            for c, charts, output, chartPath in jobs:
+                for name, dfChart in charts:
+                    fig = matplotlib.figure.Figure(layout="tight")
+                    consumptionChart(fig, dfChart)
+                    pdf.savefig(fig)
+        return
+
+    # Draw the charts in the worker processes, a batch of agents at a time.
+    os.makedirs(path, exist_ok=True)
+    if workers == 1:
+        list(map(saveCharts, jobs))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(saveCharts, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def readSettings(argv=None):
+    # The settings from the command line: the constant variables at the top, changed by the config files given with
+    # --config, in order, and then by the settings given with --set, e.g.
+    #   python temperance_automatic.py --config big.json --set NUMBER_STEPS=500 --set PLOT_OUTPUT=png
+    parser = argparse.ArgumentParser(description="Runs the Temperance simulation for a number of steps and plots "
+                                                 "the results.")
+    parser.add_argument("--config", action="append", default=[], metavar="FILE",
+                        help="a JSON file with settings, e.g. {\"NUMBER_AGENTS\": 20}")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="change one setting, e.g. NUMBER_AGENTS=20")
+    arguments = parser.parse_args(argv)
+    settings = config()
+    try:
+        for fileName in arguments.config:
+            settings.loadFile(fileName)
+        for item in arguments.set:
+            name, _, text = item.partition("=")
+            try:
+                value = ast.literal_eval(text) # Numbers, True, False, None, lists, and quoted text.
+            except (ValueError, SyntaxError):
+                value = text # Anything else is taken as text.
+            settings.update({name: value})
+    except (OSError, ValueError) as error: # json.JSONDecodeError is a ValueError too.
+        parser.error(str(error))
+    return settings
+
+def main(argv=None):
+    # Run the simulation, then plot the results.
+    settings = readSettings(argv)
+    profile = profiler(settings.PROFILE_PER_STEP) if settings.PROFILE else None
+    DataFrameList = runSimulation(settings.RESUME_FILE, profile=profile, settings=settings)
+    if profile:
+        profile.report()
+        if settings.PROFILE_FILE: profile.save(settings.PROFILE_FILE)
+    if DataFrameList: plotResults(DataFrameList, settings.PLOT_OUTPUT, settings.PLOT_PATH, settings.PLOT_WORKERS)
+
+# Run the main program. This is skipped when the script is imported by another script (e.g. temperance_sweep.py).
+if __name__ == "__main__":
+    main()
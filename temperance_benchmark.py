@@ -0,0 +1,151 @@
+# This script measures how fast temperance_automatic.py runs for worlds of different sizes. For every combination
+# of the values in BENCHMARK_MATRIX, it runs the step loop of temperance_automatic.py without printing, plotting or
+# recording anything, and measures:
+#
+#   - the number of steps per second,
+#   - the time per step of every phase (REGROW, MOVE, LOOK, DECIDE, CONSUME, METABOLIZE, see the profiler class of
+#     temperance_automatic.py), and the number of decision scores, blocked moves, deaths etc. per step,
+#   - the most memory in use during the run, and for every step the memory it allocates on top of what was in use
+#     when it started and the number of memory blocks it leaves allocated, as measured by the tracemalloc module
+#     and sys.getallocatedblocks of the Python standard library.
+#
+# These are measured in three separate runs from the same seed: the profiler and tracemalloc take time too, so
+# the steps per second come from a run without either of them. Every run is done in a new worker process, one
+# after the other, so that runs do not affect each other.
+# The results are saved to RESULTS_FILE + ".json" and RESULTS_FILE + ".csv", so that they can be compared between
+# versions of the script.
+
+import concurrent.futures # For running every benchmark in a new process.
+import contextlib # To hide the printing of the simulation.
+import csv
+import itertools # To get every combination of parameter values.
+import json
+import os
+import sys # For counting memory blocks.
+import time # For the steps per second.
+import tracemalloc # For measuring memory.
+import temperance_automatic
+
+# The parameter values to try. Any of the settings of temperance_automatic.py (CONFIG_NAMES) can be used.
+BENCHMARK_MATRIX = {"NUMBER_AGENTS": [10, 100, 1000],
+                    "NUMBER_FOOD": [20, 200, 2000],
+                    "SIM_AREA": [50, 200],
+                    "AGENT_VISION": [2, 5]}
+BENCHMARK_STEPS = 50 # Number of steps of every run.
+BENCHMARK_SEED = 1 # The seed of every run, so that the same worlds are measured every time.
+RESULTS_FILE = "benchmark_results" # Where to save the results, without the ".json" or ".csv" at the end.
+
+def setUp(parameters, numberSteps=BENCHMARK_STEPS):
+    # The config (see the config class of temperance_automatic.py) of a run with the given parameter values and
+    # nothing printed, plotted or recorded.
+    return temperance_automatic.config(**parameters, NUMBER_STEPS=numberSteps, SEED=BENCHMARK_SEED, OUTPUT="off",
+                                       RECORD_DATA_FRAMES=False, TRAJECTORY_FILE=None, CHECKPOINT_FILE=None)
+
+def speedRun(parameters):
+    # Runs the simulation without the profiler and returns the steps per second of the step loop. The time of a run
+    # with no steps, which only sets up the grid world, is taken off the time of the whole run.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        temperance_automatic.runSimulation(settings=setUp(parameters, 0))
+        setUpTime = time.perf_counter() - start
+        start = time.perf_counter()
+        temperance_automatic.runSimulation(settings=setUp(parameters))
+        loopTime = time.perf_counter() - start - setUpTime
+    return {"stepsPerSecond": BENCHMARK_STEPS / loopTime if loopTime > 0 else 0.0}
+
+def timeRun(parameters):
+    # Runs the simulation once with the profiler and returns the time per step of every phase and the counts.
+    profile = temperance_automatic.profiler()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        temperance_automatic.runSimulation(profile=profile, settings=setUp(parameters))
+    return profile.summary()
+
+class memoryProfiler(temperance_automatic.profiler):
+    # A profiler (see the profiler class of temperance_automatic.py) that also measures the memory of every step
+    # while tracemalloc is on: the most memory in use, the memory the step allocates on top of what was in use when
+    # it started (the peak during the step minus the memory at its start), and the number of memory blocks it
+    # leaves allocated. The first step also sets up the grid world, so it only starts the measurements.
+    def __init__(self):
+        super().__init__()
+        self.peakMemory = 0
+        self.allocated = 0
+        self.newBlocks = 0
+        self.measuredSteps = 0
+        self.stepMemory = self.stepBlocks = None
+
+    def endStep(self, steps):
+        super().endStep(steps)
+        memory, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        self.peakMemory = max(self.peakMemory, peak)
+        if self.stepMemory is not None:
+            self.allocated += peak - self.stepMemory
+            self.newBlocks += blocks - self.stepBlocks
+            self.measuredSteps += 1
+        tracemalloc.reset_peak()
+        self.stepMemory, self.stepBlocks = tracemalloc.get_traced_memory()[0], sys.getallocatedblocks()
+
+def memoryRun(parameters):
+    # Runs the simulation while tracemalloc keeps track of the memory, and returns the most memory in use, and the
+    # memory allocated and the memory blocks left allocated per step (see the memoryProfiler class above).
+    profile = memoryProfiler()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tracemalloc.start()
+        temperance_automatic.runSimulation(profile=profile, settings=setUp(parameters))
+        profile.peakMemory = max(profile.peakMemory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    steps = max(profile.measuredSteps, 1)
+    return {"peakMemory": profile.peakMemory, "allocatedPerStep": profile.allocated / steps,
+            "newBlocksPerStep": profile.newBlocks / steps}
+
+def inNewProcess(function, parameters):
+    # Runs function(parameters) in a new worker process and returns what it returns.
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(function, parameters).result()
+
+def benchmark(matrix):
+    # Runs every combination of the parameter values and returns one row of results per combination. Combinations
+    # with more agents or food than square locations cannot be set up, and are left out.
+    names = list(matrix)
+    rows = []
+    for values in itertools.product(*matrix.values()):
+        parameters = dict(zip(names, values))
+        settings = setUp(parameters)
+        if max(settings.NUMBER_AGENTS, settings.NUMBER_FOOD) > settings.SIM_AREA ** 2:
+            continue
+        speed = inNewProcess(speedRun, parameters)
+        times = inNewProcess(timeRun, parameters)
+        memory = inNewProcess(memoryRun, parameters)
+        row = dict(parameters, steps=times["steps"], stepsPerSecond=speed["stepsPerSecond"])
+        for phase, t in times["phaseTimePerStep"].items():
+            row["time" + phase.capitalize()] = t
+        row.update(times["countsPerStep"])
+        row.update(memory)
+        rows.append(row)
+        print(", ".join(name + "=" + str(value) for name, value in parameters.items()) + ": " +
+              str(round(row["stepsPerSecond"], 1)) + " steps/s, peak memory " +
+              str(round(memory["peakMemory"] / 2**20, 1)) + " MiB, " +
+              str(round(memory["allocatedPerStep"] / 2**10, 1)) + " KiB allocated per step")
+    return rows
+
+def saveResults(rows, fileName):
+    # Saves the rows to fileName + ".json" and fileName + ".csv".
+    with open(fileName + ".json", "w") as f:
+        json.dump({"steps": BENCHMARK_STEPS, "seed": BENCHMARK_SEED, "results": rows}, f, indent=1)
+    with open(fileName + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def main():
+    rows = benchmark(BENCHMARK_MATRIX)
+    saveResults(rows, RESULTS_FILE)
+    print("Saved", len(rows), "results to", RESULTS_FILE + ".json and", RESULTS_FILE + ".csv")
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# This script runs many independent worlds of temperance_vectorized.py at the same time, one for every seed in
+# SEEDS, for replication studies that repeat the same settings with many different seeds. Instead of one world
+# after the other, all the worlds are stepped together: their food and grids are stacked along a first "world"
+# axis, and the agents of all the worlds are kept in one set of arrays, so that every phase of a step (REGROW,
+# MOVE, LOOK, DECIDE, CONSUME, METABOLIZE) is done once for all the worlds instead of once per world. The phases
+# are those of the world class of temperance_vectorized.py itself; the ensemble only tells them which world's grid
+# every agent is in (see the cells method).
+# It uses Numpy and the constant variables at the top of temperance_vectorized.py for the simulation itself.
+#
+# Agents die at different times in different worlds, so the agent arrays cannot have the same length for every
+# world. Instead, they hold the agents of world 0 first, then those of world 1 and so on, each world in the order
+# of the agent ids, and the "worldNumber" array says which world every agent belongs to. Food is numbered the same
+# way: food f of world k is food k * NUMBER_FOOD + f of the ensemble.
+#
+# Every world follows exactly the rules of temperance_vectorized.py and uses the same random numbers, so world k
+# of an ensemble is the same as a run of temperance_vectorized.py with seed SEEDS[k], and its recorder (see the
+# recorder class of temperance_vectorized.py) holds the same Data Frames.
+
+import time # To measure how long the steps take.
+import numpy
+import temperance_vectorized
+
+SEEDS = range(100) # One world is run for every seed.
+RECORD_DATA_FRAMES = True # Keep the data of every agent of every world at every step, like a single run would.
+RESULTS_FILE = "ensemble_results.pkl" # Where to save the table with the data of all the worlds (a pickled Pandas
+                                      # Data Frame), if RECORD_DATA_FRAMES is True.
+
+###############################################################################
+##       The ensemble class - Many worlds stepped together in Numpy arrays       ##
+###############################################################################
+
+class ensemble(temperance_vectorized.world):
+    # The agent arrays of temperance_vectorized.py, and the world every agent belongs to.
+    agentFields = ("worldNumber",) + temperance_vectorized.world.agentFields
+
+    # Initialization of the ensemble class: every world is set up by temperance_vectorized.py, so that it starts
+    # exactly like a single run with the same seed, and then all the worlds are put together.
+    def __init__(self, seeds):
+        NUMBER_AGENTS, NUMBER_FOOD = temperance_vectorized.NUMBER_AGENTS, temperance_vectorized.NUMBER_FOOD
+        worlds = [temperance_vectorized.world(seed) for seed in seeds]
+        self.seeds = [w.seed for w in worlds]
+        self.numberWorlds = len(worlds)
+        self.steps = 0
+
+        # The agents of all the worlds, world by world.
+        self.worldNumber = numpy.repeat(numpy.arange(self.numberWorlds), NUMBER_AGENTS)
+        for field in temperance_vectorized.world.agentFields:
+            setattr(self, field, numpy.concatenate([getattr(w, field) for w in worlds]))
+
+        # The food of all the worlds, world by world.
+        self.foodX = numpy.concatenate([w.foodX for w in worlds])
+        self.foodY = numpy.concatenate([w.foodY for w in worlds])
+        self.foodAmount = numpy.concatenate([w.foodAmount for w in worlds])
+        self.foodConsumed = numpy.concatenate([w.foodConsumed for w in worlds])
+        self.regrowthSchedule = {}
+
+        # The grids of all the worlds, one after the other: the square location (x, y) of world k is at [k, x, y].
+        self.foodGrid = numpy.stack([numpy.where(w.foodGrid >= 0, w.foodGrid + k * NUMBER_FOOD, -1)
+                                     for k, w in enumerate(worlds)])
+        self.agentGrid = numpy.stack([w.agentGrid for w in worlds])
+
+    def agentsOf(self, k):
+        # The positions in the agent arrays of the agents of world k (a slice, since they are next to each other).
+        start, end = numpy.searchsorted(self.worldNumber, [k, k + 1])
+        return slice(start, end)
+
+    def singleWorld(self, k):
+        # World k on its own, as a world of temperance_vectorized.py that can go on being stepped by itself.
+        NUMBER_FOOD = temperance_vectorized.NUMBER_FOOD
+        w = temperance_vectorized.world.__new__(temperance_vectorized.world)
+        w.seed = self.seeds[k]
+        w.steps = self.steps
+        agents = self.agentsOf(k)
+        for field in temperance_vectorized.world.agentFields:
+            setattr(w, field, getattr(self, field)[agents].copy())
+        w.pursuing[w.pursuing >= 0] -= k * NUMBER_FOOD
+        w.consuming[w.consuming >= 0] -= k * NUMBER_FOOD
+        food = slice(k * NUMBER_FOOD, (k + 1) * NUMBER_FOOD)
+        w.foodX, w.foodY = self.foodX[food].copy(), self.foodY[food].copy()
+        w.foodAmount, w.foodConsumed = self.foodAmount[food].copy(), self.foodConsumed[food].copy()
+        w.regrowthSchedule = {}
+        for regrowStep, eaten in self.regrowthSchedule.items():
+            mine = eaten[(eaten >= food.start) & (eaten < food.stop)]
+            if len(mine):
+                w.regrowthSchedule[regrowStep] = mine - food.start
+        w.foodGrid = numpy.where(self.foodGrid[k] >= 0, self.foodGrid[k] - food.start, -1)
+        w.agentGrid = self.agentGrid[k].copy()
+        return w
+
+    def cells(self, agents, x, y):
+        # The square locations (x, y) seen or taken by the given agents are in the grids of their own worlds. This
+        # is all that the phases of a step in temperance_vectorized.py need to work on all the worlds at once.
+        return self.worldNumber[agents], x, y
+
+    def record(self, recorders):
+        # Record the data of this step of every world in its own recorder (one recorder of temperance_vectorized.py
+        # per world, in the order of the seeds), exactly as record(w) would for a single world.
+        rows = self.recordedRows()
+        starts = numpy.searchsorted(self.worldNumber, numpy.arange(self.numberWorlds + 1))
+        for k, r in enumerate(recorders):
+            r.data[self.id[starts[k]:starts[k+1]], self.steps] = rows[starts[k]:starts[k+1]]
+
+def runEnsemble(seeds, numberSteps, record=True):
+    # Runs one world for every seed, all together, for the given number of steps. Returns the ensemble and the
+    # recorder of every world (None if record is False).
+    e = ensemble(seeds)
+    recorders = None
+    if record:
+        recorders = [temperance_vectorized.recorder(temperance_vectorized.NUMBER_AGENTS, numberSteps)
+                     for k in range(e.numberWorlds)]
+    for steps in range(numberSteps):
+        e.step()
+        if recorders: e.record(recorders)
+    return e, recorders
+
+def resultsTable(seeds, recorders):
+    # Puts the Data Frames of all the agents of all the worlds in one table, with the seed of the world, the agent
+    # and the step in every row (the same table as temperance_sweep.py makes for every run).
+    import pandas # Only needed for the table.
+    tables = []
+    for seed, r in zip(seeds, recorders):
+        for c, df in r.dataFrames().items():
+            df.insert(0, "Step", range(len(df)))
+            df.insert(0, "Agent", c)
+            df.insert(0, "Seed", seed)
+            tables.append(df)
+    return pandas.concat(tables, ignore_index=True)
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def main():
+    NUMBER_STEPS = temperance_vectorized.NUMBER_STEPS
+    start = time.perf_counter()
+    e, recorders = runEnsemble(SEEDS, NUMBER_STEPS, RECORD_DATA_FRAMES)
+    elapsed = time.perf_counter() - start
+    alive = numpy.bincount(e.worldNumber, minlength=e.numberWorlds)
+    print("Worlds:", e.numberWorlds, "|| Steps:", NUMBER_STEPS, "|| Agents alive per world: min", alive.min(),
+          "mean", round(alive.mean(), 2), "max", alive.max(), "of", temperance_vectorized.NUMBER_AGENTS)
+    print("Time per step of all the worlds: ", round(elapsed / max(NUMBER_STEPS, 1) * 1000, 3), " ms", sep="")
+    if recorders:
+        resultsTable(e.seeds, recorders).to_pickle(RESULTS_FILE)
+        print("Saved the data of", e.numberWorlds, "worlds to", RESULTS_FILE)
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
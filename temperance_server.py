@@ -0,0 +1,289 @@
+# This script runs many simulations of temperance.py at the same time in one process, as a server. Instead of
+# pressing Enter in a terminal, clients connect to the server, create runs, step them and receive what changed in
+# every step. It only uses the Python standard library (asyncio).
+#
+# Every message, in both directions, is one line of JSON. A client sends commands such as
+#
+#   {"command": "create", "seed": 42}             Create a new run (the seed is optional). The reply has its id.
+#   {"command": "create", "config": {"NUMBER_AGENTS": 20}}
+#                                                 Create a run with its own settings (see the config class of
+#                                                 temperance.py); the others are the constant variables.
+#   {"command": "step", "run": 1, "steps": 100}   Step the run 100 more times, in the background.
+#   {"command": "pause", "run": 1}                Stop stepping the run after the current step.
+#   {"command": "subscribe", "run": 1}            Receive an event for every step of the run (see below).
+#   {"command": "unsubscribe", "run": 1}          Stop receiving them.
+#   {"command": "state", "run": 1}                Get the whole state of the run, with how often its decision
+#                                                 score cache already had the scores.
+#   {"command": "close", "run": 1}                Remove the run from the server.
+#   {"command": "list"}                           Get a short description of every run.
+#
+# and gets a reply with "reply" set to the command (or "error" if the command was not understood). Subscribed
+# clients also get a "step" event after every step of the run, with only what changed in that step:
+#
+#   {"event": "step", "run": 1, "step": 12,
+#    "moved": [[agent id, x, y], ...], "died": [agent id, ...],
+#    "consumed": [food id, ...], "regrown": [food id, ...],
+#    "rules": [[agent id, rule 1 weight, ..., rule 5 weight], ...]}
+#
+# and an "idle" event when the run has done all the steps it was asked to do, or was paused. Every run has its own
+# settings, which start from the constant variables at the top of temperance.py.
+# The client class at the end can be used to talk to the server from Python.
+
+import asyncio
+import json
+import temperance
+
+HOST = "127.0.0.1" # The address the server listens on. "127.0.0.1" only accepts clients on the same computer.
+PORT = 8765 # The port the server listens on.
+STEP_DELAY = 0 # Seconds to wait between two steps of a run. Even with 0, the other runs and the clients get their
+               # turn between steps.
+
+#############################################################
+##       The run class - One simulation on the server       ##
+#############################################################
+
+class run:
+    # Initialization of the run class: a new simulation of temperance.py, and the outboxes (see the server class
+    # below) of the clients subscribed to it.
+    def __init__(self, id, seed=None, settings=None):
+        self.id = id
+        self.sim = temperance.simulation(seed, settings)
+        self.subscribers = set()
+        self.stepsLeft = 0 # The number of steps still to do in the background.
+        self.task = None # The task doing them, if any.
+
+    def state(self):
+        # The whole state of the simulation.
+        return {"run": self.id, "seed": self.sim.seed, "step": self.sim.steps, "config": self.sim.config.asDict(),
+                "decisionCache": self.sim.cacheInfo(),
+                "agents": [{"id": a.id, "x": a.xPosition, "y": a.yPosition, "health": a.health,
+                            "rules": [a.rule1weight, a.rule2weight, a.rule3weight, a.rule4weight, a.rule5weight],
+                            "socialPressure": a.socialPressure, "pursuing": a.pursuing, "consuming": a.consuming,
+                            "punished": a.punished} for a in self.sim.agentList],
+                "food": [{"id": f.id, "x": f.xPosition, "y": f.yPosition, "amount": f.amount, "consumed": f.consumed}
+                         for f in self.sim.foodList]}
+
+    def description(self):
+        # A short description of the run, for the "list" command, with the hits, misses and hit rate of its
+        # decision score cache (see decisionCacheInfo in temperance.py).
+        return {"run": self.id, "seed": self.sim.seed, "step": self.sim.steps, "agents": len(self.sim.agentList),
+                "stepping": self.task is not None, "decisionCache": self.sim.cacheInfo()}
+
+    def publish(self, message):
+        # Send a message to every subscribed client.
+        for outbox in self.subscribers:
+            outbox.put_nowait(message)
+
+    def stepOnce(self):
+        # Do one step of the simulation and tell the subscribers what changed. The state before the step is only
+        # looked at if somebody is subscribed.
+        if not self.subscribers:
+            self.sim.step()
+            return
+        before = {a.id: (a.xPosition, a.yPosition, a.rule1weight, a.rule2weight, a.rule3weight, a.rule4weight,
+                         a.rule5weight) for a in self.sim.agentList}
+        self.sim.step()
+        moved, rules = [], []
+        for a in self.sim.agentList:
+            old = before.pop(a.id)
+            if (a.xPosition, a.yPosition) != old[:2]:
+                moved.append([a.id, a.xPosition, a.yPosition])
+            weights = (a.rule1weight, a.rule2weight, a.rule3weight, a.rule4weight, a.rule5weight)
+            if weights != old[2:]:
+                rules.append([a.id, *weights])
+        self.publish({"event": "step", "run": self.id, "step": self.sim.steps, "moved": moved,
+                      "died": sorted(before), # The agents that were there before the step and are not anymore.
+                      "consumed": [f.id for f in self.sim.eaten], "regrown": [f.id for f in self.sim.regrown],
+                      "rules": rules})
+
+    async def keepStepping(self):
+        # Do the steps that were asked for, one at a time, letting everything else on the server run in between.
+        while self.stepsLeft > 0:
+            self.stepsLeft -= 1
+            self.stepOnce()
+            await asyncio.sleep(STEP_DELAY)
+        self.task = None
+        self.publish({"event": "idle", "run": self.id, "step": self.sim.steps})
+
+#######################################################################
+##       The server class - All the runs and the client commands       ##
+#######################################################################
+
+class server:
+    # Initialization of the server class. Every connected client has an outbox, a queue of the messages to send
+    # to it, so that the replies and the events of a client go out in order and a slow client does not hold up
+    # the simulations.
+    def __init__(self):
+        self.runs = {}
+        self.nextId = 1
+
+    def getRun(self, message):
+        # The run named in a message.
+        runId = message.get("run")
+        if not isinstance(runId, int) or isinstance(runId, bool):
+            raise ValueError("The run must be a whole number.")
+        if runId not in self.runs:
+            raise ValueError("There is no run " + str(runId) + ".")
+        return self.runs[runId]
+
+    def handle(self, message, outbox):
+        # Carry out a command from a client and return the reply.
+        command = message.get("command")
+        if command == "create":
+            seed = message.get("seed")
+            if seed is not None and not isinstance(seed, int):
+                raise ValueError("The seed must be a whole number.")
+            changes = message.get("config", {})
+            if not isinstance(changes, dict):
+                raise ValueError("The config must be a JSON object.")
+            r = run(self.nextId, seed, temperance.config(**changes))
+            self.runs[r.id] = r
+            self.nextId += 1
+            return {"reply": "create", **r.state()}
+        if command == "list":
+            return {"reply": "list", "runs": [r.description() for r in self.runs.values()]}
+        r = self.getRun(message)
+        if command == "step":
+            steps = message.get("steps", 1)
+            if not isinstance(steps, int) or steps < 0:
+                raise ValueError("The number of steps must be a whole number of at least 0.")
+            r.stepsLeft += steps
+            if r.task is None and r.stepsLeft > 0:
+                r.task = asyncio.get_running_loop().create_task(r.keepStepping())
+            return {"reply": "step", "run": r.id, "step": r.sim.steps, "stepsLeft": r.stepsLeft}
+        if command == "pause":
+            r.stepsLeft = 0
+            return {"reply": "pause", "run": r.id, "step": r.sim.steps}
+        if command == "subscribe":
+            r.subscribers.add(outbox)
+            return {"reply": "subscribe", "run": r.id, "step": r.sim.steps}
+        if command == "unsubscribe":
+            r.subscribers.discard(outbox)
+            return {"reply": "unsubscribe", "run": r.id}
+        if command == "state":
+            return {"reply": "state", **r.state()}
+        if command == "close":
+            r.stepsLeft = 0
+            del self.runs[r.id]
+            return {"reply": "close", "run": r.id}
+        raise ValueError("Unknown command: " + str(command) + ".")
+
+    async def handleClient(self, reader, writer):
+        # Read the commands of one client, one line at a time, until it disconnects.
+        outbox = asyncio.Queue()
+        sender = asyncio.get_running_loop().create_task(self.sendMessages(writer, outbox))
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("A command must be a JSON object.")
+                    reply = self.handle(message, outbox)
+                except ValueError as error: # json.JSONDecodeError is a ValueError too.
+                    reply = {"error": str(error)}
+                outbox.put_nowait(reply)
+        except ConnectionError:
+            pass
+        finally:
+            for r in self.runs.values():
+                r.subscribers.discard(outbox)
+            sender.cancel()
+            writer.close()
+
+    async def sendMessages(self, writer, outbox):
+        # Send the messages in the outbox of a client as they come.
+        while True:
+            message = await outbox.get()
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+    async def serve(self, host, port):
+        # Accept clients until the program is stopped.
+        listener = await asyncio.start_server(self.handleClient, host, port)
+        print("Serving Temperance simulations on", host, "port", port)
+        async with listener:
+            await listener.serve_forever()
+
+####################################################################
+##       The client class - Talking to the server from Python       ##
+####################################################################
+
+class client:
+    # A client for the server. Replies to commands are returned by request, and the events of subscribed runs are
+    # kept in order until nextEvent is called.
+    #
+    #   c = await client.connect()
+    #   created = await c.request("create", seed=42)
+    #   await c.request("subscribe", run=created["run"])
+    #   await c.request("step", run=created["run"], steps=10)
+    #   event = await c.nextEvent()
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.replies = asyncio.Queue()
+        self.events = asyncio.Queue()
+        self.receiver = asyncio.get_running_loop().create_task(self.receiveMessages())
+
+    @classmethod
+    async def connect(cls, host=HOST, port=PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receiveMessages(self):
+        # Sort the messages from the server into replies and events. Once the connection is lost, None is put in
+        # both queues, so that requests and nextEvent calls fail instead of waiting forever.
+        try:
+            async for line in self.reader:
+                message = json.loads(line)
+                if "event" in message:
+                    self.events.put_nowait(message)
+                else:
+                    self.replies.put_nowait(message)
+        except ConnectionError:
+            pass
+        finally:
+            self.replies.put_nowait(None)
+            self.events.put_nowait(None)
+
+    async def nextMessage(self, queue):
+        # The next message in the queue. Raises ConnectionError if the connection is lost, and leaves the None in
+        # the queue for the next caller.
+        message = await queue.get()
+        if message is None:
+            queue.put_nowait(None)
+            raise ConnectionError("The connection to the server was lost.")
+        return message
+
+    async def request(self, command, **fields):
+        # Send a command and wait for its reply. Raises ValueError if the server did not accept the command, and
+        # ConnectionError if the connection is lost.
+        self.writer.write(json.dumps({"command": command, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        reply = await self.nextMessage(self.replies)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply
+
+    async def nextEvent(self):
+        # Wait for the next event of a subscribed run. Raises ConnectionError if the connection is lost.
+        return await self.nextMessage(self.events)
+
+    async def close(self):
+        self.receiver.cancel()
+        self.writer.close()
+        await self.writer.wait_closed()
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def main():
+    try:
+        asyncio.run(server().serve(HOST, PORT))
+    except KeyboardInterrupt:
+        pass
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
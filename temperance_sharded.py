@@ -0,0 +1,239 @@
+# This script runs the simulation of temperance_vectorized.py on several cores at once. The grid world is cut into
+# NUMBER_SHARDS strips along the x axis, and every strip (a "shard") is simulated by its own worker process: the
+# shard holds the agents standing on its square locations and the state of the food on them.
+# It uses Numpy and the constant variables at the top of temperance_vectorized.py for the simulation itself.
+#
+# Agents only ever look AGENT_VISION square locations away and move one square location per step, so a shard only
+# needs to know what happens in a "halo" of HALO square locations on both sides of its strip. In every step the
+# neighbouring shards send each other:
+#
+# 1. The positions of their agents within HALO of the border, at the start of the step (for the blocked squares).
+# 2. Where their agents within 2 of the border want to move (two agents can want the same square location only
+#    if they are at most 2 square locations apart).
+# 3. The agents that crossed the border (they now belong to the other shard), followed by the positions of their
+#    agents within HALO of the border after the move (for LOOK and for being seen by another agent).
+#
+# and all shards tell each other, through the main process, which food was consumed (an agent can pursue food far
+# away from its own strip). Instead of the "for a in agentList" loop, the rules of temperance_vectorized.py are
+# used, with one change that makes them independent of how the agents are split up: if several agents want the
+# same empty square location, the one with the lowest id gets it. Since temperance_vectorized.py keeps its agents
+# in the order of their ids, this is the same rule, and together with the per-agent random streams this means
+# that a sharded run gives exactly the same world as temperance_vectorized.py for the same SEED, whatever the
+# number of shards.
+
+import multiprocessing # For the worker processes and the queues between them.
+import os
+import time # To measure how long the steps take.
+import numpy
+import temperance_vectorized
+
+NUMBER_SHARDS = None # Number of strips and worker processes. None means one for every core.
+
+# The constant variables of temperance_vectorized.py that the worker processes need.
+PARAMETER_NAMES = ("AGENT_VISION", "AGENT_HEALTH", "AGENT_METABOLISM", "AGENT_SOCIALPRESSURE", "SIM_AREA",
+                   "FOOD_REGROWTH")
+
+def haloWidth():
+    # The width of the halo: enough to see AGENT_VISION away, and at least 2 for the moves.
+    return max(temperance_vectorized.AGENT_VISION, 2)
+
+##########################################################################
+##       The shard class - The part of the world in one strip           ##
+##########################################################################
+
+class shard(temperance_vectorized.world):
+    # A shard is a world that only holds the agents with an x coordinate from x0 up to (but not including) x1. All
+    # the food is kept, since every shard hears about all the consumed food anyway, but its grids only cover the
+    # strip and the halo on both sides, so the square location (x, y) is found at [x - xOffset, y].
+
+    # Initialization of the shard class: takes its part of a whole world from temperance_vectorized.py.
+    def __init__(self, w, number, x0, x1):
+        self.seed = w.seed
+        self.steps = w.steps
+        self.number = number
+        self.x0, self.x1 = x0, x1
+        self.halo = haloWidth()
+        self.xOffset = x0 - self.halo
+        mine = (w.xPosition >= x0) & (w.xPosition < x1)
+        for field in self.agentFields:
+            setattr(self, field, getattr(w, field)[mine])
+
+        self.foodX, self.foodY, self.foodAmount = w.foodX, w.foodY, w.foodAmount
+        self.foodConsumed = w.foodConsumed.copy()
+        self.regrowthSchedule = dict(w.regrowthSchedule)
+        nearbyFood = numpy.flatnonzero((w.foodX >= x0 - self.halo) & (w.foodX < x1 + self.halo))
+        self.foodGrid = numpy.full((x1 - x0 + 2*self.halo, temperance_vectorized.SIM_AREA), -1)
+        self.foodGrid[self.foodX[nearbyFood] - self.xOffset, self.foodY[nearbyFood]] = nearbyFood
+        self.agentGrid = numpy.zeros(self.foodGrid.shape, dtype=bool)
+
+    def connect(self, queues):
+        # The queues to the neighbouring shards and the main process. They are given to the worker process
+        # separately, because queues cannot be sent through other queues.
+        self.toLeft, self.fromLeft, self.toRight, self.fromRight, self.toMain, self.fromMain = queues
+
+    def disconnect(self):
+        self.toLeft = self.fromLeft = self.toRight = self.fromRight = self.toMain = self.fromMain = None
+
+    def exchange(self, leftMessage, rightMessage):
+        # Sends a message to both neighbours and returns what they sent back (None where there is no neighbour).
+        # The queues send in the background, so every shard can send first and receive afterwards.
+        if self.toLeft is not None:
+            self.toLeft.put(leftMessage)
+        if self.toRight is not None:
+            self.toRight.put(rightMessage)
+        fromLeft = self.fromLeft.get() if self.fromLeft is not None else None
+        fromRight = self.fromRight.get() if self.fromRight is not None else None
+        return fromLeft, fromRight
+
+    def nearBorder(self, width):
+        # The positions in the agent arrays of the agents within width of the left and of the right border.
+        return numpy.flatnonzero(self.xPosition < self.x0 + width), numpy.flatnonzero(self.xPosition >= self.x1 - width)
+
+    def shareBorder(self):
+        # Sends the positions of the agents within HALO of the borders to the neighbours, and builds the agent grid
+        # from the shard's own agents and the ones in the halo.
+        left, right = self.nearBorder(self.halo)
+        received = self.exchange((self.xPosition[left], self.yPosition[left]),
+                                 (self.xPosition[right], self.yPosition[right]))
+        self.agentGrid[:] = False
+        self.agentGrid[self.xPosition - self.xOffset, self.yPosition] = True
+        for message in received:
+            if message is not None:
+                self.agentGrid[message[0] - self.xOffset, message[1]] = True
+
+    def cells(self, agents, x, y):
+        # The grids of the shard start HALO square locations before its strip (see the shard class above).
+        return x - self.xOffset, y
+
+    def moveWinners(self, moving, tempx, tempy):
+        # Several agents may want the same empty square location, and some of them may belong to a neighbour: the
+        # one with the lowest id gets it.
+        SIM_AREA = temperance_vectorized.SIM_AREA
+        left, right = self.nearBorder(2)
+        left, right = numpy.intersect1d(left, moving), numpy.intersect1d(right, moving)
+        received = self.exchange((self.id[left], tempx[left], tempy[left]),
+                                 (self.id[right], tempx[right], tempy[right]))
+        ids, cells = [self.id[moving]], [tempx[moving] * SIM_AREA + tempy[moving]]
+        for message in received:
+            if message is not None:
+                ids.append(message[0])
+                cells.append(message[1] * SIM_AREA + message[2])
+        ids, cells = numpy.concatenate(ids), numpy.concatenate(cells)
+        order = numpy.lexsort((ids, cells))
+        first = numpy.ones(len(order), dtype=bool)
+        first[1:] = cells[order[1:]] != cells[order[:-1]]
+        return moving[numpy.isin(self.id[moving], ids[order[first]])]
+
+    def move(self):
+        # MOVE - The same as in temperance_vectorized.py, and then the agents that crossed the border now belong to
+        # the neighbour.
+        super().move()
+        leaving = (self.xPosition < self.x0, self.xPosition >= self.x1)
+        received = self.exchange(*[{field: getattr(self, field)[l] for field in self.agentFields} for l in leaving])
+        staying = ~(leaving[0] | leaving[1])
+        for field in self.agentFields:
+            parts = [getattr(self, field)[staying]] + [m[field] for m in received if m is not None]
+            setattr(self, field, numpy.concatenate(parts))
+        self.shareBorder()
+
+    def foodGone(self, eaten):
+        # The food consumed in this shard is shared with all the other shards, because their agents may be pursuing
+        # it, and all the food consumed anywhere in this step is gone.
+        self.toMain.put(eaten)
+        super().foodGone(self.fromMain.get())
+
+    def step(self):
+        # One step of the simulation, with the phases in the same order as in the other scripts.
+        self.regrow()
+        self.shareBorder()
+        self.move()
+        self.lookAndDecide()
+        self.consume()
+        self.metabolize()
+        self.steps += 1
+
+def joinShards(shards):
+    # Puts the shards back together into one world of temperance_vectorized.py, with the agents in the order of
+    # their ids.
+    SIM_AREA = temperance_vectorized.SIM_AREA
+    w = temperance_vectorized.world.__new__(temperance_vectorized.world)
+    w.seed, w.steps = shards[0].seed, shards[0].steps
+    order = numpy.argsort(numpy.concatenate([s.id for s in shards]))
+    for field in w.agentFields:
+        setattr(w, field, numpy.concatenate([getattr(s, field) for s in shards])[order])
+    w.foodX, w.foodY, w.foodAmount = shards[0].foodX, shards[0].foodY, shards[0].foodAmount
+    w.foodConsumed, w.regrowthSchedule = shards[0].foodConsumed, shards[0].regrowthSchedule # The same in all shards.
+    w.foodGrid = numpy.full((SIM_AREA, SIM_AREA), -1)
+    w.foodGrid[w.foodX, w.foodY] = numpy.arange(len(w.foodX))
+    w.agentGrid = numpy.zeros((SIM_AREA, SIM_AREA), dtype=bool)
+    w.agentGrid[w.xPosition, w.yPosition] = True
+    return w
+
+#########################################################
+##       The worker processes and the main process       ##
+#########################################################
+
+def runShard(s, queues, steps, parameters):
+    # Runs one shard for the given number of steps in a worker process, and sends it back to the main process.
+    for name, value in parameters.items():
+        setattr(temperance_vectorized, name, value)
+    s.connect(queues)
+    toMain = s.toMain
+    for _ in range(steps):
+        s.step()
+    s.disconnect()
+    toMain.put(s)
+
+def runSharded(w, steps, numberShards=None):
+    # Runs the world w of temperance_vectorized.py for the given number of steps, cut into numberShards strips,
+    # and returns the resulting world. w itself is not changed.
+    SIM_AREA = temperance_vectorized.SIM_AREA
+    numberShards = numberShards or os.cpu_count()
+    bounds = numpy.linspace(0, SIM_AREA, numberShards + 1).astype(int)
+    if numpy.diff(bounds).min() < haloWidth():
+        raise ValueError("A " + str(SIM_AREA) + " by " + str(SIM_AREA) + " grid world cannot be cut into " +
+                         str(numberShards) + " strips at least " + str(haloWidth()) + " square locations wide.")
+
+    # One queue in each direction between neighbouring shards, and between every shard and the main process.
+    rightward = [multiprocessing.Queue() for k in range(numberShards - 1)] # From shard k to shard k+1.
+    leftward = [multiprocessing.Queue() for k in range(numberShards - 1)] # From shard k+1 to shard k.
+    toMain = [multiprocessing.Queue() for k in range(numberShards)]
+    fromMain = [multiprocessing.Queue() for k in range(numberShards)]
+    parameters = {name: getattr(temperance_vectorized, name) for name in PARAMETER_NAMES}
+    workers = []
+    for k in range(numberShards):
+        queues = (leftward[k-1] if k > 0 else None, rightward[k-1] if k > 0 else None,
+                  rightward[k] if k < numberShards - 1 else None, leftward[k] if k < numberShards - 1 else None,
+                  toMain[k], fromMain[k])
+        s = shard(w, k, bounds[k], bounds[k+1])
+        workers.append(multiprocessing.Process(target=runShard, args=(s, queues, steps, parameters)))
+        workers[-1].start()
+
+    # In every step, the main process collects the food consumed in every shard and sends all of it back.
+    for _ in range(steps):
+        allEaten = numpy.concatenate([q.get() for q in toMain])
+        for q in fromMain:
+            q.put(allEaten)
+    shards = [q.get() for q in toMain]
+    for p in workers:
+        p.join()
+    return joinShards(shards)
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def main():
+    w = temperance_vectorized.world(temperance_vectorized.SEED)
+    print("Random seed:", w.seed)
+    start = time.perf_counter()
+    w = runSharded(w, temperance_vectorized.NUMBER_STEPS, NUMBER_SHARDS)
+    elapsed = time.perf_counter() - start
+    print("Steps:", temperance_vectorized.NUMBER_STEPS, "|| Agents alive:", len(w.id), "of",
+          temperance_vectorized.NUMBER_AGENTS, "|| Food consumed now:", int(w.foodConsumed.sum()), "of",
+          temperance_vectorized.NUMBER_FOOD)
+    print("Time per step: ", round(elapsed / max(temperance_vectorized.NUMBER_STEPS, 1) * 1000, 3), " ms", sep="")
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
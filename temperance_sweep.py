@@ -0,0 +1,94 @@
+# This script runs temperance_automatic.py many times without any windows or printing: once for every combination
+# of the parameter values in PARAMETER_GRID and every seed in SEEDS. The runs are spread over worker processes so
+# that all the cores of the computer are used. The data of every agent in every run (the same data that the
+# Pandas Data Frames of temperance_automatic.py hold) is collected in one table and saved to RESULTS_FILE, together
+# with the hits and misses of the decision score caches of all the runs.
+# It uses Pandas.
+
+import concurrent.futures # For the pool of worker processes.
+import contextlib # To hide the printing of the simulation.
+import itertools # To get every combination of parameter values.
+import os
+import pandas
+import temperance_automatic
+
+# The parameter values to try. Any of the settings of temperance_automatic.py (CONFIG_NAMES) can be used.
+PARAMETER_GRID = {"NUMBER_AGENTS": [5, 10],
+                  "AGENT_VISION": [1, 2],
+                  "AGENT_SOCIALPRESSURE": [.2, .4]}
+SEEDS = range(10) # Every combination of parameter values is run once for every seed.
+WORKERS = None # Number of worker processes. None means one for every core.
+RESULTS_FILE = "sweep_results.pkl" # Where to save the table with the results (a pickled Pandas Data Frame).
+PLOT_OUTPUT = None # If set to "png", "svg" or "pdf", the plots of every run are saved too (see PLOT_OUTPUT in
+                   # temperance_automatic.py), named after the seed and parameter values of the run, in PLOT_FOLDER.
+PLOT_FOLDER = "sweep_plots"
+
+# The settings that the sweep chooses itself for every run, so they cannot be in PARAMETER_GRID: the seed comes from
+# SEEDS, nothing is printed since nobody is watching, and the data of every agent is needed for the results.
+SWEEP_SETTINGS = {"OUTPUT": "off", "RECORD_DATA_FRAMES": True}
+
+def runOne(run):
+    # Runs the simulation once in a worker process, with its own config (see the config class of
+    # temperance_automatic.py): the parameter values and seed of the run, and SWEEP_SETTINGS.
+    parameters, seed = run
+    settings = temperance_automatic.config(**parameters, SEED=seed, **SWEEP_SETTINGS)
+    lookup = temperance_automatic.decisionCache(settings.DECISION_CACHE_SIZE) # The decision score cache of the run.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        DataFrameList = temperance_automatic.runSimulation(settings=settings, decisionLookup=lookup)
+        cacheInfo = temperance_automatic.decisionCacheInfo(lookup)
+        if PLOT_OUTPUT:
+            # The runs are already spread over the worker processes, so each run draws its own plots.
+            runName = "_".join(["seed" + str(seed)] + [name + str(value) for name, value in parameters.items()])
+            temperance_automatic.plotResults(DataFrameList, PLOT_OUTPUT, os.path.join(PLOT_FOLDER, runName), 1)
+
+    # Put the Data Frames of all agents in one table, with the parameters and seed of the run in every row.
+    tables = []
+    for c, df in DataFrameList.items():
+        df = df.copy()
+        df.insert(0, "Step", range(len(df)))
+        df.insert(0, "Agent", c)
+        tables.append(df)
+    table = pandas.concat(tables, ignore_index=True)
+    for name, value in reversed(list(parameters.items())):
+        table.insert(0, name, value)
+    table.insert(0, "Seed", seed)
+    return table, cacheInfo
+
+def sweep(parameterGrid, seeds, workers=None):
+    # Runs every combination of the parameter values with every seed and returns one table with all the results.
+    # The hits and misses of the decision score caches of all the runs are added up in the "decisionCache" entry of
+    # the attrs of the table. Raises ValueError if the parameter grid has one of the settings the sweep chooses
+    # itself (see SWEEP_SETTINGS above).
+    names = list(parameterGrid)
+    for name in names:
+        if name == "SEED" or name in SWEEP_SETTINGS:
+            raise ValueError(name + " cannot be in the parameter grid: the sweep sets it for every run.")
+    runs = [(dict(zip(names, values)), seed)
+            for values in itertools.product(*parameterGrid.values()) for seed in seeds]
+    workers = workers or os.cpu_count()
+    # Many short runs are sent to the workers in batches, so that they do not wait on each other too often.
+    chunksize = max(1, len(runs) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(runOne, runs, chunksize=chunksize))
+    table = pandas.concat([t for t, cacheInfo in results], ignore_index=True)
+    hits = sum(cacheInfo["hits"] for t, cacheInfo in results)
+    misses = sum(cacheInfo["misses"] for t, cacheInfo in results)
+    table.attrs["decisionCache"] = {"hits": hits, "misses": misses,
+                                    "hitRate": hits / (hits + misses) if hits + misses else 0.0}
+    return table
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def main():
+    results = sweep(PARAMETER_GRID, SEEDS, WORKERS)
+    results.to_pickle(RESULTS_FILE)
+    print("Saved", results[["Seed"] + list(PARAMETER_GRID)].drop_duplicates().shape[0], "runs to", RESULTS_FILE)
+    cacheInfo = results.attrs["decisionCache"]
+    print("Decision cache: ", cacheInfo["hits"], " hits, ", cacheInfo["misses"], " misses, ",
+          round(cacheInfo["hitRate"] * 100, 1), "% hit rate.", sep="")
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+# This script runs the same simulation as temperance_automatic.py, but instead of having one Python object for
+# every agent and every food patch, the whole population is stored in Numpy arrays (one array per field) and every
+# phase of a step is done for all agents at once. This makes it possible to run very large worlds, e.g. 100,000
+# agents on a 1000 by 1000 grid, with steps taking milliseconds.
+# It uses Numpy.
+#
+# Because all agents act at the same time instead of one after the other, a few things have to be decided
+# differently from the "for a in agentList" loop of the other two scripts. These rules are:
+#
+# MOVE    - Every agent picks its prospective square location (towards the pursued food, its current location if
+#           consuming, or a random nearby location) exactly as in the other scripts. The prospective location is
+#           blocked if any agent stood there at the start of the step (the agent itself included, just like in the
+#           other scripts). A blocked agent moves instead to a random nearby square location that was empty at the
+#           start of the step, or stays in place if there is none. If several agents want the same empty square
+#           location, the agent with the lowest position in the agent arrays (i.e. the one that would have come
+#           first in agentList, which is also the one with the lowest id) gets it and the others stay in place.
+#           Because of this, two agents can never end up on the same square location.
+# LOOK    - The agents look around after everybody has moved, and an agent that is not pursuing food picks one of
+#           the positively scored food it sees at random (which is what shuffling the seen food and taking the first
+#           positive one does in the other scripts).
+# CONSUME - Since no two agents share a square location, at most one agent can consume a given food patch in a
+#           step. All agents that consume food do so at the same time, and "being seen by another agent" is checked
+#           against the positions of all agents after the MOVE phase. All agents pursuing a consumed food patch stop
+#           pursuing it at the end of the phase.
+
+import random # To be able to obtain a random seed for the simulation.
+import time # To measure how long the steps take.
+import numpy
+
+# The crucial variable here is the number of steps for the simulation.
+NUMBER_STEPS = 50
+
+# The following variables can be changed:
+NUMBER_AGENTS = 5 # Number of agents to create.
+AGENT_VISION = 2 # The range of vision of the agent; it can see x by x squares around itself.
+AGENT_HEALTH = 10 # The starting health of agents.
+AGENT_METABOLISM = .3 # Amount of health the agent loses every turn.
+AGENT_SOCIALPRESSURE = .2 # Social pressure increases the more the agent interacts with other agents. "Interaction"
+                          # in this case simply means eating food in the presence of other agents (i.e. while being
+                          # inside the range of vision of other agents.)
+NUMBER_FOOD = 10 # Number of food patches to create.
+SIM_AREA = 5 # Area for the grid world. Creates an x by x grid square.
+FOOD_REGROWTH = 1 # X number of turns before food regrows at a food patch.
+SEED = None # The seed for all the random numbers of a run (see randomStream below). None means a new seed every
+            # time, which is printed at the start so that the run can be repeated.
+
+# The columns of the agent feature array used by the decision-making process (see decisionBatch below).
+HEALTH, TIMES_SICK3, RULE1_WEIGHT, RULE2_WEIGHT, RULE3_WEIGHT, RULE4_WEIGHT, RULE5_WEIGHT, TIMES_PUNISHED2, \
+    TIMES_PUNISHED3, SOCIAL_PRESSURE = range(10)
+
+##########################################################################################################
+##       Random numbers - Every agent has its own stream of random numbers, and so does the world       ##
+##########################################################################################################
+
+# These are the same streams of random numbers as in the other scripts: the n-th number of a stream only depends on
+# SEED, the stream number (0 for the world, the agent id + 1 for an agent) and n. The world stream is used exactly
+# like in the other scripts, so the same SEED creates the same grid world in all of them. For the agents, the
+# number n of a step is fixed by the step and what the number is used for (see randomNumbers in the world class),
+# so the results do not depend on where an agent is in the arrays.
+MASK64 = (1 << 64) - 1 # Keeps numbers within 64 bits.
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15 # The step between the inner states of a SplitMix64 stream.
+
+def mix64(z):
+    # Scrambles the bits of 64-bit numbers (the SplitMix64 output function). Works on Python integers and on Numpy
+    # arrays of unsigned 64-bit integers, where the multiplications wrap around by themselves.
+    if isinstance(z, numpy.ndarray):
+        z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+        return z ^ (z >> numpy.uint64(31))
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+# The random stream class:
+class randomStream:
+    __slots__ = ("key", "counter")
+
+    # Initialization of the random stream class: the key identifies the stream, and the counter is the number of
+    # random numbers taken from it so far.
+    def __init__(self, seed, stream):
+        self.key = mix64((mix64(seed & MASK64) + (stream + 1) * GOLDEN_GAMMA) & MASK64)
+        self.counter = 0
+
+    def next64(self):
+        # The next random 64-bit number of the stream.
+        self.counter += 1
+        return mix64((self.key + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def randint(self, low, high):
+        # A random integer from low to high (both included), like random.randint.
+        return low + self.next64() % (high - low + 1)
+
+def streamKeys(seed, streams):
+    # The keys of many random streams at once (the same as randomStream(seed, stream).key for every stream).
+    streams = numpy.asarray(streams, dtype=numpy.uint64)
+    return mix64(numpy.uint64(mix64(seed & MASK64)) + (streams + numpy.uint64(1)) * numpy.uint64(GOLDEN_GAMMA))
+
+def randomCells(worldRandom, number):
+    # Picks the given number of different square locations at random, in the same way as in the other scripts:
+    # the first entries of a random shuffle of all the square locations. Returns their x and y coordinates.
+    numberCells = SIM_AREA * SIM_AREA
+    if number > numberCells:
+        raise ValueError("Cannot pick " + str(number) + " different square locations in a " + str(SIM_AREA) +
+                         " by " + str(SIM_AREA) + " grid world.")
+    moved = {}
+    cells = numpy.empty(number, dtype=numpy.int64)
+    for i in range(number):
+        j = worldRandom.randint(i, numberCells - 1)
+        cells[i] = moved.get(j, j)
+        moved[j] = moved.get(i, i)
+    return cells // SIM_AREA, cells % SIM_AREA
+
+##################################################################################################################
+##       Decision-Making Process - The same PECS framework as in the other scripts, for many agents at once       ##
+##################################################################################################################
+
+def decisionBatch(agentFeatures, foodAmounts):
+    # agentFeatures has one row per (agent, food) pair with the columns listed above, and foodAmounts has the amount
+    # of the food in each pair. Returns an array with one row of P, E, C, S and total decision scores per pair.
+    # A rule that the agent does not know always has a weight of 0, so the weights alone are enough here.
+    agentFeatures = numpy.asarray(agentFeatures, dtype=float)
+    amount = numpy.asarray(foodAmounts)
+    health = agentFeatures[:, HEALTH]
+    is1, is2, is3 = amount == 1, amount == 2, amount == 3
+
+    # Physical Component - Based on the agent's hunger.
+    physicalScore = numpy.select([health >= 10, health > 6, health > 3], [0, 1, 2], 3)
+    # Emotional Component - Based on the amount of food and the number of times 3 food has made the agent sick.
+    emotionalScore = numpy.select([is1, is2, is3], [1, 2, 3 - agentFeatures[:, TIMES_SICK3]], 0)
+    # Cognitive Component - Based on the weights of the rules the agent has learned.
+    cognitiveScore = numpy.select([is1, is2, is3],
+                                  [agentFeatures[:, RULE1_WEIGHT],
+                                   agentFeatures[:, RULE2_WEIGHT] - agentFeatures[:, RULE3_WEIGHT],
+                                   -agentFeatures[:, RULE4_WEIGHT] - agentFeatures[:, RULE5_WEIGHT]], 0)
+    # Social Component - Approbation or punishment multiplied by social pressure, rounded and turned to an integer.
+    socialScore = numpy.select([is1, is2, is3],
+                               [1, -agentFeatures[:, TIMES_PUNISHED2], -agentFeatures[:, TIMES_PUNISHED3]], 0)
+    socialScore = numpy.trunc(numpy.round(socialScore * agentFeatures[:, SOCIAL_PRESSURE], 1))
+
+    scores = numpy.empty((len(amount), 5), dtype=numpy.int64)
+    scores[:, 0] = physicalScore
+    scores[:, 1] = emotionalScore
+    scores[:, 2] = cognitiveScore
+    scores[:, 3] = socialScore
+    scores[:, 4] = scores[:, :4].sum(axis=1) # Total Decision Score
+    return scores
+
+##########################################################################
+##       The world class - All agents and food stored in Numpy arrays       ##
+##########################################################################
+
+class world:
+    # The numbers each agent takes from its random stream in every step: two for a random move, one for each of
+    # the 8 nearby square locations when blocked, and one for each square location it can see.
+    randomMove = 0
+    randomBlocked = 2
+    randomLook = 10
+
+    # The names of the agent arrays.
+    agentFields = ("id", "randomKey", "xPosition", "yPosition", "health", "ruleWeights", "timesSick3", "timesPunished2",
+                   "timesPunished3", "socialPressure", "pursuing", "consuming", "punished", "consumingData")
+
+    # Initialization of the world: agents and food are placed randomly, never two on the same square location.
+    def __init__(self, seed=None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.steps = 0
+
+        # Agents and food are placed with the world stream of random numbers, in the same way as in the other
+        # scripts (see randomCells above).
+        worldRandom = randomStream(self.seed, 0)
+
+        # The agents. Row i of every array belongs to the same agent. Dead agents are removed from the arrays at
+        # the end of every step, so "id" is needed to know which agent is which.
+        self.id = numpy.arange(NUMBER_AGENTS)
+        self.randomKey = streamKeys(self.seed, self.id + 1) # The key of every agent's stream of random numbers.
+        self.xPosition, self.yPosition = randomCells(worldRandom, NUMBER_AGENTS)
+        self.health = numpy.full(NUMBER_AGENTS, float(AGENT_HEALTH))
+        self.ruleWeights = numpy.zeros((NUMBER_AGENTS, 5), dtype=numpy.int64) # Weights of rules 1 to 5.
+        self.timesSick3 = numpy.zeros(NUMBER_AGENTS, dtype=numpy.int64)
+        self.timesPunished2 = numpy.zeros(NUMBER_AGENTS, dtype=numpy.int64)
+        self.timesPunished3 = numpy.zeros(NUMBER_AGENTS, dtype=numpy.int64)
+        self.socialPressure = numpy.zeros(NUMBER_AGENTS)
+        self.pursuing = numpy.full(NUMBER_AGENTS, -1) # Index of the food being pursued, -1 if none.
+        self.consuming = numpy.full(NUMBER_AGENTS, -1) # Index of the food being consumed, -1 if none.
+        self.punished = numpy.zeros(NUMBER_AGENTS, dtype=bool)
+        self.consumingData = numpy.zeros((NUMBER_AGENTS, 11), dtype=numpy.int64) # Same columns as the Data Frames.
+
+        # The food.
+        self.foodX, self.foodY = randomCells(worldRandom, NUMBER_FOOD)
+        self.foodAmount = numpy.array([worldRandom.randint(1, 3) for f in range(NUMBER_FOOD)], dtype=numpy.int64)
+        self.foodConsumed = numpy.zeros(NUMBER_FOOD, dtype=bool)
+        # The consumed food, keyed on the step at the start of which it regrows: one array of food indices per step.
+        self.regrowthSchedule = {}
+
+        # The grid index: the index of the food on every square location (-1 if none) and whether an agent is there.
+        self.foodGrid = numpy.full((SIM_AREA, SIM_AREA), -1)
+        self.foodGrid[self.foodX, self.foodY] = numpy.arange(NUMBER_FOOD)
+        self.agentGrid = numpy.zeros((SIM_AREA, SIM_AREA), dtype=bool)
+        self.agentGrid[self.xPosition, self.yPosition] = True
+
+    def randomNumbers(self, agents, number):
+        # The given number (see randomMove, randomBlocked and randomLook above) of this step from the random streams
+        # of the given agents (an array of positions in the agent arrays), as 64-bit integers.
+        counter = (self.steps * (self.randomLook + (2*AGENT_VISION+1)**2) + number + 1) * GOLDEN_GAMMA & MASK64
+        return mix64(self.randomKey[agents] + numpy.uint64(counter))
+
+    def cells(self, agents, x, y):
+        # The index into foodGrid and agentGrid of the square locations (x, y) seen or taken by the given agents (an
+        # array of positions in the agent arrays, or a mask). In a single world this is just (x, y); the ensemble of
+        # temperance_ensemble.py, whose grids have one more axis in front for the world, adds the agents' worlds,
+        # and the shards of temperance_sharded.py, whose grids only cover a strip, move x to the start of the strip.
+        return x, y
+
+    def randomFractions(self, agents, number):
+        # The same as randomNumbers, but as fractions from 0 (included) to 1 (not included).
+        return (self.randomNumbers(agents, number) >> numpy.uint64(11)) * (1.0 / (1 << 53))
+
+    def agentFeatures(self):
+        # The feature array for the decision-making process, one row per agent.
+        features = numpy.empty((len(self.id), 10))
+        features[:, HEALTH] = self.health
+        features[:, TIMES_SICK3] = self.timesSick3
+        features[:, RULE1_WEIGHT:RULE5_WEIGHT+1] = self.ruleWeights
+        features[:, TIMES_PUNISHED2] = self.timesPunished2
+        features[:, TIMES_PUNISHED3] = self.timesPunished3
+        features[:, SOCIAL_PRESSURE] = self.socialPressure
+        return features
+
+    def recordedRows(self):
+        # The row of every agent for the recorder (see below): its consumption data if it has just consumed food,
+        # otherwise all 0.
+        return numpy.where((self.consuming >= 0)[:, None], self.consumingData, 0)
+
+    def regrow(self):
+        # Regrow food in empty food patches according to FOOD_REGROWTH. Only the food that is due in this step is
+        # touched, however many food patches there are.
+        regrown = self.regrowthSchedule.pop(self.steps, None)
+        if regrown is not None:
+            self.foodConsumed[regrown] = False
+
+    def scheduleRegrowth(self, eaten):
+        # The food consumed in this step regrows FOOD_REGROWTH steps later, and never in the same step.
+        if len(eaten):
+            self.regrowthSchedule[self.steps + max(1, FOOD_REGROWTH)] = eaten
+
+    def move(self):
+        # MOVE - Prospective positions first: towards the pursued food, stay if consuming, otherwise random.
+        everyone = numpy.arange(len(self.id))
+        pursuing = self.pursuing >= 0
+        tempx = self.xPosition + (self.randomNumbers(everyone, self.randomMove) % numpy.uint64(3)).astype(numpy.int64) - 1
+        tempy = self.yPosition + (self.randomNumbers(everyone, self.randomMove+1) % numpy.uint64(3)).astype(numpy.int64) - 1
+        staying = ~pursuing & (self.consuming >= 0)
+        tempx[staying] = self.xPosition[staying]
+        tempy[staying] = self.yPosition[staying]
+        target = self.pursuing[pursuing]
+        tempx[pursuing] = self.xPosition[pursuing] + numpy.sign(self.foodX[target] - self.xPosition[pursuing])
+        tempy[pursuing] = self.yPosition[pursuing] + numpy.sign(self.foodY[target] - self.yPosition[pursuing])
+        numpy.clip(tempx, 0, SIM_AREA - 1, out=tempx)
+        numpy.clip(tempy, 0, SIM_AREA - 1, out=tempy)
+
+        # Blocked agents pick a random nearby square location that was empty at the start of the step.
+        blocked = numpy.flatnonzero(self.agentGrid[self.cells(everyone, tempx, tempy)])
+        if len(blocked):
+            offsets = numpy.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)])
+            nx = self.xPosition[blocked, None] + offsets[:, 0]
+            ny = self.yPosition[blocked, None] + offsets[:, 1]
+            inside = (nx >= 0) & (nx < SIM_AREA) & (ny >= 0) & (ny < SIM_AREA)
+            free = inside.copy()
+            looker = numpy.broadcast_to(blocked[:, None], nx.shape) # The agent looking at every nearby location.
+            free[inside] = ~self.agentGrid[self.cells(looker[inside], nx[inside], ny[inside])]
+            keys = numpy.stack([self.randomFractions(blocked, self.randomBlocked+i) for i in range(len(offsets))], axis=1)
+            keys = numpy.where(free, keys, -1.0)
+            choice = keys.argmax(axis=1)
+            anyFree = free[numpy.arange(len(blocked)), choice]
+            tempx[blocked] = numpy.where(anyFree, nx[numpy.arange(len(blocked)), choice], self.xPosition[blocked])
+            tempy[blocked] = numpy.where(anyFree, ny[numpy.arange(len(blocked)), choice], self.yPosition[blocked])
+
+        # Several agents may want the same empty square location (see moveWinners below).
+        moving = numpy.flatnonzero((tempx != self.xPosition) | (tempy != self.yPosition))
+        winners = self.moveWinners(moving, tempx, tempy)
+        self.agentGrid[self.cells(winners, self.xPosition[winners], self.yPosition[winners])] = False
+        self.xPosition[winners] = tempx[winners]
+        self.yPosition[winners] = tempy[winners]
+        self.agentGrid[self.cells(everyone, self.xPosition, self.yPosition)] = True
+
+    def moveWinners(self, moving, tempx, tempy):
+        # The agents among the moving ones (positions in the agent arrays) that get the square location (tempx,
+        # tempy) they want. If several agents want the same one, the first one in the arrays gets it.
+        cells = numpy.ravel_multi_index(self.cells(moving, tempx[moving], tempy[moving]), self.agentGrid.shape)
+        _, first = numpy.unique(cells, return_index=True)
+        return moving[first]
+
+    def lookAndDecide(self):
+        # LOOK and DECIDE - Agents that are not pursuing food look at every square location within their range of
+        # vision, score the food there and pursue a random one among the positively scored food.
+        looking = numpy.flatnonzero(self.pursuing < 0)
+        self.consuming[looking] = -1 # This removes the agent's last consumed food.
+        self.punished[looking] = False # This removes the agent's last punishment marker, if any.
+        # The scores only depend on the agent and the amount of the food, so every looking agent is scored once
+        # for each of the three amounts, and the food it sees just picks one of them.
+        features = self.agentFeatures()[looking]
+        positive = numpy.empty((len(looking), 4), dtype=bool)
+        positive[:, 0] = False # Index 0 is not used; food amounts go from 1 to 3.
+        for amount in (1, 2, 3):
+            positive[:, amount] = decisionBatch(features, numpy.full(len(looking), amount))[:, 4] > 0
+        bestKey = numpy.full(len(looking), -1.0)
+        bestFood = numpy.full(len(looking), -1)
+        lookNumber = self.randomLook
+        for dx in range(-AGENT_VISION, AGENT_VISION+1):
+            for dy in range(-AGENT_VISION, AGENT_VISION+1):
+                x = self.xPosition[looking] + dx
+                y = self.yPosition[looking] + dy
+                inside = numpy.flatnonzero((x >= 0) & (x < SIM_AREA) & (y >= 0) & (y < SIM_AREA))
+                seen = self.foodGrid[self.cells(looking[inside], x[inside], y[inside])]
+                visible = seen >= 0
+                visible[visible] = ~self.foodConsumed[seen[visible]]
+                inside, seen = inside[visible], seen[visible]
+                wanted = positive[inside, self.foodAmount[seen]]
+                inside, seen = inside[wanted], seen[wanted]
+                keys = self.randomFractions(looking[inside], lookNumber)
+                better = keys > bestKey[inside]
+                bestKey[inside[better]] = keys[better]
+                bestFood[inside[better]] = seen[better]
+                lookNumber += 1
+        self.pursuing[looking] = bestFood
+
+    def consume(self):
+        # CONSUME - Agents standing on the food they pursue consume it.
+        pursuing = numpy.flatnonzero(self.pursuing >= 0)
+        target = self.pursuing[pursuing]
+        onFood = (self.xPosition[pursuing] == self.foodX[target]) & (self.yPosition[pursuing] == self.foodY[target])
+        eating, eaten = pursuing[onFood], target[onFood]
+        if len(eating):
+            self.eat(eating, eaten)
+        self.foodGone(eaten)
+
+    def eat(self, eating, eaten):
+        # The agents in eating (positions in the agent arrays) consume the food in eaten, one food each.
+        amount = self.foodAmount[eaten]
+
+        # The consumption data is taken before anything about the agent changes.
+        self.consuming[eating] = eaten
+        self.consumingData[eating, 0] = amount
+        self.consumingData[eating, 1:6] = decisionBatch(self.agentFeatures()[eating], amount)
+        self.consumingData[eating, 6:11] = self.ruleWeights[eating]
+
+        # Health, sickness and rules 1, 2 and 4.
+        self.health[eating] += numpy.where(amount == 3, -1, amount)
+        self.timesSick3[eating] += amount == 3
+        self.ruleWeights[eating, 0] += amount == 1
+        self.ruleWeights[eating, 1] += amount == 2
+        self.ruleWeights[eating, 3] += amount == 3
+
+        # Was the agent seen by another agent? Look at every square location within the range of vision of the
+        # consuming agents (except their own) for another agent.
+        seenBy = numpy.zeros(len(eating), dtype=bool)
+        for dx in range(-AGENT_VISION, AGENT_VISION+1):
+            for dy in range(-AGENT_VISION, AGENT_VISION+1):
+                if dx == 0 and dy == 0:
+                    continue
+                x = self.xPosition[eating] + dx
+                y = self.yPosition[eating] + dy
+                inside = numpy.flatnonzero((x >= 0) & (x < SIM_AREA) & (y >= 0) & (y < SIM_AREA))
+                seenBy[inside] |= self.agentGrid[self.cells(eating[inside], x[inside], y[inside])]
+        seen, seenAmount = eating[seenBy], amount[seenBy]
+        self.socialPressure[seen] = numpy.round(self.socialPressure[seen] + AGENT_SOCIALPRESSURE, 1)
+        self.timesPunished2[seen] += seenAmount == 2
+        self.timesPunished3[seen] += seenAmount == 3
+        self.punished[seen] |= seenAmount >= 2
+        self.ruleWeights[seen, 2] += seenAmount == 2
+        self.ruleWeights[seen, 4] += seenAmount == 3
+
+    def foodGone(self, eaten):
+        # The food consumed in this step disappears until it regrows, and all agents who were pursuing it stop, the
+        # consuming agents included. The shards of temperance_sharded.py first tell each other what they consumed.
+        self.foodConsumed[eaten] = True
+        self.scheduleRegrowth(eaten)
+        stillPursuing = self.pursuing >= 0
+        stillPursuing[stillPursuing] = self.foodConsumed[self.pursuing[stillPursuing]]
+        self.pursuing[stillPursuing] = -1
+
+    def metabolize(self):
+        # METABOLIZE - Agents lose health, and dead agents are removed from all the agent arrays.
+        self.health = numpy.round(self.health - AGENT_METABOLISM, 1)
+        alive = self.health > 0
+        if not alive.all():
+            dead = ~alive
+            self.agentGrid[self.cells(dead, self.xPosition[dead], self.yPosition[dead])] = False
+            for field in self.agentFields:
+                setattr(self, field, getattr(self, field)[alive])
+
+    def step(self):
+        # One step of the simulation, with the phases in the same order as in the other scripts.
+        self.regrow()
+        self.move()
+        self.lookAndDecide()
+        self.consume()
+        self.metabolize()
+        self.steps += 1
+
+# The recorder class:
+class recorder:
+    # The same columns and Data Frames as the recorder of temperance_automatic.py: for every agent at every step,
+    # the amount of food consumed, the decision scores for that food and the weights of the five rules. Call
+    # record(w) after every step of the world w.
+    columns = ["Food", "P", "E", "C", "S", "D", "R1", "R2", "R3", "R4", "R5"]
+
+    # Initialization of the recorder class. Row 0 of every agent is step zero, where all the entries are 0. Every
+    # row after that starts at -1, which is what stays there once the agent is dead.
+    def __init__(self, numberAgents, numberSteps):
+        self.data = numpy.full((numberAgents, numberSteps+1, len(self.columns)), -1, dtype=numpy.int64)
+        self.data[:, 0] = 0
+
+    def record(self, w):
+        # Record the data of every living agent of the world at its current step. The agent id is its row.
+        self.data[w.id, w.steps] = w.recordedRows()
+
+    def dataFrames(self):
+        # Turn the recorded data into one Pandas Data Frame per agent.
+        import pandas # Only needed for the Data Frames.
+        return {c: pandas.DataFrame(self.data[c], columns=self.columns) for c in range(len(self.data))}
+
+###########################################
+##       The main program function       ##
+###########################################
+
+def main():
+    w = world(SEED)
+    print("Random seed:", w.seed)
+    start = time.perf_counter()
+    for steps in range(NUMBER_STEPS):
+        w.step()
+    elapsed = time.perf_counter() - start
+    print("Steps:", NUMBER_STEPS, "|| Agents alive:", len(w.id), "of", NUMBER_AGENTS,
+          "|| Food consumed now:", int(w.foodConsumed.sum()), "of", NUMBER_FOOD)
+    print("Time per step: ", round(elapsed / max(NUMBER_STEPS, 1) * 1000, 3), " ms", sep="")
+
+# Run the main program.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Checks the two-phase step of temperance_automatic.py, where LOOK and DECIDE run on a pool of workers (see
+# DECIDE_WORKERS there).
+
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import pytest
+import temperance_automatic
+
+def workerSettings(workers, pool="thread"):
+    return temperance_automatic.config(SEED=5, OUTPUT="off", NUMBER_AGENTS=30, NUMBER_FOOD=45, SIM_AREA=12,
+                                       NUMBER_STEPS=30, DECIDE_WORKERS=workers, DECIDE_POOL=pool)
+
+def test_results_do_not_depend_on_the_number_of_workers():
+    one = temperance_automatic.runSimulation(settings=workerSettings(1))
+    for workers, pool in ((3, "thread"), (2, "process")):
+        data = temperance_automatic.runSimulation(settings=workerSettings(workers, pool))
+        for c in one:
+            assert data[c].equals(one[c])
+
+def test_workers_stop_when_a_phase_fails(monkeypatch):
+    def failingRegrowth(regrowthSchedule, f, steps, regrowth):
+        raise RuntimeError("CONSUME failed")
+    monkeypatch.setattr(temperance_automatic, "scheduleRegrowth", failingRegrowth)
+    threadsBefore = threading.active_count()
+    with pytest.raises(RuntimeError, match="CONSUME failed"):
+        temperance_automatic.runSimulation(settings=workerSettings(3))
+    assert threading.active_count() == threadsBefore
+    assert temperance_automatic.decideFood == {}
+    assert temperance_automatic.decideLookups == {}
@@ -0,0 +1,32 @@
+# Checks that every run of temperance_automatic.py has its own decision score cache, also when runs with different
+# cache sizes go on at the same time in one program.
+
+import concurrent.futures
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import temperance_automatic
+
+def runWithCache(cacheSize):
+    # One quiet run with its own cache of the given size. Returns its Data Frames and the hits and misses of the
+    # cache.
+    settings = temperance_automatic.config(SEED=3, OUTPUT="off", NUMBER_AGENTS=20, NUMBER_FOOD=30, SIM_AREA=10,
+                                           NUMBER_STEPS=40, DECISION_CACHE_SIZE=cacheSize)
+    lookup = temperance_automatic.decisionCache(cacheSize)
+    data = temperance_automatic.runSimulation(settings=settings, decisionLookup=lookup)
+    return data, temperance_automatic.decisionCacheInfo(lookup)
+
+def test_runs_side_by_side_keep_their_own_cache():
+    sizes = [4096, 8, 0, 4096, 8, 0]
+    alone = [runWithCache(size) for size in sizes[:3]]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(sizes)) as pool:
+        together = list(pool.map(runWithCache, sizes))
+    for i, size in enumerate(sizes):
+        data, cacheInfo = together[i]
+        aloneData, aloneInfo = alone[i % 3]
+        assert cacheInfo == aloneInfo
+        assert cacheInfo["maxSize"] == size
+        for c in aloneData:
+            assert data[c].equals(aloneData[c])
+    assert alone[0][1]["hits"] > alone[1][1]["hits"] > 0
+    assert alone[2][1]["hits"] == alone[2][1]["misses"] == 0
@@ -0,0 +1,31 @@
+# Checks that every world of an ensemble of temperance_ensemble.py is the same as a run of temperance_vectorized.py
+# with its seed.
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy
+import pytest
+import temperance_ensemble
+import temperance_vectorized
+
+SEEDS = [3, 17, 2024, 123456789]
+NUMBER_STEPS = 50
+
+@pytest.mark.parametrize("settings", [{},
+                                      {"NUMBER_AGENTS": 40, "NUMBER_FOOD": 60, "SIM_AREA": 12,
+                                       "AGENT_METABOLISM": .9, "FOOD_REGROWTH": 3}])
+def test_every_world_is_the_same_as_a_single_run(monkeypatch, settings):
+    for name, value in settings.items():
+        monkeypatch.setattr(temperance_vectorized, name, value)
+    e, recorders = temperance_ensemble.runEnsemble(SEEDS, NUMBER_STEPS)
+    for k, seed in enumerate(SEEDS):
+        w = temperance_vectorized.world(seed)
+        r = temperance_vectorized.recorder(temperance_vectorized.NUMBER_AGENTS, NUMBER_STEPS)
+        for steps in range(NUMBER_STEPS):
+            w.step()
+            r.record(w)
+        single = e.singleWorld(k)
+        for field in w.agentFields + ("foodConsumed", "foodAmount", "foodGrid", "agentGrid"):
+            assert numpy.array_equal(getattr(single, field), getattr(w, field)), field
+        assert numpy.array_equal(recorders[k].data, r.data)
@@ -0,0 +1,55 @@
+# Checks that the printed output of temperance.py and temperance_automatic.py stays the same for a fixed seed: the
+# grid world and the information panel after every step, with the default settings. The reference files in
+# tests/reference hold that output. If a change is meant to change it, make them again by running this file:
+#
+#   python tests/test_golden_output.py
+
+import contextlib
+import io
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import temperance
+import temperance_automatic
+
+REFERENCE_FOLDER = os.path.join(os.path.dirname(__file__), "reference")
+SEED = 42
+NUMBER_STEPS = 20
+
+def interactiveOutput():
+    # What temperance.py prints for step 0 and every step after it, as if Enter was pressed every time.
+    sim = temperance.simulation(settings=temperance.config(SEED=SEED))
+    screen = temperance.renderer("text")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        screen.draw(sim)
+        for steps in range(NUMBER_STEPS):
+            sim.step()
+            screen.draw(sim)
+    return out.getvalue()
+
+def automaticOutput():
+    # What temperance_automatic.py prints for a whole run, without the plots.
+    settings = temperance_automatic.config(SEED=SEED, NUMBER_STEPS=NUMBER_STEPS, OUTPUT="every", OUTPUT_EVERY=1)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        temperance_automatic.runSimulation(settings=settings)
+    return out.getvalue()
+
+def reference(fileName):
+    with open(os.path.join(REFERENCE_FOLDER, fileName)) as f:
+        return f.read()
+
+def test_interactive_output_stays_the_same():
+    assert interactiveOutput() == reference("output_temperance.txt")
+
+def test_automatic_output_stays_the_same():
+    assert automaticOutput() == reference("output_automatic.txt")
+
+# Make the reference files again from the scripts as they are now.
+if __name__ == "__main__":
+    os.makedirs(REFERENCE_FOLDER, exist_ok=True)
+    for fileName, output in (("output_temperance.txt", interactiveOutput()),
+                             ("output_automatic.txt", automaticOutput())):
+        with open(os.path.join(REFERENCE_FOLDER, fileName), "w") as f:
+            f.write(output)
@@ -0,0 +1,80 @@
+# Checks that the pursuit index (see pursue, stopPursuing and foodGone in temperance.py and temperance_automatic.py)
+# gives the same results as the agent-list loop it replaced, for a fixed seed. The reference files in
+# tests/reference were made with that loop, by running this file:
+#
+#   python tests/test_pursuit_index.py
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import pytest
+import temperance
+import temperance_automatic
+
+REFERENCE_FOLDER = os.path.join(os.path.dirname(__file__), "reference")
+SETTINGS = {"SEED": 5, "NUMBER_AGENTS": 20, "NUMBER_FOOD": 30, "SIM_AREA": 9, "AGENT_METABOLISM": 0.6}
+NUMBER_STEPS = 30
+
+def agentListLoop(module, setattr):
+    # Puts back the agent-list loop of before the pursuit index in the module: an agent pursuing food only sets
+    # a.pursuing, and when food is consumed every agent is checked. The agents that never pursued any food are not
+    # pursuing anything, so the "every agent" list only needs the ones that did.
+    everyAgent = []
+    def pursue(pursuers, a, foodId):
+        a.pursuing = foodId
+        everyAgent.append(a)
+    def stopPursuing(pursuers, a):
+        pass # Dead agents kept their food, as before.
+    def foodGone(pursuers, f):
+        for a2 in everyAgent:
+            if (a2.pursuing == f.id):
+                a2.pursuing = -1
+    setattr(module, "pursue", pursue)
+    setattr(module, "stopPursuing", stopPursuing)
+    setattr(module, "foodGone", foodGone)
+
+def interactiveRows():
+    # The state of every agent of temperance.py after every step, one CSV line per agent and step.
+    sim = temperance.simulation(settings=temperance.config(**SETTINGS))
+    rows = ["step,id,x,y,health,pursuing,consuming,rules,socialPressure"]
+    for steps in range(NUMBER_STEPS):
+        sim.step()
+        for a in sim.agentList:
+            rules = " ".join(str(w) for w in (a.rule1weight, a.rule2weight, a.rule3weight, a.rule4weight,
+                                              a.rule5weight))
+            rows.append(",".join(str(v) for v in (sim.steps, a.id, a.xPosition, a.yPosition, a.health, a.pursuing,
+                                                  a.consuming, rules, a.socialPressure)))
+    return "\n".join(rows) + "\n"
+
+def automaticRows():
+    # The Data Frames of every agent of temperance_automatic.py, one CSV line per agent and step.
+    settings = temperance_automatic.config(**SETTINGS, NUMBER_STEPS=NUMBER_STEPS, OUTPUT="off")
+    data = temperance_automatic.runSimulation(settings=settings)
+    rows = ["agent,step," + ",".join(data[0].columns)]
+    for c, df in data.items():
+        for steps, values in enumerate(df.itertuples(index=False)):
+            rows.append(",".join(str(v) for v in (c, steps, *values)))
+    return "\n".join(rows) + "\n"
+
+def reference(fileName):
+    with open(os.path.join(REFERENCE_FOLDER, fileName)) as f:
+        return f.read()
+
+@pytest.mark.parametrize("oldLoop", [False, True])
+def test_interactive_steps_match_the_agent_list_loop(monkeypatch, capsys, oldLoop):
+    if oldLoop: agentListLoop(temperance, monkeypatch.setattr)
+    assert interactiveRows() == reference("pursuit_temperance.csv")
+
+@pytest.mark.parametrize("oldLoop", [False, True])
+def test_automatic_data_frames_match_the_agent_list_loop(monkeypatch, capsys, oldLoop):
+    if oldLoop: agentListLoop(temperance_automatic, monkeypatch.setattr)
+    assert automaticRows() == reference("pursuit_automatic.csv")
+
+# Make the reference files again with the agent-list loop.
+if __name__ == "__main__":
+    agentListLoop(temperance, setattr)
+    agentListLoop(temperance_automatic, setattr)
+    os.makedirs(REFERENCE_FOLDER, exist_ok=True)
+    for fileName, rows in (("pursuit_temperance.csv", interactiveRows()), ("pursuit_automatic.csv", automaticRows())):
+        with open(os.path.join(REFERENCE_FOLDER, fileName), "w") as f:
+            f.write(rows)
@@ -0,0 +1,94 @@
+# Checks the server of temperance_server.py with the client class, over a local connection.
+
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import pytest
+import temperance
+import temperance_server
+
+async def startServer():
+    # A server on a free port of this computer, and a client connected to it.
+    listener = await asyncio.start_server(temperance_server.server().handleClient, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    return listener, await temperance_server.client.connect("127.0.0.1", port)
+
+def test_steps_match_a_simulation_without_the_server():
+    async def steps():
+        listener, c = await startServer()
+        created = await c.request("create", seed=5, config={"NUMBER_AGENTS": 8, "SIM_AREA": 8})
+        await c.request("subscribe", run=created["run"])
+        await c.request("step", run=created["run"], steps=20)
+        events = []
+        while not events or events[-1]["event"] != "idle":
+            events.append(await c.nextEvent())
+        state = await c.request("state", run=created["run"])
+        await c.close()
+        listener.close()
+        return events, state
+
+    events, state = asyncio.run(steps())
+    assert [e["step"] for e in events[:-1]] == list(range(1, 21))
+    sim = temperance.simulation(5, temperance.config(NUMBER_AGENTS=8, SIM_AREA=8))
+    for s in range(20):
+        sim.step()
+    assert [(a["id"], a["x"], a["y"], a["health"]) for a in state["agents"]] == \
+           [(a.id, a.xPosition, a.yPosition, a.health) for a in sim.agentList]
+
+def test_bad_run_is_an_error_and_the_connection_stays_open():
+    async def badRuns():
+        listener, c = await startServer()
+        errors = []
+        for runId in ([1], {"a": 1}, "1", True, 99):
+            with pytest.raises(ValueError) as error:
+                await c.request("state", run=runId)
+            errors.append(str(error.value))
+        listed = await c.request("list")
+        await c.close()
+        listener.close()
+        return errors, listed
+
+    errors, listed = asyncio.run(badRuns())
+    assert errors[:4] == ["The run must be a whole number."] * 4
+    assert errors[4] == "There is no run 99."
+    assert listed["runs"] == []
+
+def test_requests_fail_when_the_connection_is_lost():
+    async def lostConnection():
+        async def closeAtOnce(reader, writer):
+            writer.close()
+        listener = await asyncio.start_server(closeAtOnce, "127.0.0.1", 0)
+        c = await temperance_server.client.connect("127.0.0.1", listener.sockets[0].getsockname()[1])
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(c.request("list"), 5)
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(c.nextEvent(), 5)
+        listener.close()
+
+    asyncio.run(lostConnection())
+
+def test_every_run_reports_its_own_decision_cache():
+    async def twoRuns():
+        listener, c = await startServer()
+        cached = await c.request("create", seed=5, config={"NUMBER_AGENTS": 8, "SIM_AREA": 8})
+        uncached = await c.request("create", seed=5, config={"NUMBER_AGENTS": 8, "SIM_AREA": 8,
+                                                             "DECISION_CACHE_SIZE": 0})
+        for created in (cached, uncached):
+            await c.request("subscribe", run=created["run"])
+            await c.request("step", run=created["run"], steps=20)
+            while (await c.nextEvent())["event"] != "idle":
+                pass
+        listed = await c.request("list")
+        await c.close()
+        listener.close()
+        return listed
+
+    listed = asyncio.run(twoRuns())
+    sim = temperance.simulation(5, temperance.config(NUMBER_AGENTS=8, SIM_AREA=8))
+    for s in range(20):
+        sim.step()
+    cached, uncached = listed["runs"]
+    assert cached["decisionCache"] == sim.cacheInfo()
+    assert cached["decisionCache"]["hits"] > 0
+    assert uncached["decisionCache"] == {"hits": 0, "misses": 0, "hitRate": 0.0, "size": 0, "maxSize": 0}
@@ -0,0 +1,25 @@
+# Checks that a sharded run of temperance_sharded.py gives exactly the same world as temperance_vectorized.py.
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy
+import pytest
+import temperance_sharded
+import temperance_vectorized
+
+@pytest.mark.parametrize("numberShards", [2, 3, 4])
+@pytest.mark.parametrize("seed", [7, 11])
+def test_sharded_run_is_the_same_as_a_single_run(monkeypatch, seed, numberShards):
+    for name, value in {"NUMBER_AGENTS": 60, "NUMBER_FOOD": 90, "SIM_AREA": 14, "AGENT_VISION": 2,
+                        "FOOD_REGROWTH": 2}.items():
+        monkeypatch.setattr(temperance_vectorized, name, value)
+    w = temperance_vectorized.world(seed)
+    sharded = temperance_sharded.runSharded(w, 40, numberShards)
+    for steps in range(40):
+        w.step()
+    for field in w.agentFields + ("foodConsumed", "foodGrid", "agentGrid"):
+        assert numpy.array_equal(getattr(sharded, field), getattr(w, field)), field
+    assert sorted(sharded.regrowthSchedule) == sorted(w.regrowthSchedule)
+    for regrowStep, eaten in w.regrowthSchedule.items():
+        assert numpy.array_equal(numpy.sort(sharded.regrowthSchedule[regrowStep]), numpy.sort(eaten))
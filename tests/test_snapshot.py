@@ -0,0 +1,34 @@
+# Checks that a run continued from a snapshot gives the same results as a run that was never stopped.
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import temperance_automatic
+
+def quietSettings(**changes):
+    # A config for a run with nothing printed on the way and no plots.
+    return temperance_automatic.config(SEED=7, OUTPUT="off", NUMBER_AGENTS=8, NUMBER_FOOD=15, SIM_AREA=8, **changes)
+
+def test_resume_gives_the_same_data_frames(tmp_path):
+    snapshotFile = str(tmp_path / "checkpoint.snap")
+    whole = temperance_automatic.runSimulation(settings=quietSettings(NUMBER_STEPS=30))
+    temperance_automatic.runSimulation(settings=quietSettings(NUMBER_STEPS=12, CHECKPOINT_FILE=snapshotFile,
+                                                              CHECKPOINT_EVERY=12))
+    resumed = temperance_automatic.runSimulation(resumeFile=snapshotFile, settings=quietSettings(NUMBER_STEPS=30))
+    assert whole.keys() == resumed.keys()
+    for c in whole:
+        assert whole[c].equals(resumed[c])
+
+def test_resume_carries_on_with_the_trajectory_file(tmp_path):
+    snapshotFile = str(tmp_path / "checkpoint.snap")
+    wholeFile, resumedFile = str(tmp_path / "whole.parquet"), str(tmp_path / "resumed.parquet")
+    temperance_automatic.runSimulation(settings=quietSettings(NUMBER_STEPS=30, TRAJECTORY_FILE=wholeFile))
+    # The first run goes on after its snapshot, and continuing from the snapshot must replace those steps.
+    temperance_automatic.runSimulation(settings=quietSettings(NUMBER_STEPS=20, CHECKPOINT_FILE=snapshotFile,
+                                                              CHECKPOINT_EVERY=12, TRAJECTORY_FILE=resumedFile))
+    temperance_automatic.runSimulation(resumeFile=snapshotFile,
+                                       settings=quietSettings(NUMBER_STEPS=30, TRAJECTORY_FILE=resumedFile))
+    whole = temperance_automatic.readTrajectory(wholeFile)
+    resumed = temperance_automatic.readTrajectory(resumedFile)
+    assert resumed.num_rows == whole.num_rows
+    assert resumed.equals(whole)
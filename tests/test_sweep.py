@@ -0,0 +1,17 @@
+# Checks the parameter grid of temperance_sweep.py.
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import pytest
+import temperance_sweep
+
+@pytest.mark.parametrize("name, values", [("RECORD_DATA_FRAMES", [False]), ("OUTPUT", ["every"]), ("SEED", [1])])
+def test_settings_chosen_by_the_sweep_are_refused(name, values):
+    with pytest.raises(ValueError, match=name + " cannot be in the parameter grid"):
+        temperance_sweep.sweep({"NUMBER_AGENTS": [5], name: values}, range(2), 1)
+
+def test_every_run_has_its_data():
+    results = temperance_sweep.sweep({"NUMBER_AGENTS": [3, 4]}, range(2), 1)
+    runs = results.groupby(["Seed", "NUMBER_AGENTS"])["Agent"].nunique()
+    assert runs.to_dict() == {(0, 3): 3, (0, 4): 4, (1, 3): 3, (1, 4): 4}